@@ -0,0 +1,381 @@
+import copy
+import hashlib
+from abc import ABC, abstractmethod
+from enum import Enum
+from math import factorial
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, Field, model_validator
+
+from InterpolationMethods.lagrange import BARYCENTRIC_BLOCK, BarycentricLagrange
+from InterpolationMethods.newton_int import newton_coefficients
+from InterpolationMethods.spline import D_VALUES, SplineBoundary, SplineType, spline_pieces
+from InterpolationMethods.vandermonde import vandermonde_coefficients
+from utils.cache import LRUCache
+from utils.config import (INTERPOLANT_CACHE_MAX_BYTES, INTERPOLANT_CACHE_MAX_ENTRIES,
+                          INTERPOLANT_CACHE_TTL, INTERPOLATION_MAX_POINTS)
+
+
+class InterpolantKind(str, Enum):
+    SPLINE = "spline"
+    NEWTON = "newton"
+    LAGRANGE = "lagrange"
+    VANDERMONDE = "vandermonde"
+
+
+class InterpolantParams(BaseModel):
+    method: InterpolantKind
+    x: List[float]
+    y: List[float]
+    # Only used by splines
+    d: SplineType = SplineType.LINEAR
+    boundary: SplineBoundary = SplineBoundary.NATURAL
+    end_slopes: Optional[Tuple[float, float]] = None
+
+
+class InterpolantSource(BaseModel):
+    """
+    The interpolant of a request, sent either as the points to fit or as the
+    interpolant_id returned when it was stored.
+    """
+
+    interpolant: Optional[InterpolantParams] = None
+    interpolant_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _one_interpolant(self) -> "InterpolantSource":
+        if (self.interpolant is None) == (self.interpolant_id is None):
+            raise ValueError("Send either interpolant or interpolant_id")
+        return self
+
+
+class EvaluateParams(InterpolantSource):
+    # Empty when the points are sent as a binary body
+    points: List[float] = []
+
+
+class DerivativeParams(EvaluateParams):
+    order: int = Field(1, ge=1)
+
+
+class IntegralParams(InterpolantSource):
+    a: float
+    b: float
+
+
+class NodesParams(BaseModel):
+    x: List[float]
+    y: List[float]
+
+
+class Evaluation(BaseModel):
+    values: List[float]
+
+
+class Integral(BaseModel):
+    value: float
+
+
+class InterpolantHandle(BaseModel):
+    interpolant_id: str
+    method: InterpolantKind
+    nodes: int
+    nbytes: int
+    # Seconds it is kept without being used
+    ttl: Optional[float] = None
+
+
+class Interpolant(ABC):
+    """
+    A fitted interpolant, holding only the arrays needed to evaluate it.
+    """
+
+    degree: int
+
+    @abstractmethod
+    def evaluate(self, t: np.ndarray) -> np.ndarray:
+        pass
+
+    @abstractmethod
+    def derivative(self, t: np.ndarray, order: int = 1) -> np.ndarray:
+        pass
+
+    def integral(self, a: float, b: float) -> float:
+        # Gauss-Legendre quadrature with n points is exact up to degree 2n - 1
+        nodes, weights = np.polynomial.legendre.leggauss(self.degree // 2 + 1)
+        half = (b - a) / 2
+        return float(half * (weights @ self.evaluate((a + b) / 2 + half * nodes)))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+
+class PiecewisePolynomial(Interpolant):
+    """
+    A spline, pieces[i, k] being the coefficient of (x - knots[i])^k on
+    [knots[i], knots[i + 1]]. The first and last pieces extend past the ends.
+    """
+
+    def __init__(self, knots: np.ndarray, pieces: np.ndarray):
+        if np.any(np.diff(knots) <= 0):
+            raise ValueError("The x values of a spline must be increasing to evaluate it")
+        self.knots = knots
+        self.pieces = pieces
+        self.degree = pieces.shape[1] - 1
+
+    def _locate(self, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Binary search of the piece of every point at once
+        i = np.clip(np.searchsorted(self.knots, t, side="right") - 1, 0, len(self.knots) - 2)
+        return i, t - self.knots[i]
+
+    @staticmethod
+    def _horner(pieces: np.ndarray, i: np.ndarray, local: np.ndarray) -> np.ndarray:
+        values = pieces[i, -1]
+        for k in range(pieces.shape[1] - 2, -1, -1):
+            values = values * local + pieces[i, k]
+        return values
+
+    def evaluate(self, t: np.ndarray) -> np.ndarray:
+        return self._horner(self.pieces, *self._locate(t))
+
+    def derivative(self, t: np.ndarray, order: int = 1) -> np.ndarray:
+        if order > self.degree:
+            return np.zeros(t.shape)
+        k = np.arange(order, self.degree + 1)
+        falling = np.array([factorial(j) // factorial(j - order) for j in k], dtype=float)
+        return self._horner(self.pieces[:, order:] * falling, *self._locate(t))
+
+    def integral(self, a: float, b: float) -> float:
+        # The antiderivative of every piece, plus the integral up to its knot
+        k = np.arange(1, self.degree + 2)
+        antiderivative = np.zeros((len(self.pieces), self.degree + 2))
+        antiderivative[:, 1:] = self.pieces / k
+        h = np.diff(self.knots)
+        areas = (antiderivative[:, 1:] * h[:, None] ** k).sum(axis=1)
+        antiderivative[:, 0] = np.concatenate([[0], np.cumsum(areas[:-1])])
+
+        i, local = self._locate(np.array([a, b], dtype=float))
+        F = self._horner(antiderivative, i, local)
+        return float(F[1] - F[0])
+
+
+class NewtonPolynomial(Interpolant):
+    """
+    The Newton form c_0 + c_1 (x - x_0) + c_2 (x - x_0)(x - x_1) + ..., evaluated
+    with nested multiplication.
+    """
+
+    def __init__(self, nodes: np.ndarray, coefficients: np.ndarray):
+        self.nodes = nodes
+        self.coefficients = coefficients
+        self.degree = len(coefficients) - 1
+
+    def evaluate(self, t: np.ndarray) -> np.ndarray:
+        values = np.full(t.shape, self.coefficients[-1])
+        for k in range(len(self.coefficients) - 2, -1, -1):
+            values = values * (t - self.nodes[k]) + self.coefficients[k]
+        return values
+
+    def derivative(self, t: np.ndarray, order: int = 1) -> np.ndarray:
+        # Nested multiplication carrying the Taylor coefficients p^(j)(t) / j!,
+        # from p = c_k + (t - x_k) q: D_j(p) = D_{j-1}(q) + (t - x_k) D_j(q)
+        taylor = np.zeros((order + 1,) + t.shape)
+        taylor[0] = self.coefficients[-1]
+        for k in range(len(self.coefficients) - 2, -1, -1):
+            for j in range(order, 0, -1):
+                taylor[j] = taylor[j] * (t - self.nodes[k]) + taylor[j - 1]
+            taylor[0] = taylor[0] * (t - self.nodes[k]) + self.coefficients[k]
+        return factorial(order) * taylor[order]
+
+
+class MonomialPolynomial(Interpolant):
+    """
+    A polynomial given by its coefficients, highest power first, evaluated with
+    Horner's rule.
+    """
+
+    def __init__(self, coefficients: np.ndarray):
+        self.coefficients = coefficients
+        self.degree = len(coefficients) - 1
+
+    @staticmethod
+    def _horner(coefficients: np.ndarray, t: np.ndarray) -> np.ndarray:
+        values = np.zeros(t.shape)
+        for c in coefficients:
+            values = values * t + c
+        return values
+
+    def evaluate(self, t: np.ndarray) -> np.ndarray:
+        return self._horner(self.coefficients, t)
+
+    def derivative(self, t: np.ndarray, order: int = 1) -> np.ndarray:
+        return self._horner(np.polyder(self.coefficients, order), t)
+
+    def integral(self, a: float, b: float) -> float:
+        antiderivative = np.polyint(self.coefficients)
+        return float(np.polyval(antiderivative, b) - np.polyval(antiderivative, a))
+
+
+class BarycentricPolynomial(BarycentricLagrange, Interpolant):
+    """
+    The Lagrange polynomial in barycentric form, see BarycentricLagrange.
+    """
+
+    def _derivative_values(self, values: np.ndarray) -> np.ndarray:
+        # p' has a lower degree, so it is the polynomial through its values at
+        # the nodes, D values with the differentiation matrix
+        # D_ij = (w_j / w_i) / (x_i - x_j) and D_ii = -sum_{j != i} D_ij
+        n = len(self.nodes)
+        result = np.empty(n)
+        block = max(1, BARYCENTRIC_BLOCK // n)
+        for start in range(0, n, block):
+            rows = slice(start, start + block)
+            differences = self.nodes[rows, None] - self.nodes
+            diagonal = differences == 0
+            differences[diagonal] = 1
+            D = self.weights / self.weights[rows, None] / differences
+            D[diagonal] = 0
+            result[rows] = D @ values - D.sum(axis=1) * values[rows]
+        return result
+
+    def derivative(self, t: np.ndarray, order: int = 1) -> np.ndarray:
+        if order > self.degree:
+            return np.zeros(t.shape)
+        derivative = copy.copy(self)
+        for _ in range(order):
+            derivative.values = self._derivative_values(derivative.values)
+        return derivative.evaluate(t)
+
+
+def fit_interpolant(params: InterpolantParams) -> Interpolant:
+    x = np.array(params.x, dtype=float)
+    y = np.array(params.y, dtype=float)
+    if len(x) != len(y) or len(x) == 0:
+        raise ValueError("x and y must have the same, nonzero, length")
+
+    if params.method == InterpolantKind.SPLINE:
+        d = D_VALUES[params.d.value]
+        return PiecewisePolynomial(x, spline_pieces(x, y, d, params.boundary, params.end_slopes))
+    if len(np.unique(x)) != len(x):
+        raise ValueError("The x values must be different")
+    if params.method == InterpolantKind.NEWTON:
+        return NewtonPolynomial(x, newton_coefficients(x, y))
+    if params.method == InterpolantKind.LAGRANGE:
+        return BarycentricPolynomial(x, y)
+    return MonomialPolynomial(vandermonde_coefficients(x, y))
+
+
+def read_points(body: bytes) -> np.ndarray:
+    """
+    The query points of a binary body, little-endian float64 values.
+    """
+
+    if len(body) % 8 != 0:
+        raise ValueError("A binary body must hold float64 values, 8 bytes each")
+    return check_points(np.frombuffer(body, dtype="<f8"))
+
+
+def check_points(points: np.ndarray) -> np.ndarray:
+    if len(points) > INTERPOLATION_MAX_POINTS:
+        raise ValueError(f"At most {INTERPOLATION_MAX_POINTS} points can be evaluated at once")
+    if not np.all(np.isfinite(points)):
+        raise ValueError("The points must be finite numbers")
+    return points
+
+
+# An interpolant to fit, or one already fitted
+Source = Union[InterpolantParams, Interpolant]
+
+
+def _fitted(source: Source) -> Interpolant:
+    return source if isinstance(source, Interpolant) else fit_interpolant(source)
+
+
+def evaluate_interpolant(source: Source, points: np.ndarray) -> np.ndarray:
+    return _fitted(source).evaluate(np.asarray(points, dtype=float))
+
+
+def differentiate_interpolant(source: Source, points: np.ndarray, order: int) -> np.ndarray:
+    return _fitted(source).derivative(np.asarray(points, dtype=float), order)
+
+
+def integrate_interpolant(source: Source, a: float, b: float) -> float:
+    return _fitted(source).integral(a, b)
+
+
+interpolant_cache = LRUCache(
+    "interpolants",
+    INTERPOLANT_CACHE_MAX_ENTRIES,
+    INTERPOLANT_CACHE_MAX_BYTES,
+    sizeof=lambda interpolant: interpolant.nbytes,
+    ttl=INTERPOLANT_CACHE_TTL,
+)
+
+
+def interpolant_id(params: InterpolantParams) -> str:
+    """
+    A hash of everything that defines the interpolant, so fitting the same one
+    twice gives the same id.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    options: tuple = (params.method.value,)
+    # The spline options do not change the other interpolants
+    if params.method == InterpolantKind.SPLINE:
+        options += (params.d.value, params.boundary.value, params.end_slopes)
+    digest.update(repr(options).encode())
+    digest.update(np.array(params.x, dtype=float))
+    digest.update(np.array(params.y, dtype=float))
+    return digest.hexdigest()
+
+
+def interpolant_handle(key: str, params: InterpolantParams, fitted: Interpolant) -> InterpolantHandle:
+    return InterpolantHandle(
+        interpolant_id=key,
+        method=params.method,
+        nodes=len(params.x),
+        nbytes=fitted.nbytes,
+        ttl=interpolant_cache.ttl,
+    )
+
+
+def interpolant_source(data: InterpolantSource) -> Source:
+    """
+    The stored interpolant of a request, or the parameters to fit it. Reading a
+    stored interpolant keeps it for another INTERPOLANT_CACHE_TTL seconds.
+    """
+
+    if data.interpolant_id is None:
+        return data.interpolant
+    fitted = interpolant_cache.get(data.interpolant_id)
+    if fitted is None:
+        raise ValueError(f"Unknown interpolant_id {data.interpolant_id}, fit it again")
+    return fitted
+
+
+def add_nodes(key: str, nodes: NodesParams) -> InterpolantHandle:
+    """
+    Add nodes to a stored Lagrange interpolant, O(n) each instead of the O(n^2)
+    of fitting it again, and store the result under the id of all its nodes.
+    The interpolant under key is left as it was.
+    """
+
+    if len(nodes.x) != len(nodes.y):
+        raise ValueError("x and y must have the same length")
+    fitted = interpolant_cache.get(key)
+    if fitted is None:
+        raise ValueError(f"Unknown interpolant_id {key}, fit it again")
+    if not isinstance(fitted, BarycentricPolynomial):
+        raise ValueError("Only Lagrange interpolants can take new nodes")
+
+    extended = copy.copy(fitted)
+    for x, y in zip(nodes.x, nodes.y):
+        extended.add_node(x, y)
+    params = InterpolantParams(
+        method=InterpolantKind.LAGRANGE, x=extended.nodes.tolist(), y=extended.values.tolist()
+    )
+    new_key = interpolant_id(params)
+    interpolant_cache.put(new_key, extended)
+    return interpolant_handle(new_key, params, extended)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional, Tuple
 
 import numpy as np
 from pydantic import BaseModel
@@ -7,41 +7,130 @@ from pydantic import BaseModel
 class LagranParams(BaseModel):
     x: List[float]
     y: List[float]
+    # Also build the basis polynomials and the polynomial as text, O(n^2)
+    symbolic: bool = False
 
 
 class LagranInt(BaseModel):
     x: List[float]
     y: List[float]
-    polys: List[str]
-    pol: str
+    weights: List[float]
+    polys: Optional[List[str]] = None
+    pol: Optional[str] = None
 
 
-def Lagrange(x: List[float], y: List[float]):
-    polys = []
+# Entries of the (points x nodes) block evaluated at a time by the barycentric form
+BARYCENTRIC_BLOCK = 1 << 20
+
+
+def _weight_scale(x: np.ndarray) -> float:
+    span = x.max() - x.min()
+    return 4 / span if span > 0 else 1.0
+
+
+def barycentric_weights(x: List[float], scale: Optional[float] = None) -> np.ndarray:
+    """
+    The weights w_j = 1 / prod_{k != j} (x_j - x_k) of the barycentric form,
+    up to a common factor: the differences are scaled by 4 / (max x - min x)
+    so the products neither overflow nor underflow for many nodes.
+    """
+
+    x = np.asarray(x, dtype=float)
+    if scale is None:
+        scale = _weight_scale(x)
+    weights = np.empty(len(x))
+    for j in range(len(x)):
+        differences = (x[j] - np.delete(x, j)) * scale
+        weights[j] = 1 / np.prod(differences)
+    return weights
+
+
+class BarycentricLagrange:
+    """
+    The Lagrange polynomial in the second (true) barycentric form,
+    sum_j w_j y_j / (x - x_j) / sum_j w_j / (x - x_j). The weights take O(n^2)
+    once, then every point takes O(n) and so does every node added.
+
+    Parameters
+    ==========
+
+    nodes: The x values, all different.
+    values: The y values.
+    weights: The barycentric weights of the nodes, computed when missing.
+    """
+
+    def __init__(self, nodes: np.ndarray, values: np.ndarray, weights: Optional[np.ndarray] = None):
+        nodes = np.asarray(nodes, dtype=float)
+        if len(nodes) == 0 or len(nodes) != len(values):
+            raise ValueError("x and y must have the same, nonzero, length")
+        if len(np.unique(nodes)) != len(nodes):
+            raise ValueError("The x values must be different")
+        self.nodes = nodes
+        self.values = np.asarray(values, dtype=float)
+        # The common factor of the weights, kept for the nodes added later
+        self.scale = _weight_scale(nodes)
+        self.weights = barycentric_weights(nodes, self.scale) if weights is None else weights
 
+    @property
+    def degree(self) -> int:
+        return len(self.nodes) - 1
+
+    def add_node(self, x: float, y: float) -> None:
+        """
+        Interpolate one more point, dividing every weight by its scaled
+        difference to the new node, in O(n).
+        """
+
+        differences = (self.nodes - x) * self.scale
+        if np.any(differences == 0):
+            raise ValueError(f"There is already a node at x = {x}")
+        weights = np.append(self.weights / differences, 1 / np.prod(-differences))
+        self.nodes = np.append(self.nodes, x)
+        self.values = np.append(self.values, y)
+        self.weights = weights
+
+    def evaluate(self, t: np.ndarray) -> np.ndarray:
+        t = np.asarray(t, dtype=float)
+        result = np.empty(t.shape)
+        block = max(1, BARYCENTRIC_BLOCK // len(self.nodes))
+        for start in range(0, len(t), block):
+            differences = t[start : start + block, None] - self.nodes
+            exact = differences == 0
+            differences[exact] = 1
+            terms = self.weights / differences
+            values = (terms @ self.values) / terms.sum(axis=1)
+            # At a node the formula is 0 / 0, the value is the one of the node
+            on_node = exact.any(axis=1)
+            values[on_node] = self.values[exact[on_node].argmax(axis=1)]
+            result[start : start + block] = values
+        return result
+
+
+def _factor(variable: str, root: float) -> str:
+    # (variable - root), written without double signs
+    if root < 0:
+        return f"({variable}+{np.abs(root)})"
+    if root > 0:
+        return f"({variable}-{root})"
+    return f"({variable})"
+
+
+def lagrange_symbolic(x: List[float], y: List[float]) -> Tuple[List[str], str]:
+    """
+    The basis polynomials L_i(x) and the polynomial sum_i y_i L_i(x) as text.
+    """
+
+    polys = []
     for i in range(len(x)):
-        num = []
-        den = []
-        for j in range(len(x)):
-            if x[j] == x[i]:
-                pass
-            else:
-                an = -x[j]
-                if an < 0:
-                    num.append(f"(x+{np.abs(x[j])})")
-                    den.append(f"({x[i]}+{np.abs(x[j])})")
-                elif an > 0:
-                    num.append(f"(x-{x[j]})")
-                    den.append(f"({x[i]}-{np.abs(x[j])})")
-                else:
-                    num.append("(x)")
-                    den.append(f"({x[i]})")
-
-        numjoin = "".join(num)
-        denjoin = "".join(den)
-        polys.append(numjoin + "/" + denjoin)
-        pol = []
-    for i in range(0, len(y) - 1):
-        pol.append(str(y[i]) + "*" + polys[i])
-
-    return LagranInt(x=x, y=y, polys=polys, pol="+".join(pol))
+        others = [x[j] for j in range(len(x)) if j != i]
+        numerator = "".join(_factor("x", root) for root in others)
+        denominator = "".join(_factor(str(x[i]), root) for root in others)
+        polys.append(numerator + "/" + denominator)
+    pol = "+".join(f"{y[i]}*{polys[i]}" for i in range(len(y)))
+    return polys, pol
+
+
+def Lagrange(x: List[float], y: List[float], symbolic: bool = False):
+    engine = BarycentricLagrange(np.array(x, dtype=float), np.array(y, dtype=float))
+    polys, pol = lagrange_symbolic(x, y) if symbolic else (None, None)
+    return LagranInt(x=x, y=y, weights=engine.weights.tolist(), polys=polys, pol=pol)
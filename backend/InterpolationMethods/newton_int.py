@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 from pydantic import BaseModel
@@ -7,6 +7,8 @@ from pydantic import BaseModel
 class NewtonParams(BaseModel):
     x: List[float]
     y: List[float]
+    # Keep the fitted polynomial on the server and return its interpolant_id
+    store: bool = False
 
 
 class NewtonInt(BaseModel):
@@ -14,15 +16,39 @@ class NewtonInt(BaseModel):
     y: List[float]
     coefficients: List[List[float]]
     pol: str
+    interpolant_id: Optional[str] = None
 
 
-def NewtonInterpol(x: List[float], y: List[float]):
+def divided_differences(x: List[float], y: List[float]) -> np.ndarray:
+    """
+    The table of divided differences, coef[i, j] = f[x_i, ..., x_{i+j}], one
+    column at a time. Its first row holds the coefficients of the Newton form.
+    """
+
+    x = np.asarray(x, dtype=float)
     n = len(y)
     coef = np.zeros([n, n])
     coef[:, 0] = y
     for j in range(1, n):
-        for i in range(n - j):
-            coef[i][j] = (coef[i + 1][j - 1] - coef[i][j - 1]) / (x[i + j] - x[i])
+        coef[: n - j, j] = (coef[1 : n - j + 1, j - 1] - coef[: n - j, j - 1]) / (x[j:] - x[: n - j])
+    return coef
+
+
+def newton_coefficients(x: List[float], y: List[float]) -> np.ndarray:
+    """
+    The coefficients f[x_0], f[x_0, x_1], ... of the Newton form, the first row
+    of divided_differences computed in place in O(n) memory.
+    """
+
+    x = np.asarray(x, dtype=float)
+    coef = np.array(y, dtype=float)
+    for j in range(1, len(coef)):
+        coef[j:] = (coef[j:] - coef[j - 1 : -1]) / (x[j:] - x[: len(x) - j])
+    return coef
+
+
+def NewtonInterpol(x: List[float], y: List[float]):
+    coef = divided_differences(x, y)
     res = coef
     pol = []
     mult = ""
@@ -1,9 +1,13 @@
 from enum import Enum
-from typing import List
+from math import comb, factorial, perm
+from typing import List, Optional, Tuple
 
 import numpy as np
+import scipy.sparse as sp
 from pydantic import BaseModel
 
+from LinearSystemsMethods.direct import detect_structure, factorize, solve_tridiagonal
+
 
 class SplineType(str, Enum):
     LINEAR = "linear"
@@ -11,10 +15,24 @@ class SplineType(str, Enum):
     CUBIC = "cubic"
 
 
+class SplineBoundary(str, Enum):
+    # Zero second derivative at both ends
+    NATURAL = "natural"
+    # The first derivative at both ends is given by end_slopes
+    CLAMPED = "clamped"
+    # Continuous third derivative at the second and the second to last knots
+    NOT_A_KNOT = "not_a_knot"
+
+
 class SplineParams(BaseModel):
     x: List[float]
     y: List[float]
     d: SplineType = SplineType.LINEAR
+    # Only used by cubic splines
+    boundary: SplineBoundary = SplineBoundary.NATURAL
+    end_slopes: Optional[Tuple[float, float]] = None
+    # Keep the fitted spline on the server and return its interpolant_id
+    store: bool = False
 
 
 class Spline(BaseModel):
@@ -22,6 +40,8 @@ class Spline(BaseModel):
     y: List[float]
     d: SplineType = SplineType.LINEAR
     coefficients: List[List[float]]
+    boundary: Optional[SplineBoundary] = None
+    interpolant_id: Optional[str] = None
 
 
 D_VALUES = {
@@ -32,158 +52,267 @@ D_VALUES = {
 
 
 def get_spline(
-    x: List[float], y: List[float], spline_type: SplineType = SplineType.LINEAR
+    x: List[float],
+    y: List[float],
+    spline_type: SplineType = SplineType.LINEAR,
+    boundary: SplineBoundary = SplineBoundary.NATURAL,
+    end_slopes: Optional[Tuple[float, float]] = None,
 ) -> Spline:
-    n = len(x)
+    if len(y) != len(x):
+        raise ValueError("x and y must have the same length")
+
     d = D_VALUES[spline_type.value]
-    A = np.zeros(((d + 1) * (n - 1), (d + 1) * (n - 1)))
-    b = np.zeros(((d + 1) * (n - 1), 1))
-    cua = np.power(x, 2)
-    cub = np.power(x, 3)
-
-    if spline_type == SplineType.LINEAR:  # Linear
-        A, b = construct_linear_spline(x, y, n, A, b)
-        val = np.linalg.inv(A).dot(b)
-        tabla = np.reshape(val, (n - 1, d + 1))
-        return Spline(x=x, y=y, d=spline_type, coefficients=tabla.tolist())
-
-    elif spline_type == SplineType.QUADRATIC:  # Quadratic
-        A, b = construct_quadratic_spline(x, y, n, A, b, cua)
-        val = np.linalg.inv(A).dot(b)
-        tabla = np.reshape(val, (n - 1, d + 1))
-        return Spline(x=x, y=y, d=spline_type, coefficients=tabla.tolist())
-
-    elif spline_type == SplineType.CUBIC:
-        A, b = construct_cubic_spline(x, y, n, A, b, cua, cub)
-        val = np.linalg.inv(A).dot(b)
-        tabla = np.reshape(val, (n - 1, d + 1))
-        return Spline(x=x, y=y, d=spline_type, coefficients=tabla.tolist())
-
-
-def construct_linear_spline(
-    x: List[float], y: List[float], n: int, A: np.ndarray, b: np.ndarray
-):
-    c = 0
-    h = 0
-    for i in range(0, n - 1):
-        A[h, c] = x[i]
-        A[h, c + 1] = 1
-        b[h] = y[i]
-        c += 2
-        h += 1
-
-    c = 0
-    for i in range(1, n):
-        A[h, c] = x[i]
-        A[h, c + 1] = 1
-        b[h] = y[i]
-        c += 2
-        h += 1
-
-    return A, b
-
-
-def construct_quadratic_spline(
+    tabla = spline_coefficients(x, y, d, boundary, end_slopes)
+    return Spline(
+        x=x,
+        y=y,
+        d=spline_type,
+        coefficients=tabla.tolist(),
+        boundary=boundary if spline_type == SplineType.CUBIC else None,
+    )
+
+
+def global_coefficients(local: np.ndarray, knots: np.ndarray) -> np.ndarray:
+    """
+    Expand every piece sum_k a_k (x - x_i)^k, given as local[i, k] = a_k, in the
+    powers of x, highest first, the layout of Spline.coefficients.
+    """
+
+    d = local.shape[1] - 1
+    shift = -np.asarray(knots, dtype=float)
+    powers = np.zeros_like(local)
+    for k in range(d + 1):
+        for m in range(k + 1):
+            powers[:, m] += comb(k, m) * local[:, k] * shift ** (k - m)
+    return powers[:, ::-1]
+
+
+def _knot_spacing(x: List[float], y: List[float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) < 2:
+        raise ValueError("A spline needs at least 2 points")
+    h = np.diff(x)
+    if np.any(h == 0):
+        raise ValueError("Consecutive x values must be different")
+    return x, y, h
+
+
+def cubic_spline_moments(
+    x: List[float],
+    y: List[float],
+    boundary: SplineBoundary = SplineBoundary.NATURAL,
+    end_slopes: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """
+    The second derivatives M_i of the cubic spline at the knots. Continuity of
+    the first derivative gives, for every inner knot,
+
+        h_{i-1} M_{i-1} + 2 (h_{i-1} + h_i) M_i + h_i M_{i+1} = 6 (s_i - s_{i-1})
+
+    with h_i = x_{i+1} - x_i and s_i the slope of the chord (y_{i+1} - y_i) / h_i.
+    The boundary conditions close it as a tridiagonal system, solved in O(n)
+    with the Thomas algorithm. The not-a-knot conditions tie M_0 to M_1 and M_2
+    (and M_{n-1} to the two before it), so they are eliminated from the first
+    and last inner equations to keep the system tridiagonal.
+    """
+
+    x, y, h = _knot_spacing(x, y)
+    n = len(x)
+    s = np.diff(y) / h
+
+    if boundary == SplineBoundary.CLAMPED and end_slopes is None:
+        raise ValueError("A clamped spline needs end_slopes")
+    if boundary == SplineBoundary.NOT_A_KNOT and n <= 3:
+        # A single cubic through the points, i.e. the interpolating parabola
+        curvature = 2 * (s[-1] - s[0]) / (x[-1] - x[0]) if n == 3 else 0.0
+        return np.full(n, curvature)
+
+    sub = np.zeros(n - 1)
+    main = np.ones(n)
+    sup = np.zeros(n - 1)
+    rhs = np.zeros(n)
+    sub[:-1] = h[:-1]
+    main[1:-1] = 2 * (h[:-1] + h[1:])
+    sup[1:] = h[1:]
+    rhs[1:-1] = 6 * np.diff(s)
+
+    if boundary == SplineBoundary.NATURAL:
+        return solve_tridiagonal(sub, main, sup, rhs)
+
+    if boundary == SplineBoundary.CLAMPED:
+        start, end = end_slopes
+        main[0], sup[0], rhs[0] = 2 * h[0], h[0], 6 * (s[0] - start)
+        main[-1], sub[-1], rhs[-1] = 2 * h[-1], h[-1], 6 * (end - s[-1])
+        return solve_tridiagonal(sub, main, sup, rhs)
+
+    # Not-a-knot: M_0 = ((h_0 + h_1) M_1 - h_0 M_2) / h_1 and the mirror image at
+    # the end, substituted in the equations of the inner knots
+    sub, main, sup, rhs = sub[1:-1], main[1:-1], sup[1:-1], rhs[1:-1]
+    h0, h1, a, b = h[0], h[1], h[-2], h[-1]
+    main[0] = (h0 + h1) * (h0 + 2 * h1) / h1
+    sup[0] = (h1**2 - h0**2) / h1
+    main[-1] = (a + b) * (2 * a + b) / a
+    sub[-1] = (a**2 - b**2) / a
+
+    M = np.empty(n)
+    M[1:-1] = solve_tridiagonal(sub, main, sup, rhs)
+    M[0] = ((h0 + h1) * M[1] - h0 * M[2]) / h1
+    M[-1] = ((a + b) * M[-2] - b * M[-3]) / a
+    return M
+
+
+def cubic_spline_pieces(
     x: List[float],
     y: List[float],
-    n: int,
-    A: np.ndarray,
-    b: np.ndarray,
-    cua: np.ndarray,
-):
-    c = 0
-    h = 0
-    for i in range(0, n - 1):
-        A[h, c] = cua[i]
-        A[h, c + 1] = x[i]
-        A[h, c + 2] = 1
-        b[h] = y[i]
-        c += 3
-        h += 1
-
-    c = 0
-    for i in range(1, n):
-        A[h, c] = cua[i]
-        A[h, c + 1] = x[i]
-        A[h, c + 2] = 1
-        b[h] = y[i]
-        c += 3
-        h += 1
-
-    c = 0
-    for i in range(1, n - 1):
-        A[h, c] = 2 * x[i]
-        A[h, c + 1] = 1
-        A[h, c + 3] = -2 * x[i]
-        A[h, c + 4] = -1
-        b[h] = 0
-        c += 4
-        h += 1
-
-    A[h, 0] = 2
-    b[h] = 0
-
-    return A, b
-
-
-def construct_cubic_spline(
+    boundary: SplineBoundary = SplineBoundary.NATURAL,
+    end_slopes: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """
+    The pieces of the cubic spline, from its moments.
+    """
+
+    M = cubic_spline_moments(x, y, boundary, end_slopes)
+    x, y, h = _knot_spacing(x, y)
+    return np.column_stack(
+        [
+            y[:-1],
+            np.diff(y) / h - h * (2 * M[:-1] + M[1:]) / 6,
+            M[:-1] / 2,
+            np.diff(M) / (6 * h),
+        ]
+    )
+
+
+def linear_spline_pieces(x: List[float], y: List[float]) -> np.ndarray:
+    """
+    The pieces of the linear spline, the chords between consecutive points,
+    with no system to solve.
+    """
+
+    x, y, h = _knot_spacing(x, y)
+    return np.column_stack([y[:-1], np.diff(y) / h])
+
+
+def quadratic_spline_pieces(x: List[float], y: List[float]) -> np.ndarray:
+    """
+    The pieces of the quadratic spline whose first piece is a straight line,
+    y_i + b_i t + c_i t^2 with t = x - x_i.
+    Passing through y_{i+1} gives c_i = (s_i - b_i) / h_i, and a continuous
+    first derivative the recurrence b_{i+1} = 2 s_i - b_i from b_0 = s_0, which
+    (-1)^i b_i turns into a cumulative sum.
+    """
+
+    x, y, h = _knot_spacing(x, y)
+    s = np.diff(y) / h
+    signs = (-1.0) ** np.arange(len(s))
+    b = signs * np.concatenate([[s[0]], s[0] - 2 * np.cumsum(signs[:-1] * s[:-1])])
+    return np.column_stack([y[:-1], b, (s - b) / h])
+
+
+def spline_system(x: List[float], y: List[float], d: int) -> Tuple[sp.csr_matrix, np.ndarray]:
+    """
+    The sparse system of the spline of degree d with the pieces
+    sum_k a_{i,k} (x - x_i)^k, one unknown per coefficient, piece after piece.
+
+    Every piece passes through its two points and, at every inner knot, the
+    derivatives 1 to d - 1 of consecutive pieces are equal. The d - 1 missing
+    equations set the derivatives 2, 2, 3, 3, ... to zero alternately at the
+    first and the last point, which gives the quadratic and the natural cubic
+    splines. Every equation only involves two consecutive pieces, so in this
+    order the matrix is banded, with a bandwidth of about 2 (d + 1).
+    """
+
+    x, y, h = _knot_spacing(x, y)
+    m = len(h)
+    size = (d + 1) * m
+    start_orders = [2 + j // 2 for j in range(d - 1) if j % 2 == 0]
+    end_orders = [2 + j // 2 for j in range(d - 1) if j % 2 == 1]
+
+    pieces = np.arange(m)
+    first_row = len(start_orders) + (d + 1) * pieces
+    first_column = (d + 1) * pieces
+    rows: List[np.ndarray] = []
+    columns: List[np.ndarray] = []
+    values: List[np.ndarray] = []
+
+    def add(row: np.ndarray, column: np.ndarray, value: np.ndarray) -> None:
+        row, column, value = np.broadcast_arrays(row, column, value)
+        rows.append(row.ravel())
+        columns.append(column.ravel())
+        values.append(value.astype(float).ravel())
+
+    rhs = np.zeros(size)
+    # p_i(x_i) = y_i and p_i(x_{i+1}) = y_{i+1}
+    add(first_row, first_column, 1)
+    rhs[first_row] = y[:-1]
+    for k in range(d + 1):
+        add(first_row + 1, first_column + k, h**k)
+    rhs[first_row + 1] = y[1:]
+    # p_i^(q)(x_{i+1}) = p_{i+1}^(q)(x_{i+1})
+    inner = pieces[:-1]
+    for q in range(1, d):
+        for k in range(q, d + 1):
+            add(first_row[inner] + 1 + q, first_column[inner] + k, perm(k, q) * h[inner] ** (k - q))
+        add(first_row[inner] + 1 + q, first_column[inner + 1] + q, -factorial(q))
+    for j, q in enumerate(start_orders):
+        add(j, q, factorial(q))
+    for j, q in enumerate(end_orders):
+        row = size - len(end_orders) + j
+        for k in range(q, d + 1):
+            add(row, first_column[-1] + k, perm(k, q) * h[-1] ** (k - q))
+
+    A = sp.csr_matrix(
+        (np.concatenate(values), (np.concatenate(rows), np.concatenate(columns))),
+        shape=(size, size),
+    )
+    return A, rhs
+
+
+def banded_spline_pieces(x: List[float], y: List[float], d: int) -> np.ndarray:
+    """
+    The pieces of the spline of degree d, for any d, from a banded factorization
+    of spline_system.
+    """
+
+    A, rhs = spline_system(x, y, d)
+    local = factorize(A, detect_structure(A), None).solve(rhs)
+    return np.reshape(local, (-1, d + 1))
+
+
+def spline_pieces(
     x: List[float],
     y: List[float],
-    n: int,
-    A: np.ndarray,
-    b: np.ndarray,
-    cua: np.ndarray,
-    cub: np.ndarray,
-):
-    c = 0
-    h = 0
-    for i in range(0, n - 1):
-        A[h, c] = cub[i]
-        A[h, c + 1] = cua[i]
-        A[h, c + 2] = x[i]
-        A[h, c + 3] = 1
-        b[h] = y[i]
-        c += 4
-        h += 1
-
-    c = 0
-    for i in range(1, n):
-        A[h, c] = cub[i]
-        A[h, c + 1] = cua[i]
-        A[h, c + 2] = x[i]
-        A[h, c + 3] = 1
-        b[h] = y[i]
-        c += 4
-        h += 1
-
-    c = 0
-    for i in range(1, n - 1):
-        A[h, c] = 3 * cua[i]
-        A[h, c + 1] = 2 * x[i]
-        A[h, c + 2] = 1
-        A[h, c + 4] = -3 * cua[i]
-        A[h, c + 5] = -2 * x[i]
-        A[h, c + 6] = -1
-        b[h] = 0
-        c += 4
-        h += 1
-
-    c = 0
-    for i in range(1, n - 1):
-        A[h, c] = 6 * x[i]
-        A[h, c + 1] = 2
-        A[h, c + 4] = -6 * x[i]
-        A[h, c + 5] = -2
-        b[h] = 0
-        c += 4
-        h += 1
-
-    A[h, 0] = 6 * x[0]
-    A[h, 1] = 2
-    b[h] = 0
-    h += 1
-    A[h, c] = 6 * x[-1]
-    A[h, c + 1] = 2
-    b[h] = 0
-
-    return A, b
+    d: int,
+    boundary: SplineBoundary = SplineBoundary.NATURAL,
+    end_slopes: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """
+    The (n - 1) x (d + 1) table of the pieces sum_k a_{i,k} (x - x_i)^k of the
+    spline of degree d, row i holding a_{i,0} to a_{i,d}. Degrees 1 to 3 have
+    their own O(n) builders, the boundary conditions only apply to cubic ones.
+    """
+
+    if d == 1:
+        return linear_spline_pieces(x, y)
+    if d == 2:
+        return quadratic_spline_pieces(x, y)
+    if d == 3:
+        return cubic_spline_pieces(x, y, boundary, end_slopes)
+    return banded_spline_pieces(x, y, d)
+
+
+def spline_coefficients(
+    x: List[float],
+    y: List[float],
+    d: int,
+    boundary: SplineBoundary = SplineBoundary.NATURAL,
+    end_slopes: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """
+    The (n - 1) x (d + 1) coefficient table of the spline of degree d, in the
+    powers of x like Spline.coefficients.
+    """
+
+    local = spline_pieces(x, y, d, boundary, end_slopes)
+    return global_coefficients(local, np.asarray(x[:-1], dtype=float))
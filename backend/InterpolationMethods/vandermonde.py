@@ -16,13 +16,18 @@ class VanderInt(BaseModel):
     pol: str
 
 
+def vandermonde_coefficients(x: List[float], y: List[float]) -> np.ndarray:
+    """
+    The coefficients of the interpolating polynomial, highest power first, from
+    the Vandermonde system.
+    """
+
+    A = np.vander(np.asarray(x, dtype=float))
+    return np.linalg.solve(A, np.asarray(y, dtype=float))
+
+
 def Vandermonde(x: List[float], y: List[float]):
-    A = np.zeros((len(x), len(x)))
-    for i in range(0, len(x)):
-        for j in range(0, len(x)):
-            A[i][j] = np.power(x[i], j)
-    b = np.array(y)
-    coefficients = (np.flip(np.linalg.solve(A, b))).tolist()
+    coefficients = vandermonde_coefficients(x, y).tolist()
     pol = []
     order = len(coefficients) - 1
     for item in coefficients:
@@ -0,0 +1,85 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+from LinearSystemsMethods.splitting import Sweep, batch_iterations
+from utils.trace import IterationTrace, TableLayout, drain
+
+# One right-hand side, or an n x k matrix with one right-hand side per column
+RightHandSides = Union[List[float], List[List[float]]]
+
+
+class BatchIteration(BaseModel):
+    step: int
+    errors: List[float]
+    active: int
+
+
+class BatchResult(BaseModel):
+    solution: List[List[float]]
+    steps: List[int]
+    errors: List[float]
+    converged: List[bool]
+    transition_matrix: Optional[List[List[float]]] = None
+    coefficient_matrix: Optional[List[List[float]]] = None
+    spectral_radius: Optional[float] = None
+    iterations: List[BatchIteration]
+    columns: Optional[Dict[str, list]] = None
+    converges: Optional[bool] = None
+    matrix_id: Optional[str] = None
+    # Only set by SOR
+    relaxation_factor: Optional[float] = None
+    convergence_rate: Optional[float] = None
+
+
+def right_hand_sides(
+    vector_b: RightHandSides, x0: RightHandSides, n: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return b and x0 as arrays for a system of size n. When b holds several
+    right-hand sides a single x0 is used as the start of all of them.
+    """
+
+    b = np.array(vector_b, dtype=float)
+    x0 = np.array(x0, dtype=float)
+    if b.shape[0] != n or x0.shape[0] != n:
+        raise ValueError(f"The right-hand side and x0 must have {n} rows")
+    if b.ndim == 2 and x0.ndim == 1:
+        x0 = np.repeat(x0[:, None], b.shape[1], axis=1)
+    if x0.shape != b.shape:
+        raise ValueError("x0 must have one column per right-hand side")
+    return b, x0
+
+
+def batch_method(
+    sweep: Sweep,
+    x0: np.ndarray,
+    tol: float,
+    niter: int,
+    layout: TableLayout,
+    radius: Optional[float],
+    matrices: Dict[str, Any],
+    matrix_id: Optional[str] = None,
+) -> BatchResult:
+    """
+    Iterate all the columns of x0 together with sweep, which was built once for
+    the whole block of right-hand sides, and report the convergence of each.
+    """
+
+    trace = IterationTrace(niter, step=int, errors=(float, x0.shape[1]), active=int)
+    solution = drain(batch_iterations(sweep, x0, tol, niter), trace)
+
+    below = trace.column("errors") < tol
+    steps = np.where(below.any(axis=0), below.argmax(axis=0) + 1, len(trace))
+    return BatchResult(
+        solution=solution.tolist(),
+        steps=steps.tolist(),
+        errors=trace.last("errors").tolist(),
+        converged=below[-1].tolist(),
+        **matrices,
+        spectral_radius=radius,
+        **trace.export(layout, field="iterations"),
+        converges=radius < 1 if radius is not None else None,
+        matrix_id=matrix_id,
+    )
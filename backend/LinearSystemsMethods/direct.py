@@ -0,0 +1,297 @@
+import time
+from enum import Enum
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+from pydantic import BaseModel
+from scipy.linalg import (LinAlgError, cho_factor, cho_solve, cho_solve_banded, cholesky_banded,
+                          lapack, lu_factor, lu_solve)
+from scipy.sparse.linalg import splu
+
+from LinearSystemsMethods.batch import RightHandSides
+from LinearSystemsMethods.kernels import thomas
+from LinearSystemsMethods.matrices import Matrix, SystemMatrix, is_symmetric, nbytes
+from LinearSystemsMethods.operators import system_matrix
+
+
+class DirectPath(str, Enum):
+    TRIDIAGONAL = "tridiagonal"
+    BANDED_CHOLESKY = "banded_cholesky"
+    BANDED_LU = "banded_lu"
+    DENSE_CHOLESKY = "dense_cholesky"
+    DENSE_LU = "dense_lu"
+    SPARSE_LU = "sparse_lu"
+
+
+class DirectParams(SystemMatrix):
+    vector_b: RightHandSides
+    # Skip the structure detection and use this path
+    path: Optional[DirectPath] = None
+
+
+class MatrixStructure(BaseModel):
+    lower_bandwidth: int
+    upper_bandwidth: int
+    symmetric: bool
+    positive_diagonal: bool
+    diagonally_dominant: bool
+    strictly_diagonally_dominant: bool
+
+
+class DirectResult(BaseModel):
+    solution: Union[List[float], List[List[float]]]
+    path: DirectPath
+    structure: MatrixStructure
+    factorization_ms: float
+    solve_ms: float
+    cached_factorization: bool
+    residual: float
+    matrix_id: Optional[str] = None
+
+
+# A band is stored instead of the whole matrix while its width is at most this
+# fraction of n
+BANDED_MAX_FRACTION = 0.25
+
+
+class Factorization:
+    """
+    A factored matrix, ready to solve any number of right-hand sides.
+
+    Parameters
+    ==========
+
+    path: The kind of factorization.
+    solve: The function b -> x, for a vector b or an n x k block.
+    nbytes: The approximate memory used by the factors.
+    """
+
+    def __init__(self, path: DirectPath, solve: Callable[[np.ndarray], np.ndarray], nbytes: int):
+        self.path = path
+        self.solve = solve
+        self.nbytes = nbytes
+
+
+def solve_tridiagonal(
+    sub: np.ndarray, main: np.ndarray, sup: np.ndarray, b: np.ndarray
+) -> np.ndarray:
+    """
+    Solve a tridiagonal system with the Thomas algorithm in O(n), which needs no
+    pivoting when the matrix is diagonally dominant or symmetric positive
+    definite.
+
+    Parameters
+    ==========
+
+    sub: The n - 1 entries below the diagonal, sub[i] = A[i + 1, i].
+    main: The n entries of the diagonal.
+    sup: The n - 1 entries above the diagonal, sup[i] = A[i, i + 1].
+    b: The right-hand side, a vector or an n x k block.
+    """
+
+    b = np.asarray(b, dtype=float)
+    block = b.reshape((b.shape[0], -1))
+    x = np.empty_like(block)
+    failed = thomas(
+        np.ascontiguousarray(sub, dtype=float),
+        np.ascontiguousarray(main, dtype=float),
+        np.ascontiguousarray(sup, dtype=float),
+        np.ascontiguousarray(block),
+        x,
+    )
+    if failed != -1:
+        raise LinAlgError(f"The Thomas algorithm found a zero pivot in row {failed}")
+    return x.reshape(b.shape)
+
+
+def _diagonal(A: Matrix, k: int) -> np.ndarray:
+    return A.diagonal(k) if sp.issparse(A) else np.diagonal(A, k)
+
+
+def bandwidths(A: Matrix) -> Tuple[int, int]:
+    """
+    The number of diagonals below and above the main one that hold nonzeros.
+    """
+
+    if sp.issparse(A):
+        coo = A.tocoo()
+        rows, cols = coo.row[coo.data != 0], coo.col[coo.data != 0]
+    else:
+        rows, cols = np.nonzero(A)
+    if len(rows) == 0:
+        return 0, 0
+    offsets = cols.astype(np.int64) - rows
+    return int(max(0, -offsets.min())), int(max(0, offsets.max()))
+
+
+def detect_structure(A: Matrix) -> MatrixStructure:
+    lower, upper = bandwidths(A)
+    d = _diagonal(A, 0)
+    off_diagonal = np.asarray(abs(A).sum(axis=1)).ravel() - np.abs(d)
+    return MatrixStructure(
+        lower_bandwidth=lower,
+        upper_bandwidth=upper,
+        symmetric=lower == upper and is_symmetric(A),
+        positive_diagonal=bool(np.all(d > 0)),
+        diagonally_dominant=bool(np.all(np.abs(d) >= off_diagonal)),
+        strictly_diagonally_dominant=bool(np.all(np.abs(d) > off_diagonal)),
+    )
+
+
+def _band(A: Matrix, lower: int, upper: int) -> np.ndarray:
+    # LAPACK band storage, ab[upper + i - j, j] = A[i, j]
+    n = A.shape[0]
+    ab = np.zeros((lower + upper + 1, n))
+    for k in range(-lower, upper + 1):
+        d = _diagonal(A, k)
+        if k >= 0:
+            ab[upper - k, k:] = d
+        else:
+            ab[upper - k, : n + k] = d
+    return ab
+
+
+def _tridiagonal(A: Matrix) -> Factorization:
+    sub, main, sup = _diagonal(A, -1), _diagonal(A, 0), _diagonal(A, 1)
+    return Factorization(
+        DirectPath.TRIDIAGONAL,
+        lambda b: solve_tridiagonal(sub, main, sup, b),
+        sub.nbytes + main.nbytes + sup.nbytes,
+    )
+
+
+def _banded_cholesky(A: Matrix, upper: int) -> Factorization:
+    factor = cholesky_banded(_band(A, 0, upper))
+    return Factorization(
+        DirectPath.BANDED_CHOLESKY, lambda b: cho_solve_banded((factor, False), b), factor.nbytes
+    )
+
+
+def _banded_lu(A: Matrix, lower: int, upper: int) -> Factorization:
+    # dgbtrf needs lower extra rows on top of the band for the fill-in of pivoting
+    storage = np.zeros((2 * lower + upper + 1, A.shape[0]))
+    storage[lower:] = _band(A, lower, upper)
+    lu, pivots, info = lapack.dgbtrf(storage, lower, upper)
+    if info > 0:
+        raise LinAlgError("The matrix is singular")
+
+    def solve(b: np.ndarray) -> np.ndarray:
+        x, _ = lapack.dgbtrs(lu, lower, upper, b, pivots)
+        return x
+
+    return Factorization(DirectPath.BANDED_LU, solve, lu.nbytes + pivots.nbytes)
+
+
+def _dense_cholesky(A: Matrix) -> Factorization:
+    factor = cho_factor(A)
+    return Factorization(DirectPath.DENSE_CHOLESKY, lambda b: cho_solve(factor, b), factor[0].nbytes)
+
+
+def _dense_lu(A: Matrix) -> Factorization:
+    lu, pivots = lu_factor(A, check_finite=False)
+    if np.any(np.diagonal(lu) == 0):
+        raise LinAlgError("The matrix is singular")
+    return Factorization(
+        DirectPath.DENSE_LU, lambda b: lu_solve((lu, pivots), b), lu.nbytes + pivots.nbytes
+    )
+
+
+def _sparse_lu(A: Matrix) -> Factorization:
+    lu = splu(sp.csc_matrix(A))
+    return Factorization(
+        DirectPath.SPARSE_LU, lu.solve, nbytes(lu.L.tocsr()) + nbytes(lu.U.tocsr())
+    )
+
+
+def factorize(A: Matrix, structure: MatrixStructure, path: Optional[DirectPath]) -> Factorization:
+    """
+    Factor A along the requested path, or along the cheapest one its structure
+    allows: the Thomas algorithm for a strictly diagonally dominant tridiagonal
+    matrix, which needs no pivoting, a banded Cholesky or LU factorization for a narrow band, and a
+    dense Cholesky or LU factorization, or a sparse LU one, otherwise. Cholesky
+    is only tried on symmetric matrices with a positive diagonal and falls back
+    to LU when the matrix turns out not to be positive definite. Likewise a
+    tridiagonal matrix whose Thomas elimination meets a zero pivot falls back to
+    a banded LU factorization with pivoting, unless the path was requested.
+    """
+
+    lower, upper = structure.lower_bandwidth, structure.upper_bandwidth
+    spd_candidate = structure.symmetric and structure.positive_diagonal
+
+    automatic = path is None
+    if path is None:
+        if lower <= 1 and upper <= 1 and structure.strictly_diagonally_dominant:
+            path = DirectPath.TRIDIAGONAL
+        elif lower + upper + 1 <= BANDED_MAX_FRACTION * A.shape[0]:
+            path = DirectPath.BANDED_CHOLESKY if spd_candidate else DirectPath.BANDED_LU
+        elif sp.issparse(A):
+            path = DirectPath.SPARSE_LU
+        else:
+            path = DirectPath.DENSE_CHOLESKY if spd_candidate else DirectPath.DENSE_LU
+
+    if path == DirectPath.TRIDIAGONAL:
+        if lower > 1 or upper > 1:
+            raise ValueError("The matrix is not tridiagonal")
+        factorization = _tridiagonal(A)
+        if not automatic:
+            return factorization
+        try:
+            # The factors are only computed by the solve, so try it once
+            factorization.solve(np.ones(A.shape[0]))
+            return factorization
+        except LinAlgError:
+            return _banded_lu(A, 1, 1)
+    if path == DirectPath.BANDED_CHOLESKY:
+        try:
+            return _banded_cholesky(A, upper)
+        except LinAlgError:
+            return _banded_lu(A, lower, upper)
+    if path == DirectPath.BANDED_LU:
+        return _banded_lu(A, lower, upper)
+    if path == DirectPath.SPARSE_LU:
+        return _sparse_lu(A)
+    dense = A.toarray() if sp.issparse(A) else np.asarray(A)
+    if path == DirectPath.DENSE_CHOLESKY:
+        try:
+            return _dense_cholesky(dense)
+        except LinAlgError:
+            pass
+    return _dense_lu(dense)
+
+
+def direct_method(params: DirectParams) -> DirectResult:
+    A, operators = system_matrix(params)
+    b = np.array(params.vector_b, dtype=float)
+    if b.shape[0] != A.shape[0]:
+        raise ValueError(f"The right-hand side must have {A.shape[0]} rows")
+
+    structure = operators.get("structure", lambda: detect_structure(A))
+    requested = params.path.value if params.path is not None else None
+    start = time.perf_counter()
+    cached = operators.has("factorization", requested)
+    factorization = operators.get(
+        "factorization", lambda: factorize(A, structure, params.path), requested
+    )
+    factorization_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    x = factorization.solve(b)
+    solve_ms = (time.perf_counter() - start) * 1000
+
+    x = np.asarray(x)
+    if x.ndim == 2 and b.ndim == 1:
+        x = x.ravel()
+    if not np.all(np.isfinite(x)):
+        raise ValueError("The matrix is singular")
+
+    return DirectResult(
+        solution=x.tolist(),
+        path=factorization.path,
+        structure=structure,
+        factorization_ms=factorization_ms,
+        solve_ms=solve_ms,
+        cached_factorization=cached,
+        residual=float(np.linalg.norm(b - A @ x)),
+        matrix_id=operators.key,
+    )
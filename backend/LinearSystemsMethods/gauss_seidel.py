@@ -1,16 +1,27 @@
-from typing import List
+from typing import Any, Dict, Generator, List, Optional, Union
 
 import numpy as np
 from pydantic import BaseModel, Field
 
+from LinearSystemsMethods.batch import BatchResult, RightHandSides, batch_method, right_hand_sides
+from LinearSystemsMethods.matrices import SystemMatrix
+from LinearSystemsMethods.operators import system_matrix
+from LinearSystemsMethods.spectral import IterationMethod, SpectralRadiusMode, iteration_radius
+from LinearSystemsMethods.splitting import (batch_iterations, sor_matrices, sor_splitting,
+                               sor_sweep, stationary_iterations)
+from utils.trace import IterationTrace, TableLayout, drain
+
 
 # Clases y estructuras
-class GaussSeidelParams(BaseModel):
-    matrix_a: List[List[float]]
-    vector_b: List[float]
-    x0: List[float]
+class GaussSeidelParams(SystemMatrix):
+    vector_b: RightHandSides
+    x0: RightHandSides
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
+    spectral_radius_mode: SpectralRadiusMode = SpectralRadiusMode.ESTIMATE
+    spectral_tol: float = Field(1e-6, gt=0, lt=1)
+    include_matrices: bool = False
 
 
 class GaussSeidelIteration(BaseModel):
@@ -20,45 +31,69 @@ class GaussSeidelIteration(BaseModel):
 
 
 class GaussSeidelResult(BaseModel):
-    transition_matrix: List[List[float]]
-    coefficient_matrix: List[List[float]]
-    spectral_radius: float
+    transition_matrix: Optional[List[List[float]]] = None
+    coefficient_matrix: Optional[List[List[float]]] = None
+    spectral_radius: Optional[float] = None
     iterations: List[GaussSeidelIteration]
-    converges: bool
+    columns: Optional[Dict[str, list]] = None
+    converges: Optional[bool] = None
+    matrix_id: Optional[str] = None
 
 
 # Método de Gauss-Seidel adaptado
-def gauss_seidel_method(params: GaussSeidelParams) -> GaussSeidelResult:
-    A = np.array(params.matrix_a)
-    b = np.array(params.vector_b).reshape((-1, 1))
-    x0 = np.array(params.x0).reshape((-1, 1))
-
-    D = np.diag(np.diag(A))
-    L = -1 * np.tril(A) + D
-    U = -1 * np.triu(A) + D
-    T = np.linalg.inv(D - L) @ U
-    C = np.linalg.inv(D - L) @ b
-
-    spectral_radius = max(abs(np.linalg.eigvals(T)))
-    converges = spectral_radius < 1
-
-    iterations = []
-    xP = x0
-    for i in range(params.niter):
-        xA = T @ xP + C
-        error = np.linalg.norm(xP - xA)
-        xP = xA
-
-        iterations.append(
-            GaussSeidelIteration(step=i, x=xA.flatten().tolist(), error=error)
+def gauss_seidel_iterations(
+    params: GaussSeidelParams,
+) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Yield one row per Gauss-Seidel iteration and return the last iterate, or the
+    last block of iterates when vector_b holds several right-hand sides.
+    """
+    A, operators = system_matrix(params)
+    b, x0 = right_hand_sides(params.vector_b, params.x0, A.shape[0])
+    splitting = operators.get("sor_splitting", lambda: sor_splitting(A, 1), 1)
+
+    iterations = batch_iterations if b.ndim == 2 else stationary_iterations
+    return (yield from iterations(sor_sweep(A, b, 1, splitting), x0, params.tol, params.niter))
+
+
+def gauss_seidel_method(params: GaussSeidelParams) -> Union[GaussSeidelResult, BatchResult]:
+    A, operators = system_matrix(params)
+    b, x0 = right_hand_sides(params.vector_b, params.x0, A.shape[0])
+
+    radius = iteration_radius(
+        operators,
+        IterationMethod.GAUSS_SEIDEL,
+        1,
+        params.spectral_radius_mode,
+        params.spectral_tol,
+    )
+    converges = radius < 1 if radius is not None else None
+
+    matrices = {}
+    if params.include_matrices:
+        T, C = sor_matrices(A, b, 1)
+        matrices = {"transition_matrix": T.tolist(), "coefficient_matrix": C.tolist()}
+
+    if b.ndim == 2:
+        splitting = operators.get("sor_splitting", lambda: sor_splitting(A, 1), 1)
+        return batch_method(
+            sor_sweep(A, b, 1, splitting),
+            x0,
+            params.tol,
+            params.niter,
+            params.layout,
+            radius,
+            matrices,
+            operators.key,
         )
-        if error < params.tol:
-            break
+
+    iterations = IterationTrace(params.niter, step=int, x=(float, A.shape[0]), error=float)
+    drain(gauss_seidel_iterations(params), iterations)
 
     return GaussSeidelResult(
-        transition_matrix=T.tolist(),
-        coefficient_matrix=C.tolist(),
-        spectral_radius=spectral_radius,
-        iterations=iterations,
+        **matrices,
+        spectral_radius=radius,
+        **iterations.export(params.layout, field="iterations"),
         converges=converges,
+        matrix_id=operators.key,
     )
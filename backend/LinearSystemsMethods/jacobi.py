@@ -1,14 +1,25 @@
-from typing import List
+from typing import Any, Dict, Generator, List, Optional, Union
 import numpy as np
 from pydantic import BaseModel, Field
 
+from LinearSystemsMethods.batch import BatchResult, RightHandSides, batch_method, right_hand_sides
+from LinearSystemsMethods.matrices import SystemMatrix
+from LinearSystemsMethods.operators import system_matrix
+from LinearSystemsMethods.spectral import IterationMethod, SpectralRadiusMode, iteration_radius
+from LinearSystemsMethods.splitting import (batch_iterations, jacobi_matrices, jacobi_sweep,
+                               stationary_iterations)
+from utils.trace import IterationTrace, TableLayout, drain
+
 # Clases
-class JacobiParams(BaseModel):
-    matrix_a: List[List[float]]
-    vector_b: List[float]
-    x0: List[float]
+class JacobiParams(SystemMatrix):
+    vector_b: RightHandSides
+    x0: RightHandSides
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
+    spectral_radius_mode: SpectralRadiusMode = SpectralRadiusMode.ESTIMATE
+    spectral_tol: float = Field(1e-6, gt=0, lt=1)
+    include_matrices: bool = False
 
 class JacobiIteration(BaseModel):
     step: int
@@ -16,42 +27,60 @@ class JacobiIteration(BaseModel):
     error: float
 
 class JacobiResult(BaseModel):
-    transition_matrix: List[List[float]]
-    coefficient_matrix: List[List[float]]
-    spectral_radius: float
+    transition_matrix: Optional[List[List[float]]] = None
+    coefficient_matrix: Optional[List[List[float]]] = None
+    spectral_radius: Optional[float] = None
     iterations: List[JacobiIteration]
-    converges: bool
+    columns: Optional[Dict[str, list]] = None
+    converges: Optional[bool] = None
+    matrix_id: Optional[str] = None
 
 # Método Jacobi
-def jacobi_method(params: JacobiParams) -> JacobiResult:
-    A = np.array(params.matrix_a)
-    b = np.array(params.vector_b).reshape((-1, 1))
-    x0 = np.array(params.x0).reshape((-1, 1))
-
-    D = np.diag(np.diag(A))
-    L = -1 * np.tril(A, -1)
-    U = -1 * np.triu(A, 1)
-    T = np.linalg.inv(D) @ (L + U)
-    C = np.linalg.inv(D) @ b
-
-    spectral_radius = max(abs(np.linalg.eigvals(T)))
-    converges = spectral_radius < 1
-
-    iterations = []
-    xP = x0
-    for k in range(params.niter):
-        xA = T @ xP + C
-        error = np.linalg.norm(xP - xA)
-        xP = xA
-
-        iterations.append(JacobiIteration(step=k, x=xA.flatten().tolist(), error=error))
-        if error < params.tol:
-            break
+def jacobi_iterations(params: JacobiParams) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Yield one row per Jacobi iteration and return the last iterate, or the last
+    block of iterates when vector_b holds several right-hand sides.
+    """
+    A, _ = system_matrix(params)
+    b, x0 = right_hand_sides(params.vector_b, params.x0, A.shape[0])
+
+    iterations = batch_iterations if b.ndim == 2 else stationary_iterations
+    return (yield from iterations(jacobi_sweep(A, b), x0, params.tol, params.niter))
+
+
+def jacobi_method(params: JacobiParams) -> Union[JacobiResult, BatchResult]:
+    A, operators = system_matrix(params)
+    b, x0 = right_hand_sides(params.vector_b, params.x0, A.shape[0])
+
+    radius = iteration_radius(
+        operators, IterationMethod.JACOBI, 1, params.spectral_radius_mode, params.spectral_tol
+    )
+    converges = radius < 1 if radius is not None else None
+
+    matrices = {}
+    if params.include_matrices:
+        T, C = jacobi_matrices(A, b)
+        matrices = {"transition_matrix": T.tolist(), "coefficient_matrix": C.tolist()}
+
+    if b.ndim == 2:
+        return batch_method(
+            jacobi_sweep(A, b),
+            x0,
+            params.tol,
+            params.niter,
+            params.layout,
+            radius,
+            matrices,
+            operators.key,
+        )
+
+    iterations = IterationTrace(params.niter, step=int, x=(float, A.shape[0]), error=float)
+    drain(jacobi_iterations(params), iterations)
 
     return JacobiResult(
-        transition_matrix=T.tolist(),
-        coefficient_matrix=C.tolist(),
-        spectral_radius=spectral_radius,
-        iterations=iterations,
+        **matrices,
+        spectral_radius=radius,
+        **iterations.export(params.layout, field="iterations"),
         converges=converges,
+        matrix_id=operators.key,
     )
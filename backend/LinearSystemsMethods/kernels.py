@@ -0,0 +1,123 @@
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional, the sweeps fall back to scipy
+    numba = None
+
+HAS_NUMBA = numba is not None
+
+
+def _sor_csr_sweep(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    data: np.ndarray,
+    diagonal: np.ndarray,
+    b: np.ndarray,
+    x: np.ndarray,
+    w: float,
+) -> np.ndarray:
+    # Row by row in place, so every row already sees the new values of the previous ones
+    x = x.copy()
+    for i in range(b.shape[0]):
+        s = 0.0
+        for k in range(indptr[i], indptr[i + 1]):
+            s += data[k] * x[indices[k]]
+        x[i] += w * (b[i] - s) / diagonal[i]
+    return x
+
+
+def _ilu0(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, diagonal: np.ndarray) -> int:
+    # ILU(0) in place on CSR arrays with sorted indices: afterwards the strict lower
+    # part holds L (unit diagonal) and the rest holds U. Returns the row of a zero
+    # pivot, or -1.
+    n = indptr.shape[0] - 1
+    position = np.full(n, -1)
+    for i in range(n):
+        for jj in range(indptr[i], indptr[i + 1]):
+            position[indices[jj]] = jj
+        for kk in range(indptr[i], indptr[i + 1]):
+            k = indices[kk]
+            if k >= i:
+                break
+            pivot = data[diagonal[k]]
+            if pivot == 0:
+                return k
+            data[kk] /= pivot
+            for jj in range(diagonal[k] + 1, indptr[k + 1]):
+                target = position[indices[jj]]
+                if target != -1:
+                    data[target] -= data[kk] * data[jj]
+        for jj in range(indptr[i], indptr[i + 1]):
+            position[indices[jj]] = -1
+        if data[diagonal[i]] == 0:
+            return i
+    return -1
+
+
+def _ic0(indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, diagonal: np.ndarray) -> int:
+    # IC(0) in place on the CSR arrays of the lower triangle of a symmetric matrix,
+    # with sorted indices, leaving L such that L L^T ~ A. Returns the row where a
+    # pivot is not positive, or -1.
+    n = indptr.shape[0] - 1
+    position = np.full(n, -1)
+    for i in range(n):
+        for jj in range(indptr[i], indptr[i + 1]):
+            position[indices[jj]] = jj
+        for kk in range(indptr[i], indptr[i + 1]):
+            k = indices[kk]
+            s = data[kk]
+            if k < i:
+                for jj in range(indptr[k], diagonal[k]):
+                    target = position[indices[jj]]
+                    if target != -1:
+                        s -= data[target] * data[jj]
+                data[kk] = s / data[diagonal[k]]
+            else:
+                for jj in range(indptr[i], kk):
+                    s -= data[jj] * data[jj]
+                if s <= 0:
+                    return i
+                data[kk] = np.sqrt(s)
+        for jj in range(indptr[i], indptr[i + 1]):
+            position[indices[jj]] = -1
+    return -1
+
+
+def _thomas(
+    sub: np.ndarray, main: np.ndarray, sup: np.ndarray, b: np.ndarray, x: np.ndarray
+) -> int:
+    # Tridiagonal elimination without pivoting, writing the solution of every
+    # column of b (n x k) to x. sub[i] = A[i + 1, i] and sup[i] = A[i, i + 1].
+    # Returns the row of a zero pivot, or -1.
+    n, k = b.shape
+    c = np.empty(n)
+    pivot = main[0]
+    if pivot == 0:
+        return 0
+    c[0] = sup[0] / pivot if n > 1 else 0.0
+    for j in range(k):
+        x[0, j] = b[0, j] / pivot
+    for i in range(1, n):
+        pivot = main[i] - sub[i - 1] * c[i - 1]
+        if pivot == 0:
+            return i
+        c[i] = sup[i] / pivot if i < n - 1 else 0.0
+        for j in range(k):
+            x[i, j] = (b[i, j] - sub[i - 1] * x[i - 1, j]) / pivot
+    for i in range(n - 2, -1, -1):
+        for j in range(k):
+            x[i, j] -= c[i] * x[i + 1, j]
+    return -1
+
+
+if HAS_NUMBA:
+    sor_csr_sweep = numba.njit(cache=True)(_sor_csr_sweep)
+    ilu0 = numba.njit(cache=True)(_ilu0)
+    ic0 = numba.njit(cache=True)(_ic0)
+    thomas = numba.njit(cache=True)(_thomas)
+else:
+    sor_csr_sweep = _sor_csr_sweep
+    ilu0 = _ilu0
+    ic0 = _ic0
+    thomas = _thomas
@@ -0,0 +1,246 @@
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+from scipy.linalg import solve_triangular
+
+from LinearSystemsMethods.matrices import SystemMatrix, is_symmetric
+from LinearSystemsMethods.operators import MatrixOperators, system_matrix
+from LinearSystemsMethods.preconditioners import PreconditionerType, get_preconditioner
+from utils.trace import IterationTrace, TableLayout, drain
+
+
+# Clases
+class KrylovParams(SystemMatrix):
+    vector_b: List[float]
+    x0: List[float]
+    tol: float = Field(..., gt=1e-21, le=1)
+    niter: int = Field(..., gt=0, le=1000)
+    layout: TableLayout = TableLayout.ROWS
+    preconditioner: PreconditionerType = PreconditionerType.NONE
+    ssor_omega: float = Field(1, gt=0, lt=2)
+
+
+class GMRESParams(KrylovParams):
+    restart: int = Field(20, gt=0, le=500)
+
+
+class KrylovIteration(BaseModel):
+    step: int
+    x: List[float]
+    error: float
+    residual: float
+
+
+class KrylovResult(BaseModel):
+    solution: List[float]
+    iterations: List[KrylovIteration]
+    columns: Optional[Dict[str, list]] = None
+    residual: float
+    converges: bool
+    matrix_id: Optional[str] = None
+
+
+KrylovIterations = Generator[Dict[str, Any], None, np.ndarray]
+
+
+def _system(params: KrylovParams):
+    A, operators = system_matrix(params)
+    b = np.array(params.vector_b, dtype=float)
+    x0 = np.array(params.x0, dtype=float)
+    return A, operators, b, x0
+
+
+def _preconditioner(
+    params: KrylovParams, operators: MatrixOperators
+) -> Callable[[np.ndarray], np.ndarray]:
+    M = get_preconditioner(operators, params.preconditioner, params.ssor_omega)
+    return M if M is not None else (lambda r: r)
+
+
+def _row(step: int, x: np.ndarray, x_old: np.ndarray, residual: float) -> Dict[str, Any]:
+    return {"step": step, "x": x, "error": np.linalg.norm(x - x_old), "residual": residual}
+
+
+# Gradiente conjugado
+def cg_iterations(params: KrylovParams) -> KrylovIterations:
+    """
+    Conjugate gradient for symmetric positive definite systems. Yields one row per
+    iteration with the norm of the residual b - Ax and returns the last iterate, it
+    stops when the residual is below tol * ||b||. With a preconditioner M it is
+    PCG, which needs M symmetric positive definite too (jacobi, ssor or ic0).
+    """
+    A, operators, b, x = _system(params)
+    if not is_symmetric(A):
+        raise ValueError("Conjugate gradient needs a symmetric matrix")
+    M = _preconditioner(params, operators)
+
+    threshold = params.tol * np.linalg.norm(b)
+    r = b - A @ x
+    z = M(r)
+    p = z.copy()
+    rz = r @ z
+    for k in range(params.niter):
+        if np.linalg.norm(r) <= threshold:
+            break
+        Ap = A @ p
+        pAp = p @ Ap
+        if pAp <= 0:
+            raise ValueError("Conjugate gradient needs a positive definite matrix")
+        alpha = rz / pAp
+        x_old = x
+        x = x + alpha * p
+        r = r - alpha * Ap
+        z = M(r)
+        rz_new = r @ z
+        p = z + (rz_new / rz) * p
+        rz = rz_new
+
+        yield _row(k, x, x_old, np.linalg.norm(r))
+
+    return x
+
+
+# BiCGSTAB
+def bicgstab_iterations(params: KrylovParams) -> KrylovIterations:
+    """
+    Stabilized biconjugate gradient for general square systems. Yields one row
+    per iteration with the norm of the residual and returns the last iterate. A
+    preconditioner M is applied on the right, so the residual is still b - Ax.
+    """
+    A, operators, b, x = _system(params)
+    M = _preconditioner(params, operators)
+
+    threshold = params.tol * np.linalg.norm(b)
+    r = b - A @ x
+    r_hat = r.copy()
+    rho = alpha = omega = 1.0
+    v = p = np.zeros_like(b)
+    for k in range(params.niter):
+        if np.linalg.norm(r) <= threshold:
+            break
+        rho_new = r_hat @ r
+        if rho_new == 0 or omega == 0:
+            raise ValueError("BiCGSTAB broke down, try GMRES")
+        beta = (rho_new / rho) * (alpha / omega)
+        rho = rho_new
+        p = r + beta * (p - omega * v)
+        p_hat = M(p)
+        v = A @ p_hat
+        alpha = rho / (r_hat @ v)
+        s = r - alpha * v
+        x_old = x
+        if np.linalg.norm(s) <= threshold:
+            x = x + alpha * p_hat
+            r = s
+        else:
+            s_hat = M(s)
+            t = A @ s_hat
+            omega = (t @ s) / (t @ t)
+            x = x + alpha * p_hat + omega * s_hat
+            r = s - omega * t
+
+        yield _row(k, x, x_old, np.linalg.norm(r))
+
+    return x
+
+
+# GMRES reiniciado
+def gmres_iterations(params: GMRESParams) -> KrylovIterations:
+    """
+    GMRES restarted every params.restart iterations, for general square systems.
+    Every iteration extends the Arnoldi basis and yields the iterate that minimizes
+    the residual over it, computed from the Givens-rotated Hessenberg matrix. A
+    preconditioner M is applied on the right, the basis spans A M^-1 and the
+    iterate is x0 + M^-1 V y.
+    """
+    A, operators, b, x = _system(params)
+    M = _preconditioner(params, operators)
+    n = b.shape[0]
+    m = min(params.restart, n)
+
+    threshold = params.tol * np.linalg.norm(b)
+    step = 0
+    while step < params.niter:
+        r = b - A @ x
+        beta = np.linalg.norm(r)
+        if beta <= threshold:
+            break
+
+        V = np.zeros((m + 1, n))
+        H = np.zeros((m + 1, m))
+        cs = np.zeros(m)
+        sn = np.zeros(m)
+        g = np.zeros(m + 1)
+        g[0] = beta
+        V[0] = r / beta
+
+        x_start = x_old = x
+        for j in range(m):
+            w = A @ M(V[j])
+            # Modified Gram-Schmidt
+            for i in range(j + 1):
+                H[i, j] = w @ V[i]
+                w = w - H[i, j] * V[i]
+            H[j + 1, j] = np.linalg.norm(w)
+            if H[j + 1, j] != 0:
+                V[j + 1] = w / H[j + 1, j]
+
+            for i in range(j):
+                H[i, j], H[i + 1, j] = (
+                    cs[i] * H[i, j] + sn[i] * H[i + 1, j],
+                    -sn[i] * H[i, j] + cs[i] * H[i + 1, j],
+                )
+            denominator = np.hypot(H[j, j], H[j + 1, j])
+            cs[j], sn[j] = H[j, j] / denominator, H[j + 1, j] / denominator
+            H[j, j] = denominator
+            H[j + 1, j] = 0
+            g[j + 1] = -sn[j] * g[j]
+            g[j] = cs[j] * g[j]
+
+            y = solve_triangular(H[: j + 1, : j + 1], g[: j + 1])
+            x = x_start + M(V[: j + 1].T @ y)
+            residual = abs(g[j + 1])
+
+            yield _row(step, x, x_old, residual)
+            x_old = x
+            step += 1
+            # A zero norm(w) means the Krylov space holds the exact solution, and
+            # then the residual is zero too
+            if residual <= threshold or step >= params.niter:
+                break
+
+    return x
+
+
+def krylov_method(
+    params: KrylovParams, iterations: Callable[[KrylovParams], KrylovIterations]
+) -> KrylovResult:
+    A, operators, b, _ = _system(params)
+
+    # Krylov methods usually stop long before niter, the trace grows if needed
+    trace = IterationTrace(
+        min(params.niter, 100), step=int, x=(float, A.shape[0]), error=float, residual=float
+    )
+    solution = drain(iterations(params), trace)
+
+    residual = float(np.linalg.norm(b - A @ solution))
+    return KrylovResult(
+        solution=solution.tolist(),
+        **trace.export(params.layout, field="iterations"),
+        residual=residual,
+        converges=residual <= params.tol * np.linalg.norm(b),
+        matrix_id=operators.key,
+    )
+
+
+def cg_method(params: KrylovParams) -> KrylovResult:
+    return krylov_method(params, cg_iterations)
+
+
+def bicgstab_method(params: KrylovParams) -> KrylovResult:
+    return krylov_method(params, bicgstab_iterations)
+
+
+def gmres_method(params: GMRESParams) -> KrylovResult:
+    return krylov_method(params, gmres_iterations)
@@ -0,0 +1,131 @@
+import hashlib
+from enum import Enum
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+from pydantic import BaseModel, model_validator
+
+
+class SparseFormat(str, Enum):
+    COO = "coo"
+    CSR = "csr"
+
+
+class SparseMatrix(BaseModel):
+    """
+    A sparse matrix as COO triplets (row, col, data) or as CSR arrays
+    (indptr, indices, data). Repeated COO entries are summed.
+    """
+
+    format: SparseFormat = SparseFormat.COO
+    shape: Tuple[int, int]
+    data: List[float]
+    row: Optional[List[int]] = None
+    col: Optional[List[int]] = None
+    indptr: Optional[List[int]] = None
+    indices: Optional[List[int]] = None
+
+    def to_csr(self) -> sp.csr_matrix:
+        if self.format == SparseFormat.COO:
+            assert self.row is not None and self.col is not None, "COO needs row and col"
+            assert (
+                len(self.row) == len(self.col) == len(self.data)
+            ), "row, col and data must have the same length"
+            matrix = sp.coo_matrix((self.data, (self.row, self.col)), shape=self.shape)
+        else:
+            assert self.indptr is not None and self.indices is not None, "CSR needs indptr and indices"
+            assert len(self.indices) == len(self.data), "indices and data must have the same length"
+            assert len(self.indptr) == self.shape[0] + 1, "indptr must have shape[0] + 1 entries"
+            matrix = sp.csr_matrix((self.data, self.indices, self.indptr), shape=self.shape)
+
+        matrix = matrix.tocsr()
+        matrix.sum_duplicates()
+        matrix.sort_indices()
+        return matrix
+
+
+MatrixInput = Union[List[List[float]], SparseMatrix]
+Matrix = Union[np.ndarray, sp.csr_matrix]
+
+
+class SystemMatrix(BaseModel):
+    """
+    The matrix of a request, sent either as matrix_a or as the matrix_id returned
+    by an earlier request that sent it.
+    """
+
+    matrix_a: Optional[MatrixInput] = None
+    matrix_id: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _one_matrix(self) -> "SystemMatrix":
+        if (self.matrix_a is None) == (self.matrix_id is None):
+            raise ValueError("Send either matrix_a or matrix_id")
+        return self
+
+
+def as_matrix(matrix: Union[MatrixInput, Matrix]) -> Matrix:
+    """
+    Convert the matrix of a request to a float NumPy array or CSR matrix, the
+    representations the solvers work with. Matrices already converted are
+    returned as they are.
+    """
+
+    if isinstance(matrix, np.ndarray) or sp.issparse(matrix):
+        return matrix
+    if isinstance(matrix, SparseMatrix):
+        A = matrix.to_csr().astype(float)
+    else:
+        A = np.array(matrix, dtype=float)
+    assert A.ndim == 2 and A.shape[0] == A.shape[1], "The matrix must be square"
+    return A
+
+
+def diagonal(A: Matrix) -> np.ndarray:
+    return A.diagonal() if sp.issparse(A) else np.diag(A)
+
+
+def lower(A: Matrix, k: int = 0) -> Matrix:
+    return sp.tril(A, k, format="csr") if sp.issparse(A) else np.tril(A, k)
+
+
+def upper(A: Matrix, k: int = 0) -> Matrix:
+    return sp.triu(A, k, format="csr") if sp.issparse(A) else np.triu(A, k)
+
+
+def diagonal_matrix(d: np.ndarray, like: Matrix) -> Matrix:
+    return sp.diags(d, format="csr") if sp.issparse(like) else np.diag(d)
+
+
+def to_dense(A: Matrix) -> np.ndarray:
+    return A.toarray() if sp.issparse(A) else A
+
+
+def is_symmetric(A: Matrix) -> bool:
+    if sp.issparse(A):
+        return abs(A - A.T).max() <= 1e-12 * abs(A).max()
+    return np.allclose(A, A.T, rtol=0, atol=1e-12 * np.abs(A).max())
+
+
+def fingerprint(A: Matrix) -> str:
+    """
+    A hash of the shape, layout and values of a matrix, used as a cache key for
+    anything derived from it.
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((A.shape, sp.issparse(A))).encode())
+    if sp.issparse(A):
+        digest.update(np.ascontiguousarray(A.indptr, dtype=np.int64))
+        digest.update(np.ascontiguousarray(A.indices, dtype=np.int64))
+        digest.update(np.ascontiguousarray(A.data, dtype=float))
+    else:
+        digest.update(np.ascontiguousarray(A, dtype=float))
+    return digest.hexdigest()
+
+
+def nbytes(A: Matrix) -> int:
+    if sp.issparse(A):
+        return A.data.nbytes + A.indices.nbytes + A.indptr.nbytes
+    return A.nbytes
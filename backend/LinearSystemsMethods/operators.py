@@ -0,0 +1,130 @@
+from typing import Any, BinaryIO, Callable, Hashable, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from pydantic import BaseModel
+
+from LinearSystemsMethods.matrices import Matrix, SystemMatrix, as_matrix, fingerprint, nbytes
+from LinearSystemsMethods.storage import is_stored, load_matrix, save_matrix
+from utils.cache import LRUCache
+from utils.config import (MATRIX_STORE_MAX_BYTES, MATRIX_STORE_MAX_ENTRIES,
+                          OPERATOR_CACHE_MAX_BYTES, OPERATOR_CACHE_MAX_ENTRIES)
+
+
+class MatrixHandle(BaseModel):
+    matrix_id: str
+    shape: Tuple[int, int]
+    nnz: int
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, (tuple, list)):
+        return sum(_sizeof(item) for item in value)
+    if sp.issparse(value):
+        return nbytes(value)
+    # Arrays and preconditioners report their nbytes, scalars are small
+    return getattr(value, "nbytes", 64)
+
+
+operator_cache = LRUCache(
+    "operators",
+    max_entries=OPERATOR_CACHE_MAX_ENTRIES,
+    max_bytes=OPERATOR_CACHE_MAX_BYTES,
+    sizeof=_sizeof,
+)
+
+matrix_store = LRUCache(
+    "matrices",
+    max_entries=MATRIX_STORE_MAX_ENTRIES,
+    max_bytes=MATRIX_STORE_MAX_BYTES,
+    sizeof=nbytes,
+)
+
+
+class MatrixOperators:
+    """
+    Access to everything derived from one matrix that does not depend on the
+    right-hand side (splittings, spectral radii, orderings, preconditioners),
+    cached across requests under the fingerprint of the matrix.
+
+    Parameters
+    ==========
+
+    matrix: The matrix of the system.
+    key: Its fingerprint, computed when not given.
+    """
+
+    def __init__(self, matrix: Matrix, key: Optional[str] = None):
+        self.matrix = matrix
+        self.key = key or fingerprint(matrix)
+
+    def get(self, name: str, build: Callable[[], Any], *args: Hashable) -> Any:
+        """
+        Return the value called name for this matrix and args, building it on a miss.
+        """
+
+        return operator_cache.get_or_create((self.key, name) + args, build)
+
+    def has(self, name: str, *args: Hashable) -> bool:
+        return (self.key, name) + args in operator_cache
+
+
+def system_matrix(params: SystemMatrix) -> Tuple[Matrix, MatrixOperators]:
+    """
+    Return the matrix of a request, looking matrix_id up in the matrix store, and
+    then among the uploaded matrices, when the matrix itself was not sent, with
+    its cached operators.
+    """
+
+    if params.matrix_a is not None:
+        A = as_matrix(params.matrix_a)
+    else:
+        A = matrix_store.get(params.matrix_id)
+        if A is None:
+            A = load_matrix(params.matrix_id)
+        if A is None:
+            raise ValueError(f"Unknown matrix_id {params.matrix_id}, send matrix_a again")
+    # A matrix_id that came with the matrix was set by resolve_matrix, which
+    # computed it from this very matrix
+    return A, MatrixOperators(A, params.matrix_id)
+
+
+def resolve_matrix(params: SystemMatrix) -> SystemMatrix:
+    """
+    Convert the matrix of a request once, before it is handed to a solver or a
+    pool worker: the copy returned carries the converted matrix as matrix_a and
+    its matrix_id, and the matrix is stored so later requests can send only the
+    matrix_id.
+
+    Uploaded matrices are left as a matrix_id, the solver memory-maps them
+    itself instead of getting a copy.
+    """
+
+    if (
+        params.matrix_a is None
+        and params.matrix_id not in matrix_store
+        and is_stored(params.matrix_id)
+    ):
+        return params
+
+    A, operators = system_matrix(params)
+    matrix_store.get_or_create(operators.key, lambda: A)
+    return params.model_copy(update={"matrix_a": A, "matrix_id": operators.key})
+
+
+def _handle(matrix_id: str, A: Matrix) -> MatrixHandle:
+    return MatrixHandle(
+        matrix_id=matrix_id,
+        shape=A.shape,
+        nnz=A.nnz if sp.issparse(A) else int(np.count_nonzero(A)),
+    )
+
+
+def matrix_handle(params: SystemMatrix) -> MatrixHandle:
+    A, operators = system_matrix(resolve_matrix(params))
+    return _handle(operators.key, A)
+
+
+def upload_handle(filename: str, stream: BinaryIO) -> MatrixHandle:
+    matrix_id = save_matrix(filename, stream)
+    return _handle(matrix_id, load_matrix(matrix_id))
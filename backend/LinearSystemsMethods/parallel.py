@@ -0,0 +1,489 @@
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from enum import Enum
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection
+from typing import Any, Dict, Generator, List, Optional, Set, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from pydantic import BaseModel, Field
+
+from LinearSystemsMethods.direct import DirectPath, detect_structure, factorize
+from LinearSystemsMethods.jacobi import JacobiIteration
+from LinearSystemsMethods.matrices import Matrix, SystemMatrix
+from LinearSystemsMethods.operators import system_matrix
+from utils.config import EXECUTOR_TIMEOUT, PARALLEL_MAX_SOLVES, PARALLEL_MAX_WORKERS
+from utils.executor import PoolOverloaded, TaskTimeout, WorkerDied
+from utils.trace import IterationTrace, TableLayout, drain
+
+
+# Clases
+class BlockSolver(str, Enum):
+    # One row at a time, the same iterates as the Jacobi method
+    POINT = "point"
+    # A direct factorization of every diagonal block (block Jacobi), extended by
+    # overlap rows on each side it gives restricted additive Schwarz
+    EXACT = "exact"
+
+
+class BlockJacobiParams(SystemMatrix):
+    vector_b: List[float]
+    x0: List[float]
+    tol: float = Field(..., gt=1e-21, le=1)
+    niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
+    # Worker processes, PARALLEL_MAX_WORKERS when missing
+    workers: Optional[int] = Field(None, ge=1)
+    solver: BlockSolver = BlockSolver.EXACT
+    overlap: int = Field(0, ge=0)
+
+
+class BlockJacobiResult(BaseModel):
+    solution: List[float]
+    iterations: List[JacobiIteration]
+    columns: Optional[Dict[str, list]] = None
+    converged: bool
+    workers: int
+    # The [first, last + 1) rows of every worker
+    blocks: List[Tuple[int, int]]
+    setup_ms: float
+    solve_ms: float
+    matrix_id: Optional[str] = None
+
+
+# A NumPy array in shared memory: the segment name, the shape and the dtype
+SharedArray = Tuple[str, Tuple[int, ...], str]
+
+_READY = "ready"
+
+
+def partition_rows(A: Matrix, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split the rows of A into at most parts contiguous blocks holding about the
+    same number of nonzeros, so every worker does about the same work.
+    """
+
+    n = A.shape[0]
+    work = A.indptr if sp.issparse(A) else np.arange(n + 1)
+    cuts = np.searchsorted(work, work[-1] * np.arange(1, parts) / parts)
+    bounds = np.unique(np.concatenate([[0], cuts, [n]]))
+    return [(int(lo), int(hi)) for lo, hi in zip(bounds[:-1], bounds[1:])]
+
+
+def _share(array: np.ndarray, segments: List[shared_memory.SharedMemory]) -> SharedArray:
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    segments.append(shm)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm.name, array.shape, array.dtype.str
+
+
+def _attach(spec: SharedArray, segments: List[shared_memory.SharedMemory]) -> np.ndarray:
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    segments.append(shm)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _rows(shared: Dict[str, np.ndarray], lo: int, hi: int, n: int) -> Matrix:
+    if "dense" in shared:
+        return shared["dense"][lo:hi]
+    indptr = shared["indptr"]
+    start, end = indptr[lo], indptr[hi]
+    return sp.csr_matrix(
+        (shared["data"][start:end], shared["indices"][start:end], indptr[lo : hi + 1] - start),
+        shape=(hi - lo, n),
+        copy=False,
+    )
+
+
+def _iterate(
+    rank: int,
+    segments: List[shared_memory.SharedMemory],
+    specs: Dict[str, SharedArray],
+    block: Tuple[int, int],
+    extended: Tuple[int, int],
+    solver: BlockSolver,
+    tol: float,
+    niter: int,
+    barrier: threading.Barrier,
+) -> Optional[str]:
+    # Every view of the shared memory lives in this frame, so the segments can
+    # be closed once it returns
+    lo, hi = block
+    elo, ehi = extended
+
+    try:
+        shared = {name: _attach(spec, segments) for name, spec in specs.items()}
+        x, squares = shared["x"], shared["squares"]
+        rows = _rows(shared, elo, ehi, x.shape[1])
+        b = shared["b"][elo:ehi]
+        if solver == BlockSolver.POINT:
+            d = rows.diagonal(elo) if sp.issparse(rows) else np.diagonal(rows, elo)
+            if np.any(d == 0):
+                raise ValueError("The matrix has a zero on its diagonal")
+
+            def local_solve(r: np.ndarray) -> np.ndarray:
+                return r / d
+
+        else:
+            local = rows[:, elo:ehi]
+            local_solve = factorize(local, detect_structure(local), None).solve
+    except Exception as e:
+        barrier.abort()
+        return f"Rows {lo} to {hi - 1}: {e}"
+
+    try:
+        barrier.wait()
+        for k in range(niter):
+            current, new = x[k % 2], x[(k + 1) % 2]
+            step = local_solve(b - rows @ current)[lo - elo : hi - elo]
+            new[lo:hi] = current[lo:hi] + step
+            squares[k % 2, rank] = step @ step
+            barrier.wait()
+            # Every process reaches the same decision from the same shared sums
+            if np.sqrt(squares[k % 2].sum()) < tol:
+                break
+    except threading.BrokenBarrierError:
+        # The solve was stopped, or another worker failed
+        pass
+    except Exception as e:
+        barrier.abort()
+        return f"Rows {lo} to {hi - 1}: {e}"
+    return None
+
+
+def _warm_up() -> None:
+    # Pay the scipy imports and the numba compilation before the first solve
+    A = sp.diags([1.0, 4.0, 1.0], [-1, 0, 1], shape=(8, 8), format="csr")
+    for path in (None, DirectPath.SPARSE_LU):
+        factorize(A, detect_structure(A), path).solve(np.ones(8))
+
+
+def _block_worker_main(
+    rank: int, barriers: Dict[int, threading.Barrier], conn: Connection
+) -> None:
+    # Ctrl+C is handled by the server, which then shuts the workers down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _warm_up()
+    conn.send(_READY)
+
+    while True:
+        try:
+            specs, block, extended, solver, tol, niter, parties = conn.recv()
+        except EOFError:
+            return
+        segments: List[shared_memory.SharedMemory] = []
+        try:
+            report = _iterate(
+                rank, segments, specs, block, extended, solver, tol, niter, barriers[parties]
+            )
+        finally:
+            for shm in segments:
+                shm.close()
+        # One report per solve, None when the rows of this worker went fine
+        conn.send(report)
+
+
+class BlockWorkers:
+    """
+    Pre-warmed worker processes of parallel_block_jacobi, started once and
+    reused by every solve, so a solve pays neither the start of new
+    interpreters nor the numpy, scipy and numba imports. A solve sends every
+    worker the shared memory specs and its rows through a pipe, and gets back
+    one report per worker when it is over.
+
+    The workers synchronize through barriers, which can only be handed to a
+    process when it starts, so there is one for every number of workers a solve
+    may use. A solve whose workers do not report back in time is stopped by
+    starting the whole set again.
+
+    Parameters
+    ==========
+
+    size: The number of worker processes.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.barriers: Dict[int, threading.Barrier] = {}
+        self._context = multiprocessing.get_context("spawn")
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        self._conns: List[Connection] = []
+        self._ready: List[bool] = []
+
+    def start(self) -> None:
+        if self._processes:
+            return
+        self.barriers = {k: self._context.Barrier(k + 1) for k in range(1, self.size + 1)}
+        for rank in range(self.size):
+            conn, child_conn = self._context.Pipe()
+            process = self._context.Process(
+                target=_block_worker_main, args=(rank, self.barriers, child_conn), daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._processes.append(process)
+            self._conns.append(conn)
+        self._ready = [False] * self.size
+
+    def shutdown(self) -> None:
+        for process in self._processes:
+            process.kill()
+            process.join()
+        for conn in self._conns:
+            conn.close()
+        self._processes.clear()
+        self._conns.clear()
+
+    def alive(self) -> bool:
+        return all(process.is_alive() for process in self._processes)
+
+    def restart(self) -> None:
+        self.shutdown()
+        self.start()
+
+    def send(self, rank: int, job: tuple, timeout: float) -> None:
+        conn = self._conns[rank]
+        try:
+            if not self._ready[rank]:
+                if not conn.poll(timeout):
+                    raise TaskTimeout("The block workers did not start in time")
+                conn.recv()
+                self._ready[rank] = True
+            conn.send(job)
+        except (EOFError, OSError) as e:
+            raise WorkerDied(f"A worker process exited: {e}") from e
+
+    def collect(self, pending: Set[int], timeout: float) -> Tuple[List[str], bool]:
+        """
+        Read the reports of the pending workers that arrive within timeout,
+        removing them from pending. Returns the failures and whether a worker
+        exited.
+        """
+
+        deadline = time.perf_counter() + timeout
+        failures, died = [], False
+        for rank in sorted(pending):
+            try:
+                if not self._conns[rank].poll(max(deadline - time.perf_counter(), 0)):
+                    continue
+                report = self._conns[rank].recv()
+                if report is not None:
+                    failures.append(report)
+            except (EOFError, OSError):
+                died = True
+            pending.discard(rank)
+        return failures, died
+
+
+class BlockWorkerPool:
+    """
+    One set of BlockWorkers per solve that may run at a time, the rest are
+    rejected with PoolOverloaded.
+
+    Parameters
+    ==========
+
+    solves: The number of solves that may run at a time.
+    workers: The worker processes of every solve.
+    """
+
+    def __init__(self, solves: int, workers: int):
+        self._teams = [BlockWorkers(workers) for _ in range(solves)]
+        self._idle: "queue.SimpleQueue[BlockWorkers]" = queue.SimpleQueue()
+        for team in self._teams:
+            self._idle.put(team)
+
+    def start(self) -> None:
+        for team in self._teams:
+            team.start()
+
+    def shutdown(self) -> None:
+        for team in self._teams:
+            team.shutdown()
+
+    def acquire(self) -> BlockWorkers:
+        try:
+            team = self._idle.get_nowait()
+        except queue.Empty:
+            raise PoolOverloaded(f"More than {len(self._teams)} parallel solves are running")
+        team.start()
+        return team
+
+    def release(self, team: BlockWorkers) -> None:
+        self._idle.put(team)
+
+
+block_workers = BlockWorkerPool(PARALLEL_MAX_SOLVES, PARALLEL_MAX_WORKERS)
+
+
+def parallel_block_jacobi(
+    team: BlockWorkers,
+    A: Matrix,
+    b: np.ndarray,
+    x0: np.ndarray,
+    tol: float,
+    niter: int,
+    blocks: List[Tuple[int, int]],
+    solver: BlockSolver = BlockSolver.EXACT,
+    overlap: int = 0,
+    timings: Optional[Dict[str, float]] = None,
+) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Iterate x + M^-1 (b - Ax) with one worker process per block of rows, yielding
+    one row per iteration like stationary_iterations and returning the last
+    iterate. M is the diagonal of A for the point solver, and the block diagonal
+    of A for the exact one, each block extended by overlap rows on both sides
+    but only updating its own rows (restricted additive Schwarz).
+
+    A, b and the iterates are placed in shared memory once, so every iteration
+    only moves the error of each block through it. The iterates are double
+    buffered: iteration k reads x[k % 2] and writes x[(k + 1) % 2], and a single
+    barrier per iteration separates the writes from the next reads and lets
+    every process check the global error before going on.
+
+    Parameters
+    ==========
+
+    team: The worker processes, one per block is used.
+    blocks: The [first, last + 1) rows of every worker, see partition_rows.
+    timings: Filled with the setup_ms, until every worker has factored its
+        block, and the solve_ms spent iterating.
+    """
+
+    n = A.shape[0]
+    if solver == BlockSolver.POINT and overlap > 0:
+        raise ValueError("The point solver has no overlap")
+    if len(blocks) > team.size:
+        raise ValueError(f"At most {team.size} blocks can be solved at once")
+
+    barrier = team.barriers[len(blocks)]
+    pending: Set[int] = set()
+    finished = False
+    segments: List[shared_memory.SharedMemory] = []
+    attached: List[shared_memory.SharedMemory] = []
+    shared: Dict[str, np.ndarray] = {}
+    start = time.perf_counter()
+    deadline = start + EXECUTOR_TIMEOUT
+
+    def wait() -> None:
+        try:
+            barrier.wait(max(deadline - time.perf_counter(), 0))
+        except threading.BrokenBarrierError:
+            failures, _ = team.collect(pending, 1)
+            if failures:
+                raise ValueError(failures[0])
+            if time.perf_counter() >= deadline:
+                raise TaskTimeout(f"The method did not finish in {EXECUTOR_TIMEOUT:g} seconds")
+            raise WorkerDied("A worker process exited")
+
+    try:
+        if sp.issparse(A):
+            specs = {name: _share(getattr(A, name), segments) for name in ("data", "indices", "indptr")}
+        else:
+            specs = {"dense": _share(np.asarray(A, dtype=float), segments)}
+        specs["b"] = _share(b, segments)
+        specs["x"] = _share(np.stack([x0, x0]), segments)
+        specs["squares"] = _share(np.zeros((2, len(blocks))), segments)
+        shared = {name: _attach(specs[name], attached) for name in ("x", "squares")}
+
+        for rank, (lo, hi) in enumerate(blocks):
+            extended = (max(lo - overlap, 0), min(hi + overlap, n))
+            job = (specs, (lo, hi), extended, solver, tol, niter, len(blocks))
+            team.send(rank, job, max(deadline - time.perf_counter(), 0))
+            pending.add(rank)
+
+        wait()
+        ready = time.perf_counter()
+        last = 0
+        for k in range(niter):
+            wait()
+            last = (k + 1) % 2
+            error = float(np.sqrt(shared["squares"][k % 2].sum()))
+            yield {"step": k, "x": shared["x"][last].copy(), "error": error}
+            if error < tol:
+                break
+
+        if timings is not None:
+            timings["setup_ms"] = (ready - start) * 1000
+            timings["solve_ms"] = (time.perf_counter() - ready) * 1000
+        finished = True
+        return shared["x"][last].copy()
+    finally:
+        if not finished:
+            barrier.abort()
+        _, died = team.collect(pending, 1)
+        if pending or died or not team.alive():
+            # Some worker is stuck or gone, a fresh set is cheaper to trust
+            team.restart()
+        elif barrier.broken:
+            barrier.reset()
+        # The views must go before their segments can be closed
+        shared.clear()
+        for shm in attached:
+            shm.close()
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+
+
+def _blocks(params: BlockJacobiParams, A: Matrix) -> List[Tuple[int, int]]:
+    workers = min(params.workers or PARALLEL_MAX_WORKERS, PARALLEL_MAX_WORKERS, A.shape[0])
+    return partition_rows(A, workers)
+
+
+# Método Jacobi por bloques en paralelo
+def block_jacobi_iterations(
+    params: BlockJacobiParams, timings: Optional[Dict[str, float]] = None
+) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Yield one row per block Jacobi iteration and return the last iterate. At
+    most PARALLEL_MAX_SOLVES solves run at a time, the rest are rejected.
+    """
+    A, _ = system_matrix(params)
+    b = np.array(params.vector_b, dtype=float)
+    x0 = np.array(params.x0, dtype=float)
+    if b.shape != (A.shape[0],) or x0.shape != (A.shape[0],):
+        raise ValueError(f"The right-hand side and x0 must have {A.shape[0]} entries")
+
+    team = block_workers.acquire()
+    try:
+        return (
+            yield from parallel_block_jacobi(
+                team,
+                A,
+                b,
+                x0,
+                params.tol,
+                params.niter,
+                _blocks(params, A),
+                params.solver,
+                params.overlap,
+                timings,
+            )
+        )
+    finally:
+        block_workers.release(team)
+
+
+def block_jacobi_method(params: BlockJacobiParams) -> BlockJacobiResult:
+    A, operators = system_matrix(params)
+
+    iterations = IterationTrace(params.niter, step=int, x=(float, A.shape[0]), error=float)
+    timings: Dict[str, float] = {}
+    solution = drain(block_jacobi_iterations(params, timings), iterations)
+    blocks = _blocks(params, A)
+
+    return BlockJacobiResult(
+        solution=solution.tolist(),
+        **iterations.export(params.layout, field="iterations"),
+        converged=bool(iterations.last("error") < params.tol),
+        workers=len(blocks),
+        blocks=blocks,
+        **timings,
+        matrix_id=operators.key,
+    )
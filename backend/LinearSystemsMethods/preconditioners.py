@@ -0,0 +1,163 @@
+from enum import Enum
+from typing import Callable, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve_triangular
+
+from LinearSystemsMethods.kernels import ic0, ilu0
+from LinearSystemsMethods.matrices import Matrix, diagonal, nbytes
+from LinearSystemsMethods.operators import MatrixOperators
+
+
+class PreconditionerType(str, Enum):
+    NONE = "none"
+    JACOBI = "jacobi"
+    SSOR = "ssor"
+    ILU0 = "ilu0"
+    IC0 = "ic0"
+
+
+class Preconditioner:
+    """
+    An approximation M of A applied through its inverse, z = M^-1 r.
+
+    Parameters
+    ==========
+
+    kind: The kind of preconditioner.
+    apply: The function r -> M^-1 r.
+    nbytes: The approximate memory used by its factors.
+    """
+
+    def __init__(self, kind: PreconditionerType, apply: Callable[[np.ndarray], np.ndarray], nbytes: int):
+        self.kind = kind
+        self.apply = apply
+        self.nbytes = nbytes
+
+    def __call__(self, r: np.ndarray) -> np.ndarray:
+        return self.apply(r)
+
+
+def _nonzero_diagonal(A: Matrix) -> np.ndarray:
+    d = diagonal(A)
+    if np.any(d == 0):
+        raise ValueError("The matrix has zeros on its diagonal")
+    return d
+
+
+def _diagonal_positions(A: sp.csr_matrix) -> np.ndarray:
+    rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+    on_diagonal = np.flatnonzero(A.indices == rows)
+    positions = np.full(A.shape[0], -1)
+    positions[rows[on_diagonal]] = on_diagonal
+    if np.any(positions == -1):
+        raise ValueError("The matrix has zeros on its diagonal")
+    return positions
+
+
+def _triangular_solver(T: sp.csr_matrix, lower: bool) -> Callable[[np.ndarray], np.ndarray]:
+    return lambda r: spsolve_triangular(T, r, lower=lower)
+
+
+def jacobi_preconditioner(A: Matrix) -> Preconditioner:
+    d = _nonzero_diagonal(A)
+    return Preconditioner(PreconditionerType.JACOBI, lambda r: r / d, d.nbytes)
+
+
+def ssor_preconditioner(A: Matrix, w: float = 1) -> Preconditioner:
+    """
+    M = w / (2 - w) (D/w + L) (D/w)^-1 (D/w + U), applied with a forward and a
+    backward triangular solve. It is symmetric when A is.
+    """
+
+    d = _nonzero_diagonal(A)
+    A = sp.csr_matrix(A)
+    scaled = sp.diags(d / w, format="csr")
+    forward = _triangular_solver((scaled + sp.tril(A, -1)).tocsr(), lower=True)
+    backward = _triangular_solver((scaled + sp.triu(A, 1)).tocsr(), lower=False)
+
+    def apply(r: np.ndarray) -> np.ndarray:
+        return (2 - w) / w * backward(d / w * forward(r))
+
+    return Preconditioner(PreconditionerType.SSOR, apply, 2 * nbytes(A))
+
+
+def ilu0_preconditioner(A: Matrix) -> Preconditioner:
+    """
+    Incomplete LU factorization with the sparsity pattern of A, M = LU.
+    """
+
+    F = sp.csr_matrix(A, dtype=float, copy=True)
+    F.sort_indices()
+    failed = ilu0(F.indptr, F.indices, F.data, _diagonal_positions(F))
+    if failed != -1:
+        raise ValueError(f"ILU(0) found a zero pivot in row {failed}")
+
+    L = (sp.tril(F, -1) + sp.identity(F.shape[0])).tocsr()
+    U = sp.triu(F).tocsr()
+    forward = _triangular_solver(L, lower=True)
+    backward = _triangular_solver(U, lower=False)
+    return Preconditioner(
+        PreconditionerType.ILU0, lambda r: backward(forward(r)), nbytes(L) + nbytes(U)
+    )
+
+
+def ic0_preconditioner(A: Matrix) -> Preconditioner:
+    """
+    Incomplete Cholesky factorization with the sparsity pattern of the lower
+    triangle of a symmetric positive definite A, M = L L^T.
+    """
+
+    L = sp.tril(sp.csr_matrix(A, dtype=float), format="csr")
+    L.sort_indices()
+    failed = ic0(L.indptr, L.indices, L.data, _diagonal_positions(L))
+    if failed != -1:
+        raise ValueError(
+            f"Incomplete Cholesky broke down in row {failed}, the matrix is not "
+            "positive definite enough, try ilu0"
+        )
+
+    forward = _triangular_solver(L, lower=True)
+    backward = _triangular_solver(L.T.tocsr(), lower=False)
+    return Preconditioner(
+        PreconditionerType.IC0, lambda r: backward(forward(r)), 2 * nbytes(L)
+    )
+
+
+def build_preconditioner(A: Matrix, kind: PreconditionerType, w: float = 1) -> Preconditioner:
+    if kind == PreconditionerType.JACOBI:
+        return jacobi_preconditioner(A)
+    if kind == PreconditionerType.SSOR:
+        return ssor_preconditioner(A, w)
+    if kind == PreconditionerType.ILU0:
+        return ilu0_preconditioner(A)
+    if kind == PreconditionerType.IC0:
+        return ic0_preconditioner(A)
+    raise ValueError(f"Invalid preconditioner: {kind}")
+
+
+def get_preconditioner(
+    operators: MatrixOperators, kind: PreconditionerType, w: float = 1
+) -> Optional[Preconditioner]:
+    """
+    Return the preconditioner of the given kind for a matrix, None for none.
+    Built preconditioners are cached with the other operators of the matrix, so
+    solving again with another right-hand side skips the setup.
+
+    Parameters
+    ==========
+
+    operators: The cached operators of the matrix of the system.
+    kind: The kind of preconditioner.
+    w: The relaxation factor of SSOR.
+    """
+
+    if kind == PreconditionerType.NONE:
+        return None
+    return operators.get(
+        "preconditioner",
+        lambda: build_preconditioner(operators.matrix, kind, w),
+        kind.value,
+        w if kind == PreconditionerType.SSOR else None,
+    )
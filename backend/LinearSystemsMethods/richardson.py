@@ -0,0 +1,113 @@
+from typing import Any, Dict, Generator, List, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+from scipy.sparse.linalg import LinearOperator
+
+from LinearSystemsMethods.matrices import Matrix, SystemMatrix
+from LinearSystemsMethods.operators import MatrixOperators, system_matrix
+from LinearSystemsMethods.preconditioners import (Preconditioner, PreconditionerType,
+                                                  get_preconditioner)
+from LinearSystemsMethods.spectral import SpectralRadiusMode, cached_spectral_radius
+from LinearSystemsMethods.splitting import stationary_iterations, sweep_matrices
+from utils.trace import IterationTrace, TableLayout, drain
+
+
+# Clases
+class RichardsonParams(SystemMatrix):
+    vector_b: List[float]
+    x0: List[float]
+    tol: float = Field(..., gt=1e-21, le=1)
+    niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
+    preconditioner: PreconditionerType = PreconditionerType.JACOBI
+    ssor_omega: float = Field(1, gt=0, lt=2)
+    spectral_radius_mode: SpectralRadiusMode = SpectralRadiusMode.ESTIMATE
+    spectral_tol: float = Field(1e-6, gt=0, lt=1)
+    include_matrices: bool = False
+
+
+class RichardsonIteration(BaseModel):
+    step: int
+    x: List[float]
+    error: float
+
+
+class RichardsonResult(BaseModel):
+    solution: List[float]
+    transition_matrix: Optional[List[List[float]]] = None
+    coefficient_matrix: Optional[List[List[float]]] = None
+    spectral_radius: Optional[float] = None
+    iterations: List[RichardsonIteration]
+    columns: Optional[Dict[str, list]] = None
+    converges: Optional[bool] = None
+    matrix_id: Optional[str] = None
+
+
+def _preconditioner(params: RichardsonParams, operators: MatrixOperators) -> Preconditioner:
+    M = get_preconditioner(operators, params.preconditioner, params.ssor_omega)
+    return M if M is not None else (lambda r: r)
+
+
+def richardson_operator(A: Matrix, M: Preconditioner) -> LinearOperator:
+    """
+    The iteration matrix T = I - M^-1 A, applied without forming it.
+    """
+
+    def matvec(x: np.ndarray) -> np.ndarray:
+        x = np.ravel(x)
+        return x - M(A @ x)
+
+    return LinearOperator(A.shape, matvec=matvec, dtype=float)
+
+
+# Richardson precondicionado
+def richardson_iterations(params: RichardsonParams) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Yield one row per step x + M^-1 (b - Ax) and return the last iterate. The
+    jacobi preconditioner gives the Jacobi method, the others are stationary
+    methods built on ssor, ilu0 or ic0.
+    """
+    A, operators = system_matrix(params)
+    b = np.array(params.vector_b, dtype=float)
+    x0 = np.array(params.x0, dtype=float)
+    M = _preconditioner(params, operators)
+
+    def sweep(x: np.ndarray) -> np.ndarray:
+        return x + M(b - A @ x)
+
+    return (yield from stationary_iterations(sweep, x0, params.tol, params.niter))
+
+
+def richardson_method(params: RichardsonParams) -> RichardsonResult:
+    A, operators = system_matrix(params)
+    b = np.array(params.vector_b, dtype=float)
+    M = _preconditioner(params, operators)
+
+    radius = cached_spectral_radius(
+        operators,
+        lambda: richardson_operator(A, M),
+        params.spectral_radius_mode,
+        params.spectral_tol,
+        "richardson",
+        params.preconditioner.value,
+        params.ssor_omega,
+    )
+    converges = radius < 1 if radius is not None else None
+
+    iterations = IterationTrace(params.niter, step=int, x=(float, A.shape[0]), error=float)
+    solution = drain(richardson_iterations(params), iterations)
+
+    matrices = {}
+    if params.include_matrices:
+        T, C = sweep_matrices(lambda x: x + M(b - A @ x), A.shape[0])
+        matrices = {"transition_matrix": T.tolist(), "coefficient_matrix": C.tolist()}
+
+    return RichardsonResult(
+        solution=solution.tolist(),
+        **matrices,
+        spectral_radius=radius,
+        **iterations.export(params.layout, field="iterations"),
+        converges=converges,
+        matrix_id=operators.key,
+    )
@@ -1,17 +1,50 @@
-from typing import List
+from enum import Enum
+from typing import Annotated, Any, Dict, Generator, List, Literal, Optional, Tuple, Union
 
 import numpy as np
 from pydantic import BaseModel, Field
 
+from LinearSystemsMethods.batch import BatchResult, RightHandSides, batch_method, right_hand_sides
+from LinearSystemsMethods.kernels import HAS_NUMBA
+from LinearSystemsMethods.matrices import SystemMatrix, diagonal, is_symmetric
+from LinearSystemsMethods.operators import MatrixOperators, system_matrix
+from LinearSystemsMethods.spectral import (IterationMethod, SpectralRadiusMode,
+                              cached_spectral_radius, iteration_radius, power_iteration)
+from LinearSystemsMethods.splitting import (Sweep, batch_iterations, compiled_sor_sweep,
+                               multicolor_ordering, multicolor_sor_sweep, permute,
+                               sor_matrices, sor_operator, sor_splitting, sor_sweep,
+                               stationary_iterations, sweep_matrices)
+from utils.trace import IterationTrace, TableLayout, drain
+
 
 # Clases y estructuras
-class SORParams(BaseModel):
-    matrix_a: List[List[float]]
-    vector_b: List[float]
-    x0: List[float]
-    relaxation_factor: float = Field(..., gt=0, le=2)
+class SOROrdering(str, Enum):
+    LEXICOGRAPHIC = "lexicographic"
+    MULTICOLOR = "multicolor"
+
+
+class SORKernel(str, Enum):
+    AUTO = "auto"
+    SCIPY = "scipy"
+    COMPILED = "compiled"
+
+
+# A fixed relaxation factor, or "auto" to use the estimated optimal one
+RelaxationFactor = Union[Annotated[float, Field(gt=0, le=2)], Literal["auto"]]
+
+
+class SORParams(SystemMatrix):
+    vector_b: RightHandSides
+    x0: RightHandSides
+    relaxation_factor: RelaxationFactor
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
+    spectral_radius_mode: SpectralRadiusMode = SpectralRadiusMode.ESTIMATE
+    spectral_tol: float = Field(1e-6, gt=0, lt=1)
+    include_matrices: bool = False
+    ordering: SOROrdering = SOROrdering.LEXICOGRAPHIC
+    kernel: SORKernel = SORKernel.AUTO
 
 
 class SORIteration(BaseModel):
@@ -22,49 +55,199 @@ class SORIteration(BaseModel):
 
 class SORResult(BaseModel):
     solution: List[float]
-    transition_matrix: List[List[float]]
-    coefficient_matrix: List[List[float]]
-    spectral_radius: float
+    transition_matrix: Optional[List[List[float]]] = None
+    coefficient_matrix: Optional[List[List[float]]] = None
+    spectral_radius: Optional[float] = None
     iterations: List[SORIteration]
-    converges: bool
+    columns: Optional[Dict[str, list]] = None
+    converges: Optional[bool] = None
+    matrix_id: Optional[str] = None
+    relaxation_factor: Optional[float] = None
+    convergence_rate: Optional[float] = None
+
+
+# Golden-section search of the relaxation factor when Young's formula does not
+# apply: the interval searched, the factors tried and the sweeps spent on each
+SEARCH_INTERVAL = (0.1, 1.95)
+SEARCH_EVALUATIONS = 12
+SEARCH_SWEEPS = 40
+
+
+def _colors(operators: MatrixOperators) -> List[np.ndarray]:
+    return operators.get("multicolor_ordering", lambda: multicolor_ordering(operators.matrix))
+
+
+def _search_relaxation(operators: MatrixOperators) -> Tuple[float, float]:
+    A = operators.matrix
+
+    def radius(w: float) -> float:
+        # A few sweeps of the homogeneous system measure how fast SOR contracts
+        return power_iteration(sor_operator(A, w), 1e-3, SEARCH_SWEEPS)
+
+    ratio = (np.sqrt(5) - 1) / 2
+    lo, hi = SEARCH_INTERVAL
+    a, b = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+    fa, fb = radius(a), radius(b)
+    for _ in range(SEARCH_EVALUATIONS - 2):
+        if fa <= fb:
+            hi, b, fb = b, a, fa
+            a = hi - ratio * (hi - lo)
+            fa = radius(a)
+        else:
+            lo, a, fa = a, b, fb
+            b = lo + ratio * (hi - lo)
+            fb = radius(b)
+    return (a, fa) if fa <= fb else (b, fb)
+
+
+def optimal_relaxation(operators: MatrixOperators, tol: float) -> Tuple[float, float]:
+    """
+    Estimate the relaxation factor that minimizes the spectral radius of SOR.
+
+    For a symmetric matrix with a positive diagonal whose graph is 2-colorable
+    (property A, which the usual orderings of tridiagonal and 5-point stencil
+    matrices make consistently ordered), Young's formula gives it from the
+    spectral radius r of the Jacobi matrix, w = 2 / (1 + sqrt(1 - r^2)), and
+    SOR then converges with radius w - 1. Otherwise a golden-section search
+    measures the contraction of a few sweeps for each factor it tries.
+
+    Returns
+    =======
+
+    The relaxation factor and the estimated spectral radius of SOR with it.
+    """
+
+    def estimate() -> Tuple[float, float]:
+        A = operators.matrix
+        if len(_colors(operators)) <= 2 and np.all(diagonal(A) > 0) and is_symmetric(A):
+            jacobi_radius = iteration_radius(
+                operators, IterationMethod.JACOBI, 1, SpectralRadiusMode.ESTIMATE, tol
+            )
+            if jacobi_radius < 1:
+                w = 2 / (1 + np.sqrt(1 - jacobi_radius**2))
+                return float(w), float(w - 1)
+        return _search_relaxation(operators)
+
+    return operators.get("optimal_relaxation", estimate, tol)
+
+
+def _relaxation(
+    params: SORParams, operators: MatrixOperators
+) -> Tuple[SORParams, Optional[float]]:
+    # Replace "auto" by the estimated factor, returning the estimated radius too
+    if params.relaxation_factor != "auto":
+        return params, None
+    w, radius = optimal_relaxation(operators, params.spectral_tol)
+    return params.model_copy(update={"relaxation_factor": w}), radius
 
 
 # Método SOR adaptado
-def sor_method(params: SORParams) -> SORResult:
-    A = np.array(params.matrix_a)
-    b = np.array(params.vector_b).reshape((-1, 1))
-    x0 = np.array(params.x0).reshape((-1, 1))
+def select_sor_sweep(params: SORParams, operators: MatrixOperators, b: np.ndarray) -> Sweep:
+    """
+    Pick the SOR step for the requested ordering and kernel.
+
+    The lexicographic ordering gives the classic row-by-row method, either with a
+    sparse triangular solve (scipy) or with a compiled loop over the rows (needs
+    numba, and is used by auto when it is installed). The multicolor ordering
+    updates all the unknowns of a color at once, which is the same method on the
+    reordered system P A P^T and converges like it (e.g. red-black ordering on a
+    5-point stencil), but its iterates differ from the lexicographic ones.
+
+    With several right-hand sides auto keeps the scipy kernel, whose triangular
+    solve sweeps the whole block at once while the compiled loop goes column by
+    column.
+    """
+    A = operators.matrix
     w = params.relaxation_factor
 
-    D = np.diag(np.diag(A))
-    L = -1 * np.tril(A) + D
-    U = -1 * np.triu(A) + D
-    T = np.linalg.inv(D - L) @ U
-    C = np.linalg.inv(D - L) @ b
-
-    spectral_radius = max(abs(np.linalg.eigvals(T)))
-    converges = spectral_radius < 1
-
-    iterations = []
-    xP = x0
-    for k in range(params.niter):
-        xA = np.zeros_like(xP)
-        for i in range(A.shape[0]):
-            s1 = np.dot(A[i, :i], xA[:i])
-            s2 = np.dot(A[i, i + 1 :], xP[i + 1 :])
-            xA[i] = (b[i] - s1 - s2) / A[i, i] * w + (1 - w) * xP[i]
-        error = np.linalg.norm(xP - xA)
-        xP = xA
-
-        iterations.append(SORIteration(step=k, x=xA.flatten().tolist(), error=error))
-        if error < params.tol:
-            break
+    if params.ordering == SOROrdering.MULTICOLOR:
+        return multicolor_sor_sweep(A, b, w, _colors(operators))
+
+    if params.kernel == SORKernel.COMPILED and not HAS_NUMBA:
+        raise ValueError("The compiled kernel needs numba, which is not installed")
+    if params.kernel == SORKernel.COMPILED or (
+        params.kernel == SORKernel.AUTO and HAS_NUMBA and b.ndim == 1
+    ):
+        return compiled_sor_sweep(A, b, w)
+    splitting = operators.get("sor_splitting", lambda: sor_splitting(A, w), w)
+    return sor_sweep(A, b, w, splitting)
+
+
+def sor_spectral_radius(params: SORParams, operators: MatrixOperators) -> Optional[float]:
+    """
+    The spectral radius of the iteration matrix of the requested ordering, the
+    multicolor one being the SOR matrix of the reordered system P A P^T.
+    """
+    w = params.relaxation_factor
+
+    if params.ordering == SOROrdering.MULTICOLOR:
+        order = np.concatenate(_colors(operators))
+        return cached_spectral_radius(
+            operators,
+            lambda: sor_operator(permute(operators.matrix, order), w),
+            params.spectral_radius_mode,
+            params.spectral_tol,
+            "sor_multicolor",
+            w,
+        )
+    return iteration_radius(
+        operators, IterationMethod.SOR, w, params.spectral_radius_mode, params.spectral_tol
+    )
+
+
+def sor_iterations(params: SORParams) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Yield one row per SOR iteration and return the last iterate, or the last
+    block of iterates when vector_b holds several right-hand sides.
+    """
+    A, operators = system_matrix(params)
+    b, x0 = right_hand_sides(params.vector_b, params.x0, A.shape[0])
+    params, _ = _relaxation(params, operators)
+    sweep = select_sor_sweep(params, operators, b)
+
+    iterations = batch_iterations if b.ndim == 2 else stationary_iterations
+    return (yield from iterations(sweep, x0, params.tol, params.niter))
+
+
+def sor_method(params: SORParams) -> Union[SORResult, BatchResult]:
+    A, operators = system_matrix(params)
+    b, x0 = right_hand_sides(params.vector_b, params.x0, A.shape[0])
+    params, estimated_radius = _relaxation(params, operators)
+    w = params.relaxation_factor
+
+    sweep = select_sor_sweep(params, operators, b)
+    radius = sor_spectral_radius(params, operators)
+    converges = radius < 1 if radius is not None else None
+    # Digits of accuracy gained per iteration
+    rate_radius = radius if radius is not None else estimated_radius
+    rate = None
+    if rate_radius is not None and 0 < rate_radius < 1:
+        rate = float(-np.log10(rate_radius))
+    relaxation = {"relaxation_factor": w, "convergence_rate": rate}
+
+    matrices = {}
+    if params.include_matrices:
+        if params.ordering == SOROrdering.LEXICOGRAPHIC:
+            T, C = sor_matrices(A, b, w)
+        else:
+            T, C = sweep_matrices(sweep, *b.shape)
+        matrices = {"transition_matrix": T.tolist(), "coefficient_matrix": C.tolist()}
+
+    if b.ndim == 2:
+        result = batch_method(
+            sweep, x0, params.tol, params.niter, params.layout, radius, matrices, operators.key
+        )
+        return result.model_copy(update=relaxation)
+
+    iterations = IterationTrace(params.niter, step=int, x=(float, A.shape[0]), error=float)
+    solution = drain(stationary_iterations(sweep, x0, params.tol, params.niter), iterations)
 
     return SORResult(
-        solution=xP.flatten().tolist(),
-        transition_matrix=T.tolist(),
-        coefficient_matrix=C.tolist(),
-        spectral_radius=spectral_radius,
-        iterations=iterations,
+        solution=solution.tolist(),
+        **matrices,
+        spectral_radius=radius,
+        **iterations.export(params.layout, field="iterations"),
         converges=converges,
+        matrix_id=operators.key,
+        **relaxation,
     )
@@ -0,0 +1,190 @@
+from enum import Enum
+from typing import Callable, Hashable, Optional
+
+import numpy as np
+from pydantic import BaseModel, Field
+from scipy.sparse.linalg import ArpackError, ArpackNoConvergence, LinearOperator, eigs
+
+from LinearSystemsMethods.matrices import SystemMatrix
+from LinearSystemsMethods.operators import MatrixOperators, system_matrix
+from LinearSystemsMethods.splitting import jacobi_operator, sor_operator, sor_splitting
+
+
+class SpectralRadiusMode(str, Enum):
+    ESTIMATE = "estimate"
+    EXACT = "exact"
+    SKIP = "skip"
+
+
+class IterationMethod(str, Enum):
+    JACOBI = "jacobi"
+    GAUSS_SEIDEL = "gauss_seidel"
+    SOR = "sor"
+
+
+class SpectralRadiusParams(SystemMatrix):
+    method: IterationMethod
+    relaxation_factor: float = Field(1, gt=0, le=2)
+    mode: SpectralRadiusMode = SpectralRadiusMode.ESTIMATE
+    tol: float = Field(1e-6, gt=0, lt=1)
+
+
+class SpectralRadius(BaseModel):
+    method: IterationMethod
+    spectral_radius: float
+    converges: bool
+    matrix_id: Optional[str] = None
+
+
+# Below this size the dense eigenvalues are cheaper than any iterative estimate,
+# and ARPACK needs n > 2 anyway
+DENSE_LIMIT = 16
+POWER_MAXITER = 1000
+# Iteration matrices often have several eigenvalues of almost the same modulus, a
+# few extra Ritz values keep Arnoldi from settling on the wrong one
+ARNOLDI_EIGENVALUES = 4
+# Restarts before giving up on Arnoldi, which stalls when many eigenvalues share
+# the largest modulus (e.g. SOR with w above its optimum)
+ARNOLDI_MAXITER = 50
+
+
+def iteration_operator(
+    operators: MatrixOperators, method: IterationMethod, w: float = 1
+) -> LinearOperator:
+    A = operators.matrix
+    if method == IterationMethod.JACOBI:
+        return jacobi_operator(A)
+    if method == IterationMethod.GAUSS_SEIDEL:
+        w = 1
+    splitting = operators.get("sor_splitting", lambda: sor_splitting(A, w), w)
+    return sor_operator(A, w, splitting)
+
+
+def power_iteration(T: LinearOperator, tol: float, maxiter: int = POWER_MAXITER) -> float:
+    """
+    Estimate the spectral radius as the growth rate of ||T^k x||, averaged over
+    two steps so that a dominant pair of eigenvalues of opposite sign (or a
+    complex pair) does not make it oscillate.
+    """
+
+    x = np.random.default_rng(0).standard_normal(T.shape[0])
+    x /= np.linalg.norm(x)
+    previous_norm = None
+    estimate = np.inf
+    for _ in range(maxiter):
+        y = T.matvec(x)
+        norm = np.linalg.norm(y)
+        if norm == 0:
+            return 0.0
+        x = y / norm
+        if previous_norm is not None:
+            new_estimate = np.sqrt(norm * previous_norm)
+            if abs(new_estimate - estimate) <= tol * new_estimate:
+                return float(new_estimate)
+            estimate = new_estimate
+        previous_norm = norm
+    return float(estimate)
+
+
+def spectral_radius(
+    T: LinearOperator, mode: SpectralRadiusMode, tol: float = 1e-6
+) -> Optional[float]:
+    """
+    Compute the spectral radius of an iteration matrix given as an operator.
+
+    Parameters
+    ==========
+
+    T: The iteration matrix, only its matvec is used by the estimate.
+    mode: estimate uses ARPACK (Arnoldi) on the operator with power iteration as
+        a fallback, exact builds the dense matrix and computes all its eigenvalues,
+        skip returns None.
+    tol: The relative tolerance of the estimate.
+    """
+
+    if mode == SpectralRadiusMode.SKIP:
+        return None
+
+    n = T.shape[0]
+    if mode == SpectralRadiusMode.EXACT or n <= DENSE_LIMIT:
+        dense = T.matmat(np.eye(n))
+        return float(max(abs(np.linalg.eigvals(dense))))
+
+    v0 = np.random.default_rng(0).standard_normal(n)
+    try:
+        eigenvalues = eigs(
+            T,
+            k=min(ARNOLDI_EIGENVALUES, n - 2),
+            which="LM",
+            tol=tol,
+            maxiter=ARNOLDI_MAXITER,
+            v0=v0,
+            return_eigenvectors=False,
+        )
+        return float(max(abs(eigenvalues)))
+    except (ArpackNoConvergence, ArpackError):
+        return power_iteration(T, tol)
+
+
+def cached_spectral_radius(
+    operators: MatrixOperators,
+    build_operator: Callable[[], LinearOperator],
+    mode: SpectralRadiusMode,
+    tol: float,
+    *key: Hashable,
+) -> Optional[float]:
+    """
+    The spectral_radius of the iteration matrix built by build_operator, cached
+    with the operators of the matrix under key, which names the iteration.
+    """
+
+    if mode == SpectralRadiusMode.SKIP:
+        return None
+    return operators.get(
+        "spectral_radius",
+        lambda: spectral_radius(build_operator(), mode, tol),
+        mode.value,
+        tol,
+        *key,
+    )
+
+
+def iteration_radius(
+    operators: MatrixOperators,
+    method: IterationMethod,
+    w: float,
+    mode: SpectralRadiusMode,
+    tol: float,
+) -> Optional[float]:
+    """
+    The cached spectral radius of the Jacobi, Gauss-Seidel or SOR iteration
+    matrix, shared by the solvers and /spectral-radius.
+    """
+
+    if method != IterationMethod.SOR:
+        w = 1
+    # Gauss-Seidel is SOR with w = 1 and shares its entry
+    name = "jacobi" if method == IterationMethod.JACOBI else "sor"
+    return cached_spectral_radius(
+        operators,
+        lambda: iteration_operator(operators, method, w),
+        mode,
+        tol,
+        name,
+        w,
+    )
+
+
+def get_spectral_radius(params: SpectralRadiusParams) -> SpectralRadius:
+    assert params.mode != SpectralRadiusMode.SKIP, "mode must be estimate or exact"
+
+    _, operators = system_matrix(params)
+    radius = iteration_radius(
+        operators, params.method, params.relaxation_factor, params.mode, params.tol
+    )
+    return SpectralRadius(
+        method=params.method,
+        spectral_radius=radius,
+        converges=radius < 1,
+        matrix_id=operators.key,
+    )
@@ -0,0 +1,266 @@
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import solve_triangular
+from scipy.sparse.linalg import LinearOperator, spsolve_triangular
+
+from LinearSystemsMethods.kernels import sor_csr_sweep
+from LinearSystemsMethods.matrices import Matrix, diagonal, diagonal_matrix, lower, to_dense, upper
+
+Sweep = Callable[[np.ndarray], np.ndarray]
+# The diagonal, the lower triangle D + wL and the strict upper triangle U of SOR
+SORSplitting = Tuple[np.ndarray, Matrix, Matrix]
+
+
+def _diagonal(A: Matrix) -> np.ndarray:
+    d = diagonal(A)
+    if np.any(d == 0):
+        raise ValueError("The matrix has zeros on its diagonal")
+    return d
+
+
+def _along_rows(d: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # A block of right-hand sides holds one system per column, so the diagonal
+    # scales its rows
+    return d[:, None] if b.ndim == 2 else d
+
+
+def _forward_substitution(L: Matrix) -> Callable[[np.ndarray], np.ndarray]:
+    """
+    Return a solver of L x = r for a lower triangular L, which costs O(nnz) per
+    solve when L is sparse.
+    """
+
+    if sp.issparse(L):
+        return lambda r: spsolve_triangular(L, r, lower=True)
+    return lambda r: solve_triangular(L, r, lower=True)
+
+
+def jacobi_sweep(A: Matrix, b: np.ndarray) -> Sweep:
+    """
+    One Jacobi step x + D^-1 (b - A x), a diagonal scaling of the residual. b and
+    x may be n x k blocks with one system per column.
+    """
+
+    d = _along_rows(_diagonal(A), b)
+    return lambda x: x + (b - A @ x) / d
+
+
+def sor_splitting(A: Matrix, w: float = 1) -> SORSplitting:
+    d = _diagonal(A)
+    return d, lower(A, -1) * w + diagonal_matrix(d, A), upper(A, 1)
+
+
+def sor_sweep(
+    A: Matrix, b: np.ndarray, w: float = 1, splitting: Optional[SORSplitting] = None
+) -> Sweep:
+    """
+    One SOR step, the forward substitution (D + wL) x' = wb + ((1 - w)D - wU) x
+    where L and U are the strictly lower and upper parts of A. w = 1 is Gauss-Seidel.
+    b and x may be n x k blocks, then every column is swept by the same solve.
+    splitting is the sor_splitting of A for w, when it was already computed.
+    """
+
+    d, triangle, strict_upper = splitting or sor_splitting(A, w)
+    solve = _forward_substitution(triangle)
+    d = _along_rows(d, b)
+    return lambda x: solve(w * b + (1 - w) * d * x - w * (strict_upper @ x))
+
+
+def compiled_sor_sweep(A: Matrix, b: np.ndarray, w: float = 1) -> Sweep:
+    """
+    The same step as sor_sweep, as a row-by-row loop over the CSR arrays of A that
+    is compiled when numba is installed. A block of right-hand sides is swept one
+    column at a time.
+    """
+
+    d = _diagonal(A)
+    A = sp.csr_matrix(A)
+    if b.ndim == 2:
+        columns = np.ascontiguousarray(b.T)
+        return lambda x: np.column_stack([
+            sor_csr_sweep(A.indptr, A.indices, A.data, d, column, np.ascontiguousarray(x[:, j]), w)
+            for j, column in enumerate(columns)
+        ])
+    return lambda x: sor_csr_sweep(A.indptr, A.indices, A.data, d, b, x, w)
+
+
+def multicolor_ordering(A: Matrix) -> List[np.ndarray]:
+    """
+    Split the unknowns in colors such that no two unknowns of the same color are
+    coupled by A, with a greedy coloring of the graph of A. A 5-point stencil gets
+    the red-black ordering.
+
+    Returns
+    =======
+
+    The indices of the unknowns of each color.
+    """
+
+    pattern = sp.csr_matrix(A != 0)
+    pattern = (pattern + pattern.T).tocsr()
+    indptr, indices = pattern.indptr, pattern.indices
+
+    colors = np.full(A.shape[0], -1)
+    for i in range(A.shape[0]):
+        used = set(colors[indices[indptr[i] : indptr[i + 1]]].tolist())
+        color = 0
+        while color in used:
+            color += 1
+        colors[i] = color
+    return [np.flatnonzero(colors == c) for c in range(colors.max() + 1)]
+
+
+def multicolor_sor_sweep(
+    A: Matrix, b: np.ndarray, w: float, colors: List[np.ndarray]
+) -> Sweep:
+    """
+    One SOR step in multicolor order: the unknowns of a color do not depend on each
+    other, so each color is updated at once with a sparse matvec over its rows.
+    """
+
+    d = _along_rows(_diagonal(A), b)
+    A = sp.csr_matrix(A)
+    blocks = [(rows, A[rows], d[rows], b[rows]) for rows in colors]
+
+    def sweep(x: np.ndarray) -> np.ndarray:
+        x = x.copy()
+        for rows, A_rows, d_rows, b_rows in blocks:
+            x[rows] += w * (b_rows - A_rows @ x) / d_rows
+        return x
+
+    return sweep
+
+
+def permute(A: Matrix, order: np.ndarray) -> Matrix:
+    """
+    Return P A P^T for the permutation that lists the unknowns in the given order.
+    """
+
+    return A[order][:, order]
+
+
+def jacobi_operator(A: Matrix) -> LinearOperator:
+    """
+    The Jacobi iteration matrix T = D^-1 (D - A), applied without forming it.
+    """
+
+    d = _diagonal(A)
+
+    def matvec(x: np.ndarray) -> np.ndarray:
+        x = np.ravel(x)
+        return x - (A @ x) / d
+
+    return LinearOperator(A.shape, matvec=matvec, dtype=float)
+
+
+def sor_operator(
+    A: Matrix, w: float = 1, splitting: Optional[SORSplitting] = None
+) -> LinearOperator:
+    """
+    The SOR iteration matrix T = (D + wL)^-1 ((1 - w)D - wU), applied with a
+    triangular solve. w = 1 is Gauss-Seidel.
+    """
+
+    d, triangle, strict_upper = splitting or sor_splitting(A, w)
+    solve = _forward_substitution(triangle)
+
+    def matvec(x: np.ndarray) -> np.ndarray:
+        x = np.ravel(x)
+        return solve((1 - w) * d * x - w * (strict_upper @ x))
+
+    return LinearOperator(A.shape, matvec=matvec, dtype=float)
+
+
+def jacobi_matrices(A: Matrix, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The dense T and C of the Jacobi iteration x' = T x + C, only for display.
+    """
+
+    A = to_dense(A)
+    d = _diagonal(A)
+    T = np.eye(A.shape[0]) - A / d[:, None]
+    C = (b / _along_rows(d, b)).reshape((A.shape[0], -1))
+    return T, C
+
+
+def sor_matrices(A: Matrix, b: np.ndarray, w: float = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The dense T and C of the SOR iteration x' = T x + C, only for display.
+    """
+
+    A = to_dense(A)
+    d = _diagonal(A)
+    L = np.tril(A, -1) * w + np.diag(d)
+    T = solve_triangular(L, (1 - w) * np.diag(d) - w * np.triu(A, 1), lower=True)
+    C = solve_triangular(L, w * b, lower=True).reshape((A.shape[0], -1))
+    return T, C
+
+
+def sweep_matrices(
+    sweep: Sweep, n: int, k: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The dense T and C of any affine step x' = T x + C, recovered by applying it to
+    zero and to the unit vectors, only for display. k is the number of columns
+    of a sweep over a block of right-hand sides, which gets one column of C each.
+    """
+
+    shape = (n,) if k is None else (n, k)
+    C = sweep(np.zeros(shape))
+    columns = []
+    for e in np.eye(n):
+        E = e if k is None else np.repeat(e[:, None], k, axis=1)
+        columns.append(np.reshape(sweep(E) - C, (n, -1))[:, 0])
+    T = np.column_stack(columns) if n else np.zeros((0, 0))
+    return T, C.reshape((n, -1))
+
+
+def stationary_iterations(
+    sweep: Sweep, x0: np.ndarray, tol: float, niter: int
+) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Apply sweep until two iterates are closer than tol, yielding one row per
+    iteration, and return the last iterate.
+    """
+
+    xP = x0
+    for k in range(niter):
+        xA = sweep(xP)
+        error = np.linalg.norm(xP - xA)
+        xP = xA
+
+        yield {"step": k, "x": xA, "error": error}
+        if error < tol:
+            break
+
+    return xP
+
+
+def batch_iterations(
+    sweep: Sweep, X0: np.ndarray, tol: float, niter: int
+) -> Generator[Dict[str, Any], None, np.ndarray]:
+    """
+    Apply sweep to an n x k block of iterates, one system per column, and return
+    the last block. Every column stops changing once two of its iterates are
+    closer than tol, so it ends where it would have ended solved alone. Yields
+    one row per iteration with the error of every column and the number of
+    columns still iterating.
+    """
+
+    X = X0.copy()
+    errors = np.full(X.shape[1], np.inf)
+    active = np.ones(X.shape[1], dtype=bool)
+    for k in range(niter):
+        XA = sweep(X)
+        step_errors = np.linalg.norm(X - XA, axis=0)
+        X[:, active] = XA[:, active]
+        errors[active] = step_errors[active]
+        active &= errors >= tol
+
+        yield {"step": k, "errors": errors.copy(), "active": int(active.sum())}
+        if not active.any():
+            break
+
+    return X
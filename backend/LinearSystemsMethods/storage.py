@@ -0,0 +1,167 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from typing import BinaryIO, Optional
+
+import numpy as np
+import scipy.io
+import scipy.sparse as sp
+
+from LinearSystemsMethods.matrices import Matrix, fingerprint
+from utils.config import MATRIX_STORE_DIR, MATRIX_UPLOAD_MAX_BYTES
+
+UPLOAD_FORMATS = (".npy", ".npz", ".mtx")
+# Rows copied at a time when a dense upload has to be converted to float64
+COPY_ROWS = 1024
+CHUNK_BYTES = 1024 * 1024
+
+_MATRIX_ID = re.compile(r"[0-9a-f]{32}")
+
+
+def _matrix_dir(matrix_id: str) -> Optional[str]:
+    # matrix_id comes from the request, only fingerprints may name a directory
+    if not _MATRIX_ID.fullmatch(matrix_id):
+        return None
+    return os.path.join(MATRIX_STORE_DIR, matrix_id)
+
+
+def _copy_upload(stream: BinaryIO, path: str) -> None:
+    size = 0
+    with open(path, "wb") as target:
+        while True:
+            chunk = stream.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MATRIX_UPLOAD_MAX_BYTES:
+                raise ValueError(f"The file is larger than {MATRIX_UPLOAD_MAX_BYTES} bytes")
+            target.write(chunk)
+
+
+def _read_upload(path: str, extension: str) -> Matrix:
+    """
+    Read an uploaded file straight into arrays: a .npy file is memory-mapped,
+    an .npz file holds a scipy.sparse matrix (save_npz) or a single dense
+    array, and a Matrix Market file gives a sparse matrix or a dense array.
+    """
+
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r", allow_pickle=False)
+    if extension == ".npz":
+        with np.load(path, allow_pickle=False) as archive:
+            files = set(archive.files)
+            if {"format", "shape", "data"} <= files:
+                return sp.load_npz(path)
+            if len(files) != 1:
+                raise ValueError("An .npz file must hold a sparse matrix or a single array")
+            return archive[files.pop()]
+    return scipy.io.mmread(path)
+
+
+def _canonical(A: Matrix) -> Matrix:
+    if sp.issparse(A):
+        A = sp.csr_matrix(A, dtype=float)
+        A.sum_duplicates()
+        A.sort_indices()
+        # scipy keeps 32-bit indices whenever they fit, storing them that way
+        # lets the memory-mapped arrays be used without a conversion
+        if A.nnz < np.iinfo(np.int32).max and A.shape[0] < np.iinfo(np.int32).max:
+            A.indptr = A.indptr.astype(np.int32, copy=False)
+            A.indices = A.indices.astype(np.int32, copy=False)
+    elif not np.issubdtype(A.dtype, np.number) or np.iscomplexobj(A):
+        raise ValueError("The matrix must hold real numbers")
+    if A.ndim != 2 or A.shape[0] != A.shape[1]:
+        raise ValueError("The matrix must be square")
+    return A
+
+
+def _write_dense(A: np.ndarray, upload: str, path: str) -> None:
+    if isinstance(A, np.memmap) and A.dtype == np.float64 and A.flags.c_contiguous:
+        # The upload already is the stored file
+        os.replace(upload, path)
+        return
+    target = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=A.shape)
+    for start in range(0, A.shape[0], COPY_ROWS):
+        target[start : start + COPY_ROWS] = A[start : start + COPY_ROWS]
+    target.flush()
+    del target
+
+
+def save_matrix(filename: str, stream: BinaryIO) -> str:
+    """
+    Store an uploaded .npy, .npz or Matrix Market file under the fingerprint of
+    its matrix, which becomes its matrix_id. Uploading the same matrix again
+    keeps the stored copy.
+
+    Parameters
+    ==========
+
+    filename: The name of the uploaded file, its extension gives the format.
+    stream: The contents of the file.
+    """
+
+    extension = os.path.splitext(filename.lower())[1]
+    if extension not in UPLOAD_FORMATS:
+        raise ValueError(f"Unsupported file {filename}, send one of {', '.join(UPLOAD_FORMATS)}")
+
+    os.makedirs(MATRIX_STORE_DIR, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".upload-", dir=MATRIX_STORE_DIR)
+    try:
+        upload = os.path.join(staging, "upload" + extension)
+        _copy_upload(stream, upload)
+        A = _canonical(_read_upload(upload, extension))
+        matrix_id = fingerprint(A)
+        if os.path.isdir(_matrix_dir(matrix_id)):
+            return matrix_id
+
+        if sp.issparse(A):
+            for name in ("indptr", "indices", "data"):
+                np.save(os.path.join(staging, name + ".npy"), getattr(A, name))
+            layout = "csr"
+        else:
+            _write_dense(A, upload, os.path.join(staging, "dense.npy"))
+            layout = "dense"
+        with open(os.path.join(staging, "meta.json"), "w") as meta:
+            json.dump({"format": layout, "shape": list(A.shape)}, meta)
+        if os.path.exists(upload):
+            os.remove(upload)
+
+        try:
+            os.rename(staging, _matrix_dir(matrix_id))
+        except OSError:
+            # Another upload of the same matrix got there first
+            pass
+        return matrix_id
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def load_matrix(matrix_id: str) -> Optional[Matrix]:
+    """
+    Return a stored matrix memory-mapped from disk, without reading it, or None
+    if there is no matrix with that id.
+    """
+
+    directory = _matrix_dir(matrix_id)
+    if directory is None or not os.path.isdir(directory):
+        return None
+    with open(os.path.join(directory, "meta.json")) as meta:
+        info = json.load(meta)
+
+    def array(name: str) -> np.ndarray:
+        return np.load(os.path.join(directory, name + ".npy"), mmap_mode="r")
+
+    if info["format"] == "dense":
+        return array("dense")
+    return sp.csr_matrix(
+        (array("data"), array("indices"), array("indptr")),
+        shape=tuple(info["shape"]),
+        copy=False,
+    )
+
+
+def is_stored(matrix_id: str) -> bool:
+    directory = _matrix_dir(matrix_id)
+    return directory is not None and os.path.isdir(directory)
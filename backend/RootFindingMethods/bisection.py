@@ -1,12 +1,15 @@
-from typing import Callable, List, Tuple
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 
 
 
+import numpy as np
 import sympy
 from pydantic import BaseModel, Field
 
 from utils.errors import ErrorType, calculate_error
+from utils.expressions import compile_expression
 from utils.parsing import ExpressionAnnotation, to_latex
+from utils.trace import IterationTrace, TableLayout, drain
 
 
 class BisectionIteration(BaseModel):
@@ -22,6 +25,7 @@ class BisectionRoots(BaseModel):
     expression: str
     root: float
     table: List[BisectionIteration]
+    columns: Optional[Dict[str, list]] = None
 
 
 class BisectionRootsParams(BaseModel):
@@ -31,30 +35,17 @@ class BisectionRootsParams(BaseModel):
     b: float
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
 
 
-def bisection_roots(
+def bisection_iterations(
     expr: sympy.Expr, error_type: str, a: float, b: float, tol: float, niter: int
-) -> BisectionRoots:
+) -> Generator[Dict[str, Any], None, float]:
     """
-    Find a root of a function using the bisection method, requires a function to be continuous in the interval [a, b] and f(a) * f(b) < 0.
-
-    Parameters
-    ==========
-
-    expr: A sympy expression representing the function.
-    a: The left bound of the interval.
-    b: The right bound of the interval.
-    tol: The tolerance of the method.
-    niter: The maximum number of iterations.
-
-    Returns
-    =======
-
-    A tuple containing the root and a pandas dataframe with the iterations data.
+    Run the bisection method yielding one row per iteration, returns the root.
+    See bisection_roots for the parameters.
     """
-    x = sympy.symbols("x")
-    f: Callable[[float], float] = sympy.lambdify(x, expr, "math", docstring_limit=-1)
+    f: Callable[[float], float] = compile_expression(expr).function("math")
 
     fa = f(a)
     fb = f(b)
@@ -72,9 +63,7 @@ def bisection_roots(
     error = tol + 1
     iteration = 1
 
-    data = [
-        {"iteration": iteration, "a": a, "b": b, "xm": xm, "f_xm": fxm, "error": error}
-    ]
+    yield {"iteration": iteration, "a": a, "b": b, "xm": xm, "f_xm": fxm, "error": error}
 
     while error > tol and fxm != 0 and iteration < niter:
         if fa * fxm < 0:
@@ -90,18 +79,160 @@ def bisection_roots(
         error = calculate_error(xm, xm_old, error_type)
         iteration += 1
 
-        it_data = {
-            "iteration": iteration,
-            "a": a,
-            "b": b,
-            "xm": xm,
-            "f_xm": fxm,
-            "error": error,
-        }
-        data.append(it_data)
+        yield {"iteration": iteration, "a": a, "b": b, "xm": xm, "f_xm": fxm, "error": error}
 
     if error < tol or fxm == 0:
-        return BisectionRoots(root=xm, table=data, expression=to_latex(expr))
+        return xm
+
+    raise ValueError(f"The method failed after {niter} iterations")
+
+
+def bisection_roots(
+    expr: sympy.Expr,
+    error_type: str,
+    a: float,
+    b: float,
+    tol: float,
+    niter: int,
+    layout: TableLayout = TableLayout.ROWS,
+) -> BisectionRoots:
+    """
+    Find a root of a function using the bisection method, requires a function to be continuous in the interval [a, b] and f(a) * f(b) < 0.
+
+    Parameters
+    ==========
+
+    expr: A sympy expression representing the function.
+    a: The left bound of the interval.
+    b: The right bound of the interval.
+    tol: The tolerance of the method.
+    niter: The maximum number of iterations.
+    layout: Return the iterations table as rows or as columns.
+
+    Returns
+    =======
+
+    A tuple containing the root and a pandas dataframe with the iterations data.
+    """
+    data = IterationTrace(
+        niter, iteration=int, a=float, b=float, xm=float, f_xm=float, error=float
+    )
+    root = drain(bisection_iterations(expr, error_type, a, b, tol, niter), data)
+
+    return BisectionRoots(root=root, expression=to_latex(expr), **data.export(layout))
+
+
+class BatchBisectionRow(BaseModel):
+    a: float
+    b: float
+    root: Optional[float]
+    iterations: int
+    error: Optional[float]
+    converged: bool
+
+
+class BatchBisectionRoots(BaseModel):
+    expression: str
+    rows: List[BatchBisectionRow]
+
+
+class BatchBisectionParams(BaseModel):
+    expression: ExpressionAnnotation
+    error_type: ErrorType = ErrorType.ABSOLUTE
+    a: List[float] = Field(..., min_length=1, max_length=100000)
+    b: List[float] = Field(..., min_length=1, max_length=100000)
+    tol: float = Field(..., gt=1e-21, le=1)
+    niter: int = Field(..., gt=0, le=100)
+
+
+def batch_bisection_roots(
+    expr: sympy.Expr,
+    error_type: str,
+    a: List[float],
+    b: List[float],
+    tol: float,
+    niter: int,
+) -> BatchBisectionRoots:
+    """
+    Run the bisection method on many [a, b] brackets of the same function at once.
+    Every bracket is a lane of a NumPy array, all of them are halved together and
+    each lane stops updating as soon as it converges.
+
+    Parameters
+    ==========
+
+    expr: A sympy expression representing the function.
+    a: The left bounds of the intervals.
+    b: The right bounds of the intervals.
+    tol: The tolerance of the method.
+    niter: The maximum number of iterations.
+
+    Returns
+    =======
+
+    One row per bracket with its root, the iterations used and the last error.
+    Brackets without a sign change get no root.
+    """
+    assert len(a) == len(b), "a and b must have the same length"
+
+    f = _vectorized(compile_expression(expr).function("numpy"))
+
+    lane_bounds = list(zip(a, b))
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    with np.errstate(all="ignore"):
+        fa = f(a)
+        fb = f(b)
+
+    valid = fa * fb <= 0
+    xm = np.where(fa == 0, a, np.where(fb == 0, b, (a + b) / 2))
+    with np.errstate(all="ignore"):
+        fxm = f(xm)
+    error = np.full(a.shape, tol + 1)
+    iterations = valid.astype(int)
+    active = valid & (fa != 0) & (fb != 0) & (fxm != 0)
+    error[valid & ~active] = 0
+
+    with np.errstate(all="ignore"):
+        for _ in range(1, niter):
+            if not active.any():
+                break
+            left = active & (fa * fxm < 0)
+            right = active & ~left
+            b = np.where(left, xm, b)
+            fb = np.where(left, fxm, fb)
+            a = np.where(right, xm, a)
+            fa = np.where(right, fxm, fa)
+
+            xm_old = xm
+            xm = np.where(active, (a + b) / 2, xm)
+            fxm = np.where(active, f(xm), fxm)
+            error = np.where(active, calculate_error(xm, xm_old, error_type), error)
+            iterations += active
+            active &= (error > tol) & (fxm != 0)
+
+    converged = valid & ((error < tol) | (fxm == 0))
+    rows = [
+        BatchBisectionRow(
+            a=lane_a,
+            b=lane_b,
+            root=root if ok else None,
+            iterations=its,
+            error=err if lane_valid else None,
+            converged=ok,
+        )
+        for (lane_a, lane_b), root, its, err, ok, lane_valid in zip(
+            lane_bounds,
+            xm.tolist(),
+            iterations.tolist(),
+            error.tolist(),
+            converged.tolist(),
+            valid.tolist(),
+        )
+    ]
+    return BatchBisectionRoots(expression=to_latex(expr), rows=rows)
+
 
-    if iteration == niter:
-        raise ValueError(f"The method failed after {niter} iterations")
+def _vectorized(f: Callable) -> Callable:
+    # lambdify returns a scalar for constant expressions, broadcast it to the lanes
+    return lambda values: np.broadcast_to(f(values), values.shape).astype(float)
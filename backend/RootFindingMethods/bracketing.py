@@ -0,0 +1,315 @@
+import sys
+from enum import Enum
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
+
+import sympy
+from pydantic import BaseModel, Field
+
+from utils.errors import ErrorType, calculate_error
+from utils.expressions import compile_expression
+from utils.parsing import ExpressionAnnotation, to_latex
+from utils.trace import IterationTrace, TableLayout, drain
+
+EPS = sys.float_info.epsilon
+
+
+class BracketingMethod(str, Enum):
+    BRENT = "brent"
+    ILLINOIS = "illinois"
+
+
+class BracketingIteration(BaseModel):
+    iteration: int
+    a: float
+    b: float
+    x: float
+    f_x: float
+    error: float
+    evaluations: int
+
+
+class BracketingRoots(BaseModel):
+    expression: str
+    method: BracketingMethod
+    root: float
+    iterations: int
+    evaluations: int
+    table: List[BracketingIteration]
+    columns: Optional[Dict[str, list]] = None
+
+
+class BracketingParams(BaseModel):
+    expression: ExpressionAnnotation
+    method: BracketingMethod = BracketingMethod.BRENT
+    error_type: ErrorType = ErrorType.ABSOLUTE
+    a: float
+    b: float
+    tol: float = Field(..., gt=1e-21, le=1)
+    niter: int = Field(..., gt=0, le=100)
+    max_evaluations: Optional[int] = Field(None, gt=1, le=100000)
+    layout: TableLayout = TableLayout.ROWS
+
+
+class EvaluationBudgetExceeded(ValueError):
+    pass
+
+
+class CachedFunction:
+    """
+    Wrap f so every value is computed once and the number of evaluations is
+    counted against an optional budget.
+    """
+
+    def __init__(self, f: Callable[[float], float], max_evaluations: Optional[int] = None):
+        self.f = f
+        self.max_evaluations = max_evaluations
+        self.evaluations = 0
+        self.values: Dict[float, float] = {}
+
+    def __call__(self, x: float) -> float:
+        if x in self.values:
+            return self.values[x]
+        if self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            raise EvaluationBudgetExceeded(
+                f"The method used its budget of {self.max_evaluations} function evaluations"
+            )
+        self.evaluations += 1
+        fx = self.values[x] = self.f(x)
+        return fx
+
+    def seed(self, x: float, fx: float) -> None:
+        """
+        Store a value that is already known, e.g. from a previous grid scan.
+        """
+
+        self.values[x] = fx
+
+
+def brent(
+    f: CachedFunction,
+    a: float,
+    b: float,
+    tol: float,
+    niter: int,
+    error_type: str = ErrorType.ABSOLUTE,
+) -> Generator[Dict[str, Any], None, Tuple[float, int]]:
+    """
+    Brent's method: inverse quadratic interpolation or secant steps, falling back to
+    bisection whenever they do not shrink the bracket fast enough.
+
+    Returns
+    =======
+
+    Yields one row per iteration and returns a tuple with the root and the number
+    of iterations made.
+    """
+
+    fa = f(a)
+    fb = f(b)
+    if fa == 0:
+        return a, 0
+    if fb == 0:
+        return b, 0
+    if fa * fb > 0:
+        raise ValueError(f"There is no root in the interval [{a},{b}]")
+
+    # b is the best estimate, a the previous one and c the contrapoint of b
+    c, fc = a, fa
+    d = e = b - a
+    for iteration in range(1, niter + 1):
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+
+        tol1 = 2 * EPS * abs(b) + tol / 2
+        m = (c - b) / 2
+        # The relative error is undefined at b = 0, e.g. a bracket ending at the origin
+        error = calculate_error(b, b + m, error_type) if b != 0 else abs(m)
+        yield {
+            "iteration": iteration,
+            "a": min(b, c),
+            "b": max(b, c),
+            "x": b,
+            "f_x": fb,
+            "error": error,
+            "evaluations": f.evaluations,
+        }
+        converged = abs(m) <= tol1 if error_type == ErrorType.ABSOLUTE else error < tol
+        if converged or fb == 0:
+            return b, iteration
+
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                # Secant step
+                p = 2 * m * s
+                q = 1 - s
+            else:
+                # Inverse quadratic interpolation
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            else:
+                p = -p
+            if 2 * p < min(3 * m * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+
+        a, fa = b, fb
+        b = b + d if abs(d) > tol1 else b + (tol1 if m > 0 else -tol1)
+        fb = f(b)
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+
+    raise ValueError(f"Method failed after {niter} iterations")
+
+
+def illinois(
+    f: CachedFunction,
+    a: float,
+    b: float,
+    tol: float,
+    niter: int,
+    error_type: str = ErrorType.ABSOLUTE,
+) -> Generator[Dict[str, Any], None, Tuple[float, int]]:
+    """
+    Illinois-modified regula falsi: a false position step that halves the value kept
+    at an end point when that end is retained twice in a row, which avoids the
+    one-sided stagnation of the plain method.
+
+    Returns
+    =======
+
+    Yields one row per iteration and returns a tuple with the root and the number
+    of iterations made.
+    """
+
+    fa = f(a)
+    fb = f(b)
+    if fa == 0:
+        return a, 0
+    if fb == 0:
+        return b, 0
+    if fa * fb > 0:
+        raise ValueError(f"There is no root in the interval [{a},{b}]")
+
+    x_old = None
+    side = 0
+    for iteration in range(1, niter + 1):
+        x = b - fb * (b - a) / (fb - fa)
+        fx = f(x)
+        error = abs(b - a) if x_old is None else calculate_error(x_old, x, error_type)
+        yield {
+            "iteration": iteration,
+            "a": a,
+            "b": b,
+            "x": x,
+            "f_x": fx,
+            "error": error,
+            "evaluations": f.evaluations,
+        }
+        if fx == 0 or (x_old is not None and error < tol):
+            return x, iteration
+
+        if fx * fa > 0:
+            a, fa = x, fx
+            if side == -1:
+                fb /= 2
+            side = -1
+        else:
+            b, fb = x, fx
+            if side == 1:
+                fa /= 2
+            side = 1
+        x_old = x
+
+    raise ValueError(f"Method failed after {niter} iterations")
+
+
+def new_bracketing_trace(niter: int) -> IterationTrace:
+    return IterationTrace(
+        niter,
+        iteration=int,
+        a=float,
+        b=float,
+        x=float,
+        f_x=float,
+        error=float,
+        evaluations=int,
+    )
+
+
+BRACKETING_METHODS = {
+    BracketingMethod.BRENT: brent,
+    BracketingMethod.ILLINOIS: illinois,
+}
+
+
+def bracketing_roots(
+    expr: sympy.Expr,
+    method: BracketingMethod,
+    error_type: str,
+    a: float,
+    b: float,
+    tol: float,
+    niter: int,
+    max_evaluations: Optional[int] = None,
+    layout: TableLayout = TableLayout.ROWS,
+) -> BracketingRoots:
+    """
+    Find a root of a function in [a, b] with a safeguarded bracketing method, requires
+    f(a) * f(b) <= 0. Every value of f is computed once.
+
+    Parameters
+    ==========
+
+    expr: A sympy expression representing the function.
+    method: Brent's method or Illinois-modified regula falsi.
+    a: The left bound of the interval.
+    b: The right bound of the interval.
+    tol: The tolerance of the method.
+    niter: The maximum number of iterations.
+    max_evaluations: The maximum number of function evaluations, unlimited if None.
+    layout: Return the iterations table as rows or as columns.
+    """
+
+    f = CachedFunction(compile_expression(expr).function("math"), max_evaluations)
+    trace = new_bracketing_trace(niter)
+    root, iterations = drain(
+        BRACKETING_METHODS[method](f, a, b, tol, niter, error_type), trace
+    )
+
+    return BracketingRoots(
+        expression=to_latex(expr),
+        method=method,
+        root=root,
+        iterations=iterations,
+        evaluations=f.evaluations,
+        **trace.export(layout),
+    )
+
+
+def bracketing_iterations(
+    expr: sympy.Expr,
+    method: BracketingMethod,
+    error_type: str,
+    a: float,
+    b: float,
+    tol: float,
+    niter: int,
+    max_evaluations: Optional[int] = None,
+) -> Generator[Dict[str, Any], None, float]:
+    """
+    Same as bracketing_roots, but yields one row per iteration and returns the root.
+    """
+
+    f = CachedFunction(compile_expression(expr).function("math"), max_evaluations)
+    root, _ = yield from BRACKETING_METHODS[method](f, a, b, tol, niter, error_type)
+    return root
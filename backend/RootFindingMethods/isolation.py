@@ -0,0 +1,179 @@
+from typing import Callable, List, Tuple
+
+import numpy as np
+import sympy
+from pydantic import BaseModel, Field
+from scipy.optimize import minimize_scalar
+
+from RootFindingMethods.bracketing import CachedFunction, brent
+
+from utils.expressions import compile_expression
+from utils.parsing import ExpressionAnnotation, to_latex
+from utils.trace import drain
+
+# Brent halves the bracket at least every few steps, this is far beyond any tol
+REFINE_NITER = 200
+
+
+class IsolatedRoot(BaseModel):
+    root: float
+    a: float
+    b: float
+    f_root: float
+    evaluations: int
+
+
+class RootIsolation(BaseModel):
+    expression: str
+    roots: List[IsolatedRoot]
+    scan_evaluations: int
+
+
+class RootIsolationParams(BaseModel):
+    expression: ExpressionAnnotation
+    lo: float
+    hi: float
+    tol: float = Field(..., gt=1e-21, le=1)
+    grid_points: int = Field(200, ge=2, le=100000)
+    max_depth: int = Field(8, ge=0, le=30)
+
+
+def scan_sign_changes(
+    f: Callable[[np.ndarray], np.ndarray], lo: float, hi: float, grid_points: int, max_depth: int
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Evaluate f on a uniform grid over [lo, hi] and refine it where |f| has a local
+    minimum without a sign change, which is where two close roots (or a root of even
+    multiplicity) can hide between grid points.
+
+    Returns
+    =======
+
+    The sorted grid, the values of f on it and the number of evaluations made.
+    """
+
+    xs = np.linspace(lo, hi, grid_points)
+    with np.errstate(all="ignore"):
+        fs = f(xs)
+    evaluations = xs.size
+
+    for _ in range(max_depth):
+        abs_fs = np.abs(fs)
+        inner = slice(1, -1)
+        suspicious = (
+            (abs_fs[inner] < abs_fs[:-2])
+            & (abs_fs[inner] < abs_fs[2:])
+            & (np.sign(fs[:-2]) == np.sign(fs[inner]))
+            & (np.sign(fs[2:]) == np.sign(fs[inner]))
+        )
+        idx = np.flatnonzero(suspicious) + 1
+        if idx.size == 0:
+            break
+
+        new_xs = np.concatenate(((xs[idx - 1] + xs[idx]) / 2, (xs[idx] + xs[idx + 1]) / 2))
+        with np.errstate(all="ignore"):
+            new_fs = f(new_xs)
+        evaluations += new_xs.size
+
+        xs = np.concatenate((xs, new_xs))
+        fs = np.concatenate((fs, new_fs))
+        order = np.argsort(xs, kind="stable")
+        xs, fs = xs[order], fs[order]
+
+    return xs, fs, evaluations
+
+
+def isolate_roots(
+    expr: sympy.Expr, lo: float, hi: float, tol: float, grid_points: int, max_depth: int
+) -> RootIsolation:
+    """
+    Find all the real roots of a function in [lo, hi]: scan the interval for sign
+    changes on an adaptive grid and refine every bracket found with Brent's method,
+    reusing the values of f already computed by the scan.
+
+    Parameters
+    ==========
+
+    expr: A sympy expression representing the function.
+    lo: The left bound of the interval.
+    hi: The right bound of the interval.
+    tol: The tolerance used to refine each root, and to accept minima of |f|
+        that touch zero without changing sign.
+    grid_points: The number of points of the initial grid.
+    max_depth: The maximum number of grid refinement passes.
+    """
+
+    assert lo < hi, "lo must be smaller than hi"
+
+    compiled = compile_expression(expr)
+    f_vec = compiled.function("numpy")
+    f = compiled.function("math")
+
+    def f_grid(values: np.ndarray) -> np.ndarray:
+        return np.broadcast_to(f_vec(values), values.shape).astype(float)
+
+    xs, fs, scan_evaluations = scan_sign_changes(f_grid, lo, hi, grid_points, max_depth)
+    finite = np.isfinite(fs)
+    roots: List[IsolatedRoot] = []
+
+    # Grid points that land exactly on a root
+    for i in np.flatnonzero(fs == 0):
+        roots.append(
+            IsolatedRoot(root=xs[i], a=xs[i], b=xs[i], f_root=0, evaluations=0)
+        )
+
+    # Local minima of |f| without a sign change may touch zero (even multiplicity)
+    abs_fs = np.abs(fs)
+    touching = (
+        finite[1:-1]
+        & (fs[1:-1] != 0)
+        & (abs_fs[1:-1] < abs_fs[:-2])
+        & (abs_fs[1:-1] < abs_fs[2:])
+        & (np.sign(fs[:-2]) == np.sign(fs[1:-1]))
+        & (np.sign(fs[2:]) == np.sign(fs[1:-1]))
+    )
+    for i in np.flatnonzero(touching) + 1:
+        a, b = float(xs[i - 1]), float(xs[i + 1])
+        try:
+            result = minimize_scalar(
+                lambda t: abs(f(t)), bounds=(a, b), method="bounded", options={"xatol": tol}
+            )
+        except (ArithmeticError, ValueError):
+            continue
+        if result.fun <= tol:
+            roots.append(
+                IsolatedRoot(
+                    root=result.x, a=a, b=b, f_root=f(result.x), evaluations=result.nfev
+                )
+            )
+
+    brackets = np.flatnonzero(
+        finite[:-1] & finite[1:] & (fs[:-1] != 0) & (fs[1:] != 0) & (np.sign(fs[:-1]) != np.sign(fs[1:]))
+    )
+    for i in brackets:
+        a, b = float(xs[i]), float(xs[i + 1])
+        cached = CachedFunction(f)
+        cached.seed(a, float(fs[i]))
+        cached.seed(b, float(fs[i + 1]))
+        try:
+            root, _ = drain(brent(cached, a, b, tol, REFINE_NITER))
+            f_root = cached(root)
+        except (ArithmeticError, ValueError):
+            continue
+        # A sign change across a pole also brackets, but |f| grows instead of vanishing
+        if abs(f_root) > max(abs(fs[i]), abs(fs[i + 1])):
+            continue
+        roots.append(
+            IsolatedRoot(
+                root=root,
+                a=a,
+                b=b,
+                f_root=f_root,
+                evaluations=cached.evaluations,
+            )
+        )
+
+    roots.sort(key=lambda r: r.root)
+    return RootIsolation(
+        expression=to_latex(expr), roots=roots, scan_evaluations=scan_evaluations
+    )
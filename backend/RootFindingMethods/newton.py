@@ -1,10 +1,12 @@
-from typing import Callable, List, Tuple
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 
 import sympy
 from pydantic import BaseModel, Field
 
 from utils.errors import ErrorType, calculate_error
+from utils.expressions import compile_expression
 from utils.parsing import ExpressionAnnotation, to_latex
+from utils.trace import IterationTrace, TableLayout, drain
 
 class NewtonIteration(BaseModel):
     iteration: int
@@ -19,6 +21,7 @@ class NewtonRoots(BaseModel):
     derivative: str
     root: float
     table: List[NewtonIteration]
+    columns: Optional[Dict[str, list]] = None
 
 
 class NewtonRootsParams(BaseModel):
@@ -28,47 +31,31 @@ class NewtonRootsParams(BaseModel):
     x0: float
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
 
 
-def newton_roots(
+def newton_iterations(
     expr: sympy.Expr, error_type: str, multiple_roots: bool, x0: float, tol: float, niter: int
-) -> NewtonRoots:
+) -> Generator[Dict[str, Any], None, float]:
     """
-    Find a root of a function using the Newton-Raphson method, requires a function to be continuous in the interval [a, b] and f(a) * f(b) < 0.
-
-    Parameters
-    ==========
-
-    expr: A sympy expression representing the function.
-    x0: The initial value.
-    tol: The tolerance of the method.
-    niter: The maximum number of iterations.
+    Run the Newton-Raphson method yielding one row per iteration, returns the root.
+    See newton_roots for the parameters.
     """
 
-    x = sympy.symbols("x")
-    expr_prime = expr.diff(x)
-    expr_prime2 = expr_prime.diff(x, 2)
-    f: Callable[[float], float] = sympy.lambdify(x, expr, "math", docstring_limit=-1)
-    f_prime: Callable[[float], float] = sympy.lambdify(x, expr_prime, "math")
+    compiled = compile_expression(expr)
+    f: Callable[[float], float] = compiled.function("math")
+    f_prime: Callable[[float], float] = compiled.function("math", order=1)
 
     if multiple_roots:
-        f = lambda x: f(x) / f_prime(x)
-        f_prime = sympy.lambdify(x, expr_prime2, "math")
+        f = lambda x, f=f, f_prime=f_prime: f(x) / f_prime(x)
+        f_prime = compiled.function("math", order=3)
 
     x_old = x0
     fx_old = f(x_old)
     fx_prime_old = f_prime(x_old)
     error = 1
     iteration = 1
-    data = [
-        {
-            "iteration": 1,
-            "x": x_old,
-            "f_x": fx_old,
-            "f_prime_x": fx_prime_old,
-            "error": error,
-        }
-    ]
+    yield {"iteration": 1, "x": x_old, "f_x": fx_old, "f_prime_x": fx_prime_old, "error": error}
 
     while error > tol and fx_old != 0 and fx_prime_old != 0 and iteration < niter:
         x_new = x_old - fx_old / fx_prime_old
@@ -80,23 +67,58 @@ def newton_roots(
         fx_prime_old = fx_prime_new
         iteration += 1
 
-        it_data = {
+        yield {
             "iteration": iteration,
             "x": x_new,
             "f_x": fx_new,
             "f_prime_x": fx_prime_new,
             "error": error,
         }
-        data.append(it_data)
 
     if error < tol or fx_old == 0 or fx_prime_old == 0:
-        return NewtonRoots(
-            multiple_roots=multiple_roots,
-            derivative=to_latex(expr_prime),
-            second_derivative=to_latex(expr_prime2),
-            root=x_new,
-            table=data,
-            expression=to_latex((expr/expr_prime) if multiple_roots else expr),
-        )
+        return x_old
 
     raise ValueError(f"Failed after {niter} iterations")
+
+
+def newton_roots(
+    expr: sympy.Expr,
+    error_type: str,
+    multiple_roots: bool,
+    x0: float,
+    tol: float,
+    niter: int,
+    layout: TableLayout = TableLayout.ROWS,
+) -> NewtonRoots:
+    """
+    Find a root of a function using the Newton-Raphson method, requires a function to be continuous in the interval [a, b] and f(a) * f(b) < 0.
+
+    Parameters
+    ==========
+
+    expr: A sympy expression representing the function.
+    x0: The initial value.
+    tol: The tolerance of the method.
+    niter: The maximum number of iterations.
+    layout: Return the iterations table as rows or as columns.
+    """
+
+    compiled = compile_expression(expr)
+    expr_prime = compiled.derivative(1)
+    expr_prime2 = compiled.derivative(3)
+
+    data = IterationTrace(
+        niter, iteration=int, x=float, f_x=float, f_prime_x=float, error=float
+    )
+    root = drain(
+        newton_iterations(expr, error_type, multiple_roots, x0, tol, niter), data
+    )
+
+    return NewtonRoots(
+        multiple_roots=multiple_roots,
+        derivative=to_latex(expr_prime),
+        second_derivative=to_latex(expr_prime2),
+        root=root,
+        expression=to_latex((expr/expr_prime) if multiple_roots else expr),
+        **data.export(layout),
+    )
@@ -1,10 +1,12 @@
-from typing import Callable, List, Tuple
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 
 import sympy
 from pydantic import BaseModel, Field
 
 from utils.errors import ErrorType, calculate_error
+from utils.expressions import compile_expression
 from utils.parsing import ExpressionAnnotation, to_latex
+from utils.trace import IterationTrace, TableLayout, drain
 
 
 class FixedPointParams(BaseModel):
@@ -16,6 +18,7 @@ class FixedPointParams(BaseModel):
     error_type: ErrorType = ErrorType.ABSOLUTE
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
 
 
 class FixedPointIteration(BaseModel):
@@ -30,45 +33,55 @@ class FixedPointRoots(BaseModel):
     g_expr: str
     root: float
     table: List[FixedPointIteration]
+    columns: Optional[Dict[str, list]] = None
 
 
-def fixed_point_roots(
+def fixed_point_iterations(
     f_expr: sympy.Expr,
     g_expr: sympy.Expr,
     x0: float,
     error_type: str,
     tol: float,
     niter: int,
-):
-    x = sympy.symbols("x")
-    f: Callable[[float], float] = sympy.lambdify(x, f_expr, "math", docstring_limit=-1)
-    g: Callable[[float], float] = sympy.lambdify(x, g_expr, "math", docstring_limit=-1)
+) -> Generator[Dict[str, Any], None, float]:
+    f: Callable[[float], float] = compile_expression(f_expr).function("math")
+    g: Callable[[float], float] = compile_expression(g_expr).function("math")
 
-    data: List[FixedPointIteration] = [
-        {"x": x0, "g_x": g(x0), "f_x": f(x0), "error": x0}
-    ]
+    x_last, g_last = x0, g(x0)
+    yield {"x": x0, "g_x": g_last, "f_x": f(x0), "error": x0}
 
     for i in range(niter):
-        xi = g(data[-1]["g_x"])
+        xi = g(g_last)
         g_x = g(xi)
         f_x = f(xi)
-        error = calculate_error(data[-1]["x"], xi, error_type)
+        error = calculate_error(x_last, xi, error_type)
 
-        data.append(
-            {
-                "x": data[-1]["g_x"],
-                "g_x": g_x,
-                "f_x": f_x,
-                "error": error,
-            }
-        )
+        x_last, g_last = g_last, g_x
+        yield {"x": x_last, "g_x": g_x, "f_x": f_x, "error": error}
 
         if error < tol:
-            return FixedPointRoots(
-                f_expr=to_latex(f_expr),
-                g_expr=to_latex(g_expr),
-                root=data[-1]["x"],
-                table=data,
-            )
+            return x_last
 
     raise ValueError(f"Method failed after {niter} iterations")
+
+
+def fixed_point_roots(
+    f_expr: sympy.Expr,
+    g_expr: sympy.Expr,
+    x0: float,
+    error_type: str,
+    tol: float,
+    niter: int,
+    layout: TableLayout = TableLayout.ROWS,
+):
+    data = IterationTrace(niter + 1, x=float, g_x=float, f_x=float, error=float)
+    root = drain(
+        fixed_point_iterations(f_expr, g_expr, x0, error_type, tol, niter), data
+    )
+
+    return FixedPointRoots(
+        f_expr=to_latex(f_expr),
+        g_expr=to_latex(g_expr),
+        root=root,
+        **data.export(layout),
+    )
@@ -1,10 +1,17 @@
-from typing import Callable, List, Tuple
+from typing import Any, Dict, Generator, List, Optional
 
 import sympy
 from pydantic import BaseModel, Field
 
-from utils.errors import ErrorType, calculate_error
+from RootFindingMethods.bracketing import CachedFunction, illinois, new_bracketing_trace
+from utils.errors import ErrorType
+from utils.expressions import compile_expression
 from utils.parsing import ExpressionAnnotation, to_latex
+from utils.trace import TableLayout, drain
+
+
+# Columns of the bracketing engine trace, as named in the false rule table
+NAMES = {"a": "xl", "x": "xm", "b": "xu", "f_x": "f_x", "error": "error"}
 
 
 class FalseRuleParams(BaseModel):
@@ -14,6 +21,8 @@ class FalseRuleParams(BaseModel):
     error_type: ErrorType = ErrorType.ABSOLUTE
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    max_evaluations: Optional[int] = Field(None, gt=1, le=100000)
+    layout: TableLayout = TableLayout.ROWS
 
 
 class FalseRuleIteration(BaseModel):
@@ -27,13 +36,25 @@ class FalseRuleIteration(BaseModel):
 class FalseRuleRoots(BaseModel):
     f_expr: str
     root: float
+    evaluations: int
     table: List[FalseRuleIteration]
+    columns: Optional[Dict[str, list]] = None
 
 
 def ReglaFalsa(
-    f_expr: sympy.Expr, xl: float, xu: float, tol: float, niter: int, err: str
+    f_expr: sympy.Expr,
+    xl: float,
+    xu: float,
+    tol: float,
+    niter: int,
+    err: str,
+    max_evaluations: Optional[int] = None,
+    layout: TableLayout = TableLayout.ROWS,
 ):
     """
+    False position method, run on the Illinois-modified engine of
+    RootFindingMethods.bracketing so each value of f is computed once.
+
     INPUT ARGS:
 
     f: Python Function with a single input argument
@@ -42,42 +63,41 @@ def ReglaFalsa(
     tol: Error tolerance for the method
     niter: Max number of iterations
     err: Type of error processing, 0 = absolute, 1 = relative
+    max_evaluations: Max number of function evaluations, unlimited if None
+    layout: Return the iterations table as rows or as columns
+    """
+
+    f = CachedFunction(compile_expression(f_expr).function("math"), max_evaluations)
+    trace = new_bracketing_trace(niter)
+    root, _ = drain(illinois(f, xl, xu, tol, niter, err), trace)
+
+    return FalseRuleRoots(
+        f_expr=to_latex(f_expr),
+        root=root,
+        evaluations=f.evaluations,
+        **trace.export(layout, names=NAMES),
+    )
+
+
+def regla_falsa_iterations(
+    f_expr: sympy.Expr,
+    xl: float,
+    xu: float,
+    tol: float,
+    niter: int,
+    err: str,
+    max_evaluations: Optional[int] = None,
+) -> Generator[Dict[str, Any], None, float]:
+    """
+    Same as ReglaFalsa, but yields one row per iteration and returns the root.
     """
 
-    x = sympy.symbols("x")
-    f: Callable[[float], float] = sympy.lambdify(x, f_expr, "math", docstring_limit=-1)
-
-    if f(xl) * f(xu) > 0:
-        raise ValueError(f"There is no root in the interval [{xl},{xu}]")
-
-    result: List[FalseRuleIteration] = [
-        {
-            "xl": xl,
-            "xm": xu - f(xu) * ((xu - xl) / (f(xu) - f(xl))),
-            "xu": xu,
-            "f_x": f(xu - f(xu) * ((xu - xl) / (f(xu) - f(xl)))),
-            "error": xu,
-        }
-    ]
-    for i in range(0, niter):
-        if f(result[i]["xm"]) * f(result[i]["xl"]) > 0:
-            xl = result[i]["xm"]
-
-        elif f(result[i]["xm"]) * f(result[i]["xu"]) > 0:
-            xu = result[i]["xm"]
-        result.append(
-            {
-                "xl": xl,
-                "xm": xu - f(xu) * ((xu - xl) / (f(xu) - f(xl))),
-                "xu": xu,
-                "f_x": f(xu - f(xu) * ((xu - xl) / (f(xu) - f(xl)))),
-                "error": calculate_error(
-                    result[i]["xm"], xu - f(xu) * ((xu - xl) / (f(xu) - f(xl))), err
-                ),
-            }
-        )
-        if result[i]["error"] < tol:
-            return FalseRuleRoots(
-                f_expr=to_latex(f_expr), root=result[i]["xm"], table=result
-            )
-    raise ValueError(f"Method failed after {niter} iterations")
+    f = CachedFunction(compile_expression(f_expr).function("math"), max_evaluations)
+    rows = illinois(f, xl, xu, tol, niter, err)
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration as stop:
+            root, _ = stop.value
+            return root
+        yield {key: row[name] for name, key in NAMES.items()}
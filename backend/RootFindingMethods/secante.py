@@ -1,10 +1,12 @@
-from typing import Callable, List, Tuple
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple
 
 import sympy
 from pydantic import BaseModel, Field
 
 from utils.errors import ErrorType, calculate_error
+from utils.expressions import compile_expression
 from utils.parsing import ExpressionAnnotation, to_latex
+from utils.trace import IterationTrace, TableLayout, drain
 
 
 class SecanteParams(BaseModel):
@@ -14,6 +16,7 @@ class SecanteParams(BaseModel):
     error_type: ErrorType = ErrorType.ABSOLUTE
     tol: float = Field(..., gt=1e-21, le=1)
     niter: int = Field(..., gt=0, le=100)
+    layout: TableLayout = TableLayout.ROWS
 
 
 class SecanteIteration(BaseModel):
@@ -26,9 +29,18 @@ class SecanteRoots(BaseModel):
     f_expr: str
     root: float
     table: List[SecanteIteration]
+    columns: Optional[Dict[str, list]] = None
 
 
-def Secante(f_expr: sympy.Expr, x0: float, x1: float, niter: int, tol: float, err: str):
+def Secante(
+    f_expr: sympy.Expr,
+    x0: float,
+    x1: float,
+    niter: int,
+    tol: float,
+    err: str,
+    layout: TableLayout = TableLayout.ROWS,
+):
     """
     INPUT ARGS:
 
@@ -38,31 +50,32 @@ def Secante(f_expr: sympy.Expr, x0: float, x1: float, niter: int, tol: float, er
     tol: Error tolerance for the method
     niter: Max number of iterations
     err: Type of error processing, 0 = absolute, 1 = relative
+    layout: Return the iterations table as rows or as columns
     """
-    x = sympy.symbols("x")
-    f: Callable[[float], float] = sympy.lambdify(x, f_expr, "math", docstring_limit=-1)
+    result = IterationTrace(niter + 2, xi=float, f_x=float, error=float)
+    root = drain(secante_iterations(f_expr, x0, x1, niter, tol, err), result)
+    return SecanteRoots(f_expr=to_latex(f_expr), root=root, **result.export(layout))
 
-    result: List[SecanteIteration] = [
-        {"xi": x0, "f_x": f(x0), "error": x0},
-        {"xi": x1, "f_x": f(x1), "error": calculate_error(x0, x1, err)},
-    ]
-    print(result)
+
+def secante_iterations(
+    f_expr: sympy.Expr, x0: float, x1: float, niter: int, tol: float, err: str
+) -> Generator[Dict[str, Any], None, float]:
+    """
+    Run the secant method yielding one row per iteration, returns the root.
+    """
+    f: Callable[[float], float] = compile_expression(f_expr).function("math")
+
+    x_prev, f_prev = x0, f(x0)
+    x_cur, f_cur = x1, f(x1)
+    yield {"xi": x_prev, "f_x": f_prev, "error": x0}
+    yield {"xi": x_cur, "f_x": f_cur, "error": calculate_error(x0, x1, err)}
     for i in range(0, niter):
-        print("nepe")
-        xi = result[i + 1]["xi"] - (
-            (result[i + 1]["f_x"] * (result[i + 1]["xi"] - result[i]["xi"]))
-            / (result[i + 1]["f_x"] - result[i]["f_x"])
-        )
+        xi = x_cur - ((f_cur * (x_cur - x_prev)) / (f_cur - f_prev))
         fi = f(xi)
-        result.append(
-            {
-                "xi": xi,
-                "f_x": fi,
-                "error": calculate_error(result[i + 1]["xi"], xi, err),
-            }
-        )
-        if result[-1]["error"] < tol:
-            return SecanteRoots(
-                f_expr=to_latex(f_expr), root=result[-1]["xi"], table=result
-            )
+        error = calculate_error(x_cur, xi, err)
+        yield {"xi": xi, "f_x": fi, "error": error}
+        x_prev, f_prev = x_cur, f_cur
+        x_cur, f_cur = xi, fi
+        if error < tol:
+            return xi
     raise ValueError(f"Method failed after {niter} iterations")
@@ -1,23 +1,96 @@
-from typing import Any
-from pydantic import BaseModel
-
+from enum import Enum
+from typing import List
 
+import numpy as np
 import sympy
+from pydantic import BaseModel, Field
 
+from RootFindingMethods.isolation import isolate_roots
+from utils.config import SYMBOLIC_TIMEOUT
+from utils.executor import TaskTimeout, WorkerDied, pool
+from utils.expressions import x
 from utils.parsing import ExpressionAnnotation, to_latex
 
 
+class SolveMethod(str, Enum):
+    SYMBOLIC = "symbolic"
+    POLYNOMIAL = "polynomial"
+    SCAN = "scan"
+
+
 class SymbolicRoots(BaseModel):
     expression: str
     roots: str
+    method: SolveMethod = SolveMethod.SYMBOLIC
 
 
 class SymbolicRootsParams(BaseModel):
     expression: ExpressionAnnotation
+    timeout: float = Field(SYMBOLIC_TIMEOUT, gt=0, le=60)
+    lo: float = -10
+    hi: float = 10
+    tol: float = Field(1e-10, gt=1e-21, le=1)
+
+
+def _solve(expr: sympy.Expr) -> List[sympy.Expr]:
+    return sympy.solve(expr, x)
+
 
+def numeric_roots(expr: sympy.Expr, lo: float, hi: float, tol: float) -> SymbolicRoots:
+    """
+    Approximate the roots of a function without sympy.solve: all the complex roots
+    of a polynomial as the eigenvalues of its companion matrix, otherwise the real
+    roots found in [lo, hi] by a grid scan.
+    """
 
-def symbolic_roots(expr: sympy.Expr) -> SymbolicRoots:
-    x = sympy.Symbol("x")
+    evaluated = expr.doit()
+    if evaluated.is_polynomial(x):
+        coefficients = [float(c) for c in sympy.Poly(evaluated, x).all_coeffs()]
+        roots = []
+        for root in np.roots(coefficients):
+            if abs(root.imag) <= tol * max(1, abs(root)):
+                roots.append(sympy.Float(root.real))
+            else:
+                roots.append(sympy.Float(root.real) + sympy.Float(root.imag) * sympy.I)
+        roots.sort(key=lambda r: (sympy.re(r), sympy.im(r)))
+        return SymbolicRoots(
+            expression=to_latex(expr), roots=to_latex(roots), method=SolveMethod.POLYNOMIAL
+        )
+
+    isolation = isolate_roots(expr, lo, hi, tol, grid_points=1000, max_depth=8)
+    roots = [sympy.Float(r.root) for r in isolation.roots]
     return SymbolicRoots(
-        expression=to_latex(expr), roots=to_latex(sympy.solve(expr, x))
+        expression=to_latex(expr), roots=to_latex(roots), method=SolveMethod.SCAN
     )
+
+
+def symbolic_roots(
+    expr: sympy.Expr,
+    timeout: float = SYMBOLIC_TIMEOUT,
+    lo: float = -10,
+    hi: float = 10,
+    tol: float = 1e-10,
+) -> SymbolicRoots:
+    """
+    Solve f(x) = 0 with sympy.solve in a pool worker, which is killed if it does not
+    finish within timeout. The roots are then approximated numerically instead, as
+    they are when sympy has no algorithm for the equation,
+    see numeric_roots.
+
+    Parameters
+    ==========
+
+    expr: A sympy expression representing the function.
+    timeout: The deadline of the symbolic solver, in seconds.
+    lo: The left bound of the interval scanned by the numeric fallback.
+    hi: The right bound of the interval scanned by the numeric fallback.
+    tol: The tolerance of the numeric fallback.
+    """
+
+    try:
+        roots = pool.run(_solve, expr, timeout=timeout)
+        return SymbolicRoots(
+            expression=to_latex(expr), roots=to_latex(roots), method=SolveMethod.SYMBOLIC
+        )
+    except (TaskTimeout, WorkerDied, NotImplementedError):
+        return pool.run(numeric_roots, expr, lo, hi, tol)
@@ -0,0 +1,98 @@
+"""
+Time the parallel block-Jacobi solver on a 2D Poisson matrix with 1 to N worker
+processes, N being the number of cores unless given. Every configuration shows
+the time per sweep and the end-to-end time of a whole solve, which adds the
+shared memory set-up and the factorization of the blocks. The workers are
+started once, like in the server, and their start-up is reported apart.
+
+Run from the backend directory:
+
+    python -m benchmarks.parallel_jacobi_benchmark [N]
+"""
+
+import os
+import sys
+import time
+from typing import Dict
+
+import numpy as np
+
+from LinearSystemsMethods.matrices import Matrix
+from LinearSystemsMethods.parallel import (BlockSolver, BlockWorkers, parallel_block_jacobi,
+                                           partition_rows)
+from benchmarks.sor_benchmark import poisson
+from utils.trace import drain
+
+GRID_SIZE = 256
+SWEEPS = 50
+OVERLAP = 8
+
+
+def time_solve(
+    team: BlockWorkers, A: Matrix, b: np.ndarray, workers: int, solver: BlockSolver, overlap: int
+) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    # tol = 0 runs every sweep, so all the worker counts do the same work
+    drain(
+        parallel_block_jacobi(
+            team,
+            A,
+            b,
+            np.zeros_like(b),
+            0,
+            SWEEPS,
+            partition_rows(A, workers),
+            solver,
+            overlap,
+            timings,
+        )
+    )
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    return timings
+
+
+def main() -> None:
+    cores = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    A = poisson(GRID_SIZE)
+    b = np.ones(A.shape[0])
+
+    team = BlockWorkers(cores)
+    start = time.perf_counter()
+    team.start()
+    # The first solve waits for the workers to finish their warm-up
+    time_solve(team, A, b, 1, BlockSolver.POINT, 0)
+    print(f"{cores} workers started in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    configurations = [
+        ("point", BlockSolver.POINT, 0),
+        ("exact", BlockSolver.EXACT, 0),
+        (f"exact, overlap {OVERLAP}", BlockSolver.EXACT, OVERLAP),
+    ]
+    print(
+        f"n = {A.shape[0]}, {SWEEPS} sweeps, ms per sweep / ms per solve"
+        " (speedup over 1 worker)"
+    )
+    header = ["workers"] + [name for name, _, _ in configurations]
+    print(" | ".join(f"{h:>32}" for h in header))
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    try:
+        for workers in range(1, cores + 1):
+            row = [f"{workers:>32}"]
+            for name, solver, overlap in configurations:
+                timings = time_solve(team, A, b, workers, solver, overlap)
+                sweep, total = timings["solve_ms"] / SWEEPS, timings["total_ms"]
+                first = baseline.setdefault(name, {"sweep": sweep, "total": total})
+                cell = (
+                    f"{sweep:.3f} ({first['sweep'] / sweep:.2f}x) / "
+                    f"{total:.1f} ({first['total'] / total:.2f}x)"
+                )
+                row.append(cell.rjust(32))
+            print(" | ".join(row))
+    finally:
+        team.shutdown()
+
+
+if __name__ == "__main__":
+    main()
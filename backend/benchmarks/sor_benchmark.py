@@ -0,0 +1,86 @@
+"""
+Time the SOR kernels against the original per-row loop on 2D Poisson matrices.
+
+Run from the backend directory:
+
+    python -m benchmarks.sor_benchmark
+"""
+
+import time
+from typing import Callable, Dict
+
+import numpy as np
+import scipy.sparse as sp
+
+from LinearSystemsMethods.kernels import HAS_NUMBA
+from LinearSystemsMethods.splitting import (Sweep, compiled_sor_sweep, multicolor_ordering,
+                               multicolor_sor_sweep, sor_sweep)
+
+GRID_SIZES = [8, 16, 32, 64, 128]
+# The dense kernels, including the original loop, are skipped past this many unknowns
+DENSE_MAX_UNKNOWNS = 4096
+SWEEPS = 20
+W = 1.5
+
+
+def poisson(m: int) -> sp.csr_matrix:
+    identity = sp.identity(m)
+    second_difference = sp.diags([-1.0, 2.0, -1.0], [-1, 0, 1], shape=(m, m))
+    return (sp.kron(identity, second_difference) + sp.kron(second_difference, identity)).tocsr()
+
+
+def loop_sweep(A: np.ndarray, b: np.ndarray, w: float) -> Sweep:
+    # The sweep sor_method used before the vectorized kernels
+    def sweep(xP: np.ndarray) -> np.ndarray:
+        xA = np.zeros_like(xP)
+        for i in range(A.shape[0]):
+            s1 = np.dot(A[i, :i], xA[:i])
+            s2 = np.dot(A[i, i + 1 :], xP[i + 1 :])
+            xA[i] = (b[i] - s1 - s2) / A[i, i] * w + (1 - w) * xP[i]
+        return xA
+
+    return sweep
+
+
+def time_sweep(sweep: Sweep, n: int) -> float:
+    x = np.zeros(n)
+    x = sweep(x)  # Warm up, e.g. the numba compilation
+    start = time.perf_counter()
+    for _ in range(SWEEPS):
+        x = sweep(x)
+    return (time.perf_counter() - start) / SWEEPS * 1000
+
+
+def main() -> None:
+    kernels: Dict[str, Callable[[sp.csr_matrix, np.ndarray], Sweep]] = {
+        "triangular (dense)": lambda A, b: sor_sweep(A.toarray(), b, W),
+        "triangular (csr)": lambda A, b: sor_sweep(A, b, W),
+        "multicolor (csr)": lambda A, b: multicolor_sor_sweep(A, b, W, multicolor_ordering(A)),
+    }
+    if HAS_NUMBA:
+        kernels["compiled (csr)"] = lambda A, b: compiled_sor_sweep(A, b, W)
+
+    print(f"ms per SOR sweep, w = {W}, mean of {SWEEPS} sweeps")
+    header = ["n", "original loop"] + list(kernels)
+    print(" | ".join(f"{h:>18}" for h in header))
+
+    for m in GRID_SIZES:
+        A = poisson(m)
+        n = A.shape[0]
+        b = np.ones(n)
+
+        dense = n <= DENSE_MAX_UNKNOWNS
+        loop_ms = time_sweep(loop_sweep(A.toarray(), b, W), n) if dense else None
+        row = [f"{n:>18}", f"{loop_ms:>18.3f}" if dense else f"{'-':>18}"]
+        for name, build in kernels.items():
+            if "dense" in name and not dense:
+                row.append(f"{'-':>18}")
+                continue
+            ms = time_sweep(build(A, b), n)
+            speedup = f" ({loop_ms / ms:.0f}x)" if loop_ms is not None else ""
+            row.append(f"{ms:.3f}{speedup}".rjust(18))
+        print(" | ".join(row))
+
+
+if __name__ == "__main__":
+    main()
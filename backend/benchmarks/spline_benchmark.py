@@ -0,0 +1,80 @@
+"""
+Time the spline builders, and measure the memory they allocate, against the
+dense system the original implementation assembled and inverted.
+
+Run from the backend directory:
+
+    python -m benchmarks.spline_benchmark
+"""
+
+import time
+import tracemalloc
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+from InterpolationMethods.spline import (banded_spline_pieces, cubic_spline_pieces,
+                                         linear_spline_pieces, quadratic_spline_pieces,
+                                         spline_system)
+
+SIZES = [100, 1000, 10_000, 100_000]
+# The dense inverse is skipped past this many points
+DENSE_MAX_POINTS = 1000
+DEGREES = {"linear": 1, "quadratic": 2, "cubic": 3}
+
+Builder = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+
+def dense_inverse(d: int) -> Builder:
+    # The original approach: the whole system as a dense matrix, inverted
+    def build(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        A, rhs = spline_system(x, y, d)
+        return np.linalg.inv(A.toarray()).dot(rhs)
+
+    return build
+
+
+def measure(build: Builder, x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+    """
+    The time in ms and the peak memory allocated in MB of one call.
+    """
+
+    build(x, y)  # Warm up, e.g. the numba compilation of the Thomas algorithm
+    tracemalloc.start()
+    start = time.perf_counter()
+    build(x, y)
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main() -> None:
+    builders: Dict[str, Dict[str, Builder]] = {
+        "linear": {"closed form": linear_spline_pieces},
+        "quadratic": {"recurrence": quadratic_spline_pieces},
+        "cubic": {"moments": cubic_spline_pieces},
+    }
+    for name, d in DEGREES.items():
+        builders[name]["banded system"] = lambda x, y, d=d: banded_spline_pieces(x, y, d)
+        builders[name]["dense inverse"] = dense_inverse(d)
+
+    print("ms per construction / peak MB allocated")
+    for name, methods in builders.items():
+        print(f"\n{name}")
+        print(" | ".join(f"{h:>22}" for h in ["points"] + list(methods)))
+        for n in SIZES:
+            x = np.linspace(0, 1, n)
+            y = np.sin(8 * x)
+            row = [f"{n:>22}"]
+            for method, build in methods.items():
+                if method == "dense inverse" and n > DENSE_MAX_POINTS:
+                    row.append(f"{'-':>22}")
+                    continue
+                ms, mb = measure(build, x, y)
+                row.append(f"{ms:.2f} / {mb:.2f}".rjust(22))
+            print(" | ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from routers import interpolation, roots, system_of_equations, comparison, root_comparison, interpolation_comparison
+from routers import (interpolation, roots, system_of_equations, comparison, root_comparison,
+                     interpolation_comparison, cache)
+from LinearSystemsMethods.parallel import block_workers
+from utils.executor import pool
 
 app = FastAPI()
 app.add_middleware(
@@ -18,5 +21,18 @@ app.include_router(system_of_equations.router)
 app.include_router(comparison.router)
 app.include_router(root_comparison.router)
 app.include_router(interpolation_comparison.router)
+app.include_router(cache.router)
+
+
+@app.on_event("startup")
+def start_pool():
+    pool.start()
+    block_workers.start()
+
+
+@app.on_event("shutdown")
+def stop_pool():
+    pool.shutdown()
+    block_workers.shutdown()
 
 #C:\Users\sarii\AppData\Roaming\Python\Python313\Scripts\uvicorn main:app --reload
\ No newline at end of file
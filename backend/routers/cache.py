@@ -0,0 +1,18 @@
+from typing import Dict
+
+from fastapi import APIRouter
+
+from utils.cache import CACHES, CacheStats
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["cache"],
+)
+
+
+@router.get(
+    "/stats",
+    response_model=Dict[str, CacheStats],
+)
+def get_cache_stats() -> Dict[str, CacheStats]:
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -1,11 +1,16 @@
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Type, TypeVar
 import time
+from LinearSystemsMethods.direct import direct_method, DirectParams
 from LinearSystemsMethods.gauss_seidel import gauss_seidel_method, GaussSeidelParams
 from LinearSystemsMethods.jacobi import jacobi_method, JacobiParams
-from LinearSystemsMethods.sor import sor_method, SORParams
+from LinearSystemsMethods.krylov import (GMRESParams, KrylovParams, bicgstab_method, cg_method,
+                            gmres_method)
+from LinearSystemsMethods.matrices import SystemMatrix
+from LinearSystemsMethods.operators import resolve_matrix
+from LinearSystemsMethods.sor import RelaxationFactor, sor_method, SORParams
 
 router = APIRouter(
     prefix="/comparison",
@@ -19,28 +24,36 @@ responses = {
 }
 
 
-class ComparacionEntrada(BaseModel):
-    matrix_a: List[List[float]]
+class ComparacionEntrada(SystemMatrix):
     vector_b: List[float]
     x0: List[float]
     tol: float
     niter: int
-    relaxation_factor: float = 1.1
+    relaxation_factor: RelaxationFactor = "auto"
 
 class ComparacionResultado(BaseModel):
     metodo: str
     iteraciones: int
     error_final: float
-    radio_espectral: float
+    radio_espectral: Optional[float] = None
     converge: bool
     tiempo_ms: float
 
+P = TypeVar("P", bound=SystemMatrix)
+
+def method_params(Params: Type[P], data: ComparacionEntrada) -> P:
+    # The matrix was already converted by resolve_matrix, every method reuses it
+    # and its cached operators instead of validating matrix_a again
+    params = Params(**data.dict(exclude={"matrix_a"}))
+    return params.model_copy(update={"matrix_a": data.matrix_a})
+
 def comparisonLSM(data: ComparacionEntrada):
     resultados = []
+    data = resolve_matrix(data)
 
     # Gauss-Seidel
     start = time.time()
-    gs_result = gauss_seidel_method(GaussSeidelParams(**data.dict()))
+    gs_result = gauss_seidel_method(method_params(GaussSeidelParams, data))
     tiempo = (time.time() - start) * 1000
     resultados.append(ComparacionResultado(
         metodo="Gauss-Seidel",
@@ -53,7 +66,7 @@ def comparisonLSM(data: ComparacionEntrada):
 
     # Jacobi
     start = time.time()
-    jacobi_result = jacobi_method(JacobiParams(**data.dict()))
+    jacobi_result = jacobi_method(method_params(JacobiParams, data))
     tiempo = (time.time() - start) * 1000
     resultados.append(ComparacionResultado(
         metodo="Jacobi",
@@ -66,17 +79,10 @@ def comparisonLSM(data: ComparacionEntrada):
 
     # SOR
     start = time.time()
-    sor_result = sor_method(SORParams(
-        matrix_a=data.matrix_a,
-        vector_b=data.vector_b,
-        x0=data.x0,
-        tol=data.tol,
-        niter=data.niter,
-        relaxation_factor=data.relaxation_factor
-    ))
+    sor_result = sor_method(method_params(SORParams, data))
     tiempo = (time.time() - start) * 1000
     resultados.append(ComparacionResultado(
-        metodo=f"SOR (ω={data.relaxation_factor})",
+        metodo=f"SOR (ω={sor_result.relaxation_factor:.4g})",
         iteraciones=len(sor_result.iterations),
         error_final=sor_result.iterations[-1].error,
         radio_espectral=sor_result.spectral_radius,
@@ -84,6 +90,47 @@ def comparisonLSM(data: ComparacionEntrada):
         tiempo_ms=tiempo
     ))
 
+    # Métodos de Krylov, sin radio espectral y con el residuo como error final
+    krylov = [
+        ("Gradiente conjugado", cg_method, KrylovParams),
+        ("BiCGSTAB", bicgstab_method, KrylovParams),
+        ("GMRES", gmres_method, GMRESParams),
+    ]
+    for metodo, method, Params in krylov:
+        krylov_params = method_params(Params, data)
+        start = time.time()
+        try:
+            krylov_result = method(krylov_params)
+        except ValueError:
+            # Conjugate gradient on a matrix that is not SPD, or a breakdown
+            continue
+        tiempo = (time.time() - start) * 1000
+        resultados.append(ComparacionResultado(
+            metodo=metodo,
+            iteraciones=len(krylov_result.iterations),
+            error_final=krylov_result.residual,
+            converge=krylov_result.converges,
+            tiempo_ms=tiempo
+        ))
+
+    # Método directo, la referencia contra la que se comparan los iterativos
+    direct_params = method_params(DirectParams, data)
+    start = time.time()
+    try:
+        direct_result = direct_method(direct_params)
+    except ValueError:
+        # Singular matrix
+        direct_result = None
+    tiempo = (time.time() - start) * 1000
+    if direct_result is not None:
+        resultados.append(ComparacionResultado(
+            metodo=f"Directo ({direct_result.path.value})",
+            iteraciones=1,
+            error_final=direct_result.residual,
+            converge=True,
+            tiempo_ms=tiempo
+        ))
+
     return resultados
 
 
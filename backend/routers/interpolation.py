@@ -1,13 +1,25 @@
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Tuple, Type, Union
 
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+import numpy as np
+from fastapi import APIRouter, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, ValidationError
 
+from InterpolationMethods.evaluation import (DerivativeParams, EvaluateParams, Evaluation,
+                                             Integral, IntegralParams, InterpolantHandle,
+                                             InterpolantKind, InterpolantParams, NodesParams,
+                                             add_nodes, check_points,
+                                             differentiate_interpolant, evaluate_interpolant,
+                                             fit_interpolant, integrate_interpolant,
+                                             interpolant_cache, interpolant_handle,
+                                             interpolant_id, interpolant_source, read_points)
 from InterpolationMethods.lagrange import Lagrange, LagranInt, LagranParams
 from InterpolationMethods.newton_int import NewtonInt, NewtonInterpol, NewtonParams
 from InterpolationMethods.spline import Spline, SplineParams, get_spline
 from InterpolationMethods.vandermonde import VanderInt, Vandermonde, VanderParams
+from utils.executor import PoolError, pool
 
 router = APIRouter(
     prefix="/interpolation",
@@ -25,6 +37,14 @@ responses = {
         "description": "Cannot find roots with the given parameters",
         "model": MethodError,
     },
+    503: {
+        "description": "The server is busy",
+        "model": MethodError,
+    },
+    504: {
+        "description": "The method took too long",
+        "model": MethodError,
+    },
 }
 
 
@@ -43,8 +63,24 @@ def get_splines(
 ) -> Union[Spline, JSONResponse]:
     try:
         print(params)
-        solution = get_spline(params.x, params.y, params.d)
+        solution = pool.run(
+            get_spline, params.x, params.y, params.d, params.boundary, params.end_slopes
+        )
+        if params.store:
+            fit = InterpolantParams(
+                method=InterpolantKind.SPLINE,
+                **params.model_dump(include={"x", "y", "d", "boundary", "end_slopes"}),
+            )
+            solution.interpolant_id = _store(fit).interpolant_id
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -70,8 +106,16 @@ def get_vandermonde(
 ) -> Union[VanderInt, JSONResponse]:
     try:
         print(params)
-        solution = Vandermonde(params.x, params.y)
+        solution = pool.run(Vandermonde, params.x, params.y)
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -97,8 +141,16 @@ def get_lagrange(
 ) -> Union[LagranInt, JSONResponse]:
     try:
         print(params)
-        solution = Lagrange(params.x, params.y)
+        solution = pool.run(Lagrange, params.x, params.y, params.symbolic)
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -124,8 +176,19 @@ def get_newton_interpolation(
 ) -> Union[NewtonInt, JSONResponse]:
     try:
         print(params)
-        solution = NewtonInterpol(params.x, params.y)
+        solution = pool.run(NewtonInterpol, params.x, params.y)
+        if params.store:
+            fit = InterpolantParams(method=InterpolantKind.NEWTON, x=params.x, y=params.y)
+            solution.interpolant_id = _store(fit).interpolant_id
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -134,3 +197,234 @@ def get_newton_interpolation(
                 "error": str(e),
             },
         )
+
+
+BINARY = "application/octet-stream"
+
+
+def _inline_schema(schema: Any, definitions: Dict[str, Any]) -> Any:
+    # The raw request body gets no component schemas, so nested models are inlined
+    if isinstance(schema, dict):
+        if "$ref" in schema:
+            return _inline_schema(definitions[schema["$ref"].split("/")[-1]], definitions)
+        return {k: _inline_schema(v, definitions) for k, v in schema.items() if k != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_schema(item, definitions) for item in schema]
+    return schema
+
+
+def _request_body(model: Type[BaseModel]) -> Dict[str, Any]:
+    schema = model.model_json_schema()
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": _inline_schema(schema, schema.get("$defs", {}))
+                },
+                BINARY: {"schema": {"type": "string", "format": "binary"}},
+            },
+        }
+    }
+
+
+def _error(e: Exception, detail: str) -> JSONResponse:
+    if isinstance(e, PoolError):
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    return JSONResponse(
+        status_code=409,
+        content={
+            "detail": detail,
+            "error": str(e),
+        },
+    )
+
+
+def _store(params: InterpolantParams) -> InterpolantHandle:
+    # The same nodes always give the same id, so they are only fitted once
+    key = interpolant_id(params)
+    fitted = interpolant_cache.get(key)
+    if fitted is None:
+        fitted = pool.run(fit_interpolant, params)
+        interpolant_cache.put(key, fitted)
+    return interpolant_handle(key, params, fitted)
+
+
+async def _points_request(
+    request: Request, model: Type[EvaluateParams], query: Dict[str, Any]
+) -> Tuple[EvaluateParams, np.ndarray]:
+    # A JSON body, or float64 points with the rest of the request in the query
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith(BINARY):
+        interpolant = query.pop("interpolant")
+        if interpolant is not None:
+            query["interpolant"] = InterpolantParams.model_validate_json(interpolant)
+        data = model.model_validate({k: v for k, v in query.items() if v is not None})
+        return data, read_points(body)
+    data = model.model_validate_json(body)
+    return data, check_points(np.array(data.points, dtype=float))
+
+
+def _values_response(request: Request, values: np.ndarray) -> Union[Evaluation, Response]:
+    if BINARY in request.headers.get("accept", ""):
+        return Response(values.astype("<f8").tobytes(), media_type=BINARY)
+    return Evaluation(values=values.tolist())
+
+
+@router.post(
+    "/interpolants",
+    response_model=InterpolantHandle,
+    responses={
+        200: {
+            "model": InterpolantHandle,
+        },
+        **responses,
+    },
+)
+def store_interpolant(
+    params: InterpolantParams,
+) -> Union[InterpolantHandle, JSONResponse]:
+    """
+    Fit an interpolant and keep it on the server. Its interpolant_id can then
+    replace the interpolant in /evaluate, /derivative and /integral until it
+    goes unused for INTERPOLANT_CACHE_TTL seconds or is evicted.
+    """
+    try:
+        return _store(params)
+    except Exception as e:
+        return _error(e, "Cannot fit the interpolant")
+
+
+@router.post(
+    "/interpolants/{interpolant_id}/nodes",
+    response_model=InterpolantHandle,
+    responses={
+        200: {
+            "model": InterpolantHandle,
+        },
+        **responses,
+    },
+)
+def add_interpolant_nodes(
+    interpolant_id: str,
+    nodes: NodesParams,
+) -> Union[InterpolantHandle, JSONResponse]:
+    """
+    Add nodes to a stored Lagrange interpolant, which returns the
+    interpolant_id of the polynomial through all the nodes.
+    """
+    try:
+        return add_nodes(interpolant_id, nodes)
+    except Exception as e:
+        return _error(e, "Cannot add the nodes")
+
+
+@router.post(
+    "/evaluate",
+    response_model=Evaluation,
+    responses={
+        200: {
+            "model": Evaluation,
+            "content": {BINARY: {}},
+        },
+        **responses,
+    },
+    openapi_extra=_request_body(EvaluateParams),
+)
+async def evaluate(
+    request: Request,
+    interpolant: Optional[str] = None,
+    interpolant_id: Optional[str] = None,
+) -> Union[Evaluation, Response, JSONResponse]:
+    """
+    Evaluate an interpolant at many points. Send a JSON body with the
+    interpolant, or its interpolant_id, and the points, or a binary body of
+    little-endian float64 points with the interpolant as JSON in the
+    interpolant query parameter, or its interpolant_id. The values come back
+    as JSON, or as float64 bytes when the request accepts
+    application/octet-stream.
+    """
+    query = {"interpolant": interpolant, "interpolant_id": interpolant_id}
+    try:
+        data, points = await _points_request(request, EvaluateParams, query)
+        source = interpolant_source(data)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError as e:
+        return _error(e, "Cannot evaluate the interpolant")
+
+    try:
+        values = await run_in_threadpool(pool.run, evaluate_interpolant, source, points)
+        return _values_response(request, values)
+    except Exception as e:
+        return _error(e, "Cannot evaluate the interpolant")
+
+
+@router.post(
+    "/derivative",
+    response_model=Evaluation,
+    responses={
+        200: {
+            "model": Evaluation,
+            "content": {BINARY: {}},
+        },
+        **responses,
+    },
+    openapi_extra=_request_body(DerivativeParams),
+)
+async def derivative(
+    request: Request,
+    interpolant: Optional[str] = None,
+    interpolant_id: Optional[str] = None,
+    order: Optional[int] = None,
+) -> Union[Evaluation, Response, JSONResponse]:
+    """
+    Evaluate a derivative of an interpolant at many points, sent like in
+    /evaluate with the order of the derivative in the body or, for a binary
+    body, in the order query parameter.
+    """
+    query = {"interpolant": interpolant, "interpolant_id": interpolant_id, "order": order}
+    try:
+        data, points = await _points_request(request, DerivativeParams, query)
+        source = interpolant_source(data)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    except ValueError as e:
+        return _error(e, "Cannot differentiate the interpolant")
+
+    try:
+        values = await run_in_threadpool(
+            pool.run, differentiate_interpolant, source, points, data.order
+        )
+        return _values_response(request, values)
+    except Exception as e:
+        return _error(e, "Cannot differentiate the interpolant")
+
+
+@router.post(
+    "/integral",
+    response_model=Integral,
+    responses={
+        200: {
+            "model": Integral,
+        },
+        **responses,
+    },
+)
+def integral(
+    params: IntegralParams,
+) -> Union[Integral, JSONResponse]:
+    """
+    The exact integral of an interpolant from a to b.
+    """
+    try:
+        source = interpolant_source(params)
+        return Integral(value=pool.run(integrate_interpolant, source, params.a, params.b))
+    except Exception as e:
+        return _error(e, "Cannot integrate the interpolant")
@@ -7,7 +7,7 @@ import time
 from InterpolationMethods.lagrange import Lagrange
 from InterpolationMethods.vandermonde import Vandermonde
 from InterpolationMethods.newton_int import NewtonInterpol
-from InterpolationMethods.spline import get_spline, SplineType
+from InterpolationMethods.spline import get_spline, spline_coefficients, SplineType
 
 router = APIRouter(
     prefix="/comparisonInterpolation",
@@ -57,7 +57,7 @@ def comparar_metodos(data: ComparacionInterpolacionEntrada) -> List[ComparacionI
     # Lagrange
     try:
         start = time.time()
-        result = Lagrange(data.x, data.y)
+        result = Lagrange(data.x, data.y, symbolic=True)
         tiempo = (time.time() - start) * 1000
         resultados.append(ComparacionInterpolacionResultado(
             metodo="Lagrange",
@@ -86,12 +86,18 @@ def comparar_metodos(data: ComparacionInterpolacionEntrada) -> List[ComparacionI
     if data.grado is not None:
         try:
             start = time.time()
-            spline_type = get_spline_type(data.grado)
-            result = get_spline(data.x, data.y, spline_type)
+            if data.grado > 3:
+                # Grados sin método propio, con el sistema por bandas general
+                metodo = f"Spline grado {data.grado}"
+                coefficients = spline_coefficients(data.x, data.y, data.grado).tolist()
+            else:
+                spline_type = get_spline_type(data.grado)
+                metodo = f"Spline {spline_type.value}"
+                coefficients = get_spline(data.x, data.y, spline_type).coefficients
             tiempo = (time.time() - start) * 1000
             resultados.append(ComparacionInterpolacionResultado(
-                metodo=f"Spline {spline_type.value}",
-                polinomio=format_spline_coefficients(result.coefficients, data.x),
+                metodo=metodo,
+                polinomio=format_spline_coefficients(coefficients, data.x),
                 tiempo_ms=tiempo,
                 grado=data.grado
             ))
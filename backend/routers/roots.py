@@ -3,18 +3,29 @@ from typing import Optional, Union
 from typing import List
 
 from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
-from RootFindingMethods.bisection import (BisectionRoots, BisectionRootsParams,
+from RootFindingMethods.bisection import (BatchBisectionParams, BatchBisectionRoots,
+                               BisectionRoots, BisectionRootsParams,
+                               batch_bisection_roots, bisection_iterations,
                                bisection_roots)
-from RootFindingMethods.newton import NewtonRoots, NewtonRootsParams, newton_roots
+from RootFindingMethods.bracketing import (BracketingParams, BracketingRoots,
+                                 bracketing_iterations, bracketing_roots)
+from RootFindingMethods.isolation import (RootIsolation, RootIsolationParams,
+                                isolate_roots)
+from RootFindingMethods.newton import (NewtonRoots, NewtonRootsParams, newton_iterations,
+                             newton_roots)
 from RootFindingMethods.punto_fijo import (FixedPointParams, FixedPointRoots,
-                                fixed_point_roots)
-from RootFindingMethods.regla_falsa import FalseRuleParams, FalseRuleRoots, ReglaFalsa
-from RootFindingMethods.secante import Secante, SecanteParams, SecanteRoots
+                                fixed_point_iterations, fixed_point_roots)
+from RootFindingMethods.regla_falsa import (FalseRuleParams, FalseRuleRoots, ReglaFalsa,
+                                 regla_falsa_iterations)
+from RootFindingMethods.secante import (Secante, SecanteParams, SecanteRoots,
+                             secante_iterations)
 from RootFindingMethods.symbolic import SymbolicRoots, SymbolicRootsParams, symbolic_roots
 from LinearSystemsMethods.gauss_seidel import gauss_seidel_method, GaussSeidelParams, GaussSeidelResult
+from utils.streaming import StreamFormat, stream_iterations
+from utils.executor import PoolError, pool
 
 
 router = APIRouter(
@@ -33,6 +44,14 @@ responses = {
         "description": "Cannot find roots with the given parameters",
         "model": MethodError,
     },
+    503: {
+        "description": "The server is busy",
+        "model": MethodError,
+    },
+    504: {
+        "description": "The method took too long",
+        "model": MethodError,
+    },
 }
 
 
@@ -50,8 +69,18 @@ def get_symbolic_roots(
     params: SymbolicRootsParams,
 ) -> Union[SymbolicRoots, JSONResponse]:
     try:
-        solution = symbolic_roots(params.expression)
+        solution = symbolic_roots(
+            params.expression, params.timeout, params.lo, params.hi, params.tol
+        )
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -76,8 +105,22 @@ def get_symbolic_roots(
 )
 def get_bisection_roots(
     params: BisectionRootsParams,
-) -> Union[BisectionRoots, JSONResponse]:
+    stream: Optional[StreamFormat] = None,
+) -> Union[BisectionRoots, JSONResponse, StreamingResponse]:
     try:
+        if stream is not None:
+            return stream_iterations(
+                bisection_iterations(
+                    params.expression,
+                    params.error_type,
+                    params.a,
+                    params.b,
+                    params.tol,
+                    params.niter,
+                ),
+                stream,
+                "root",
+            )
         solution = bisection_roots(
             params.expression,
             params.error_type,
@@ -85,8 +128,104 @@ def get_bisection_roots(
             params.b,
             params.tol,
             params.niter,
+            params.layout,
+        )
+        return solution
+    except AssertionError as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/bisection/batch",
+    response_model=BatchBisectionRoots,
+    responses={
+        200: {"model": BatchBisectionRoots},
+        400: {
+            "description": "Wrong parameters",
+            "model": MethodError,
+        },
+        **responses,
+    },
+)
+def get_batch_bisection_roots(
+    params: BatchBisectionParams,
+) -> Union[BatchBisectionRoots, JSONResponse]:
+    try:
+        solution = batch_bisection_roots(
+            params.expression,
+            params.error_type,
+            params.a,
+            params.b,
+            params.tol,
+            params.niter,
+        )
+        return solution
+    except AssertionError as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/all",
+    response_model=RootIsolation,
+    responses={
+        200: {"model": RootIsolation},
+        400: {
+            "description": "Wrong parameters",
+            "model": MethodError,
+        },
+        **responses,
+    },
+)
+def get_all_roots(
+    params: RootIsolationParams,
+) -> Union[RootIsolation, JSONResponse]:
+    try:
+        solution = pool.run(
+            isolate_roots,
+            params.expression,
+            params.lo,
+            params.hi,
+            params.tol,
+            params.grid_points,
+            params.max_depth,
         )
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except AssertionError as e:
         return JSONResponse(
             status_code=400,
@@ -113,10 +252,31 @@ def get_bisection_roots(
         **responses,
     },
 )
-def get_newton_roots(params: NewtonRootsParams) -> NewtonRoots:
+def get_newton_roots(
+    params: NewtonRootsParams, stream: Optional[StreamFormat] = None
+) -> NewtonRoots:
     try:
+        if stream is not None:
+            return stream_iterations(
+                newton_iterations(
+                    params.expression,
+                    params.error_type,
+                    False,
+                    params.x0,
+                    params.tol,
+                    params.niter,
+                ),
+                stream,
+                "root",
+            )
         solution = newton_roots(
-            params.expression, params.error_type, False, params.x0, params.tol, params.niter
+            params.expression,
+            params.error_type,
+            False,
+            params.x0,
+            params.tol,
+            params.niter,
+            params.layout,
         )
         return solution
     except Exception as e:
@@ -137,8 +297,23 @@ def get_newton_roots(params: NewtonRootsParams) -> NewtonRoots:
         **responses,
     },
 )
-def get_fixed_point_params(params: FixedPointParams) -> FixedPointRoots:
+def get_fixed_point_params(
+    params: FixedPointParams, stream: Optional[StreamFormat] = None
+) -> FixedPointRoots:
     try:
+        if stream is not None:
+            return stream_iterations(
+                fixed_point_iterations(
+                    params.f_expr,
+                    params.g_expr,
+                    params.x0,
+                    params.error_type,
+                    params.tol,
+                    params.niter,
+                ),
+                stream,
+                "root",
+            )
         solution = fixed_point_roots(
             params.f_expr,
             params.g_expr,
@@ -146,6 +321,7 @@ def get_fixed_point_params(params: FixedPointParams) -> FixedPointRoots:
             params.error_type,
             params.tol,
             params.niter,
+            params.layout,
         )
         return solution
     except Exception as e:
@@ -166,8 +342,24 @@ def get_fixed_point_params(params: FixedPointParams) -> FixedPointRoots:
         **responses,
     },
 )
-def get_false_rule_params(params: FalseRuleParams) -> FalseRuleRoots:
+def get_false_rule_params(
+    params: FalseRuleParams, stream: Optional[StreamFormat] = None
+) -> FalseRuleRoots:
     try:
+        if stream is not None:
+            return stream_iterations(
+                regla_falsa_iterations(
+                    params.f_expr,
+                    params.xl,
+                    params.xu,
+                    params.tol,
+                    params.niter,
+                    params.error_type,
+                    params.max_evaluations,
+                ),
+                stream,
+                "root",
+            )
         solution = ReglaFalsa(
             params.f_expr,
             params.xl,
@@ -175,6 +367,58 @@ def get_false_rule_params(params: FalseRuleParams) -> FalseRuleRoots:
             params.tol,
             params.niter,
             params.error_type,
+            params.max_evaluations,
+            params.layout,
+        )
+        return solution
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/bracketing",
+    response_model=BracketingRoots,
+    responses={
+        200: {"model": BracketingRoots},
+        **responses,
+    },
+)
+def get_bracketing_roots(
+    params: BracketingParams,
+    stream: Optional[StreamFormat] = None,
+) -> Union[BracketingRoots, JSONResponse, StreamingResponse]:
+    try:
+        if stream is not None:
+            return stream_iterations(
+                bracketing_iterations(
+                    params.expression,
+                    params.method,
+                    params.error_type,
+                    params.a,
+                    params.b,
+                    params.tol,
+                    params.niter,
+                    params.max_evaluations,
+                ),
+                stream,
+                "root",
+            )
+        solution = bracketing_roots(
+            params.expression,
+            params.method,
+            params.error_type,
+            params.a,
+            params.b,
+            params.tol,
+            params.niter,
+            params.max_evaluations,
+            params.layout,
         )
         return solution
     except Exception as e:
@@ -195,8 +439,23 @@ def get_false_rule_params(params: FalseRuleParams) -> FalseRuleRoots:
         **responses,
     },
 )
-def get_Secant_params(params: SecanteParams) -> SecanteRoots:
+def get_Secant_params(
+    params: SecanteParams, stream: Optional[StreamFormat] = None
+) -> SecanteRoots:
     try:
+        if stream is not None:
+            return stream_iterations(
+                secante_iterations(
+                    params.f_expr,
+                    params.x0,
+                    params.x1,
+                    params.niter,
+                    params.tol,
+                    params.error_type,
+                ),
+                stream,
+                "root",
+            )
         solution = Secante(
             params.f_expr,
             params.x0,
@@ -204,6 +463,7 @@ def get_Secant_params(params: SecanteParams) -> SecanteRoots:
             params.niter,
             params.tol,
             params.error_type,
+            params.layout,
         )
         return solution
     except Exception as e:
@@ -1,13 +1,30 @@
 from typing import Optional, Union
 
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, File, UploadFile
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+from LinearSystemsMethods.batch import BatchResult
+from LinearSystemsMethods.direct import DirectParams, DirectResult, direct_method
 from LinearSystemsMethods.gauss_seidel import (GaussSeidelParams, GaussSeidelResult,
-                                  gauss_seidel_method)
-from LinearSystemsMethods.jacobi import JacobiParams, JacobiResult, jacobi_method
-from LinearSystemsMethods.sor import SORParams, SORResult, sor_method
+                                  gauss_seidel_iterations, gauss_seidel_method)
+from LinearSystemsMethods.jacobi import (JacobiParams, JacobiResult, jacobi_iterations,
+                            jacobi_method)
+from LinearSystemsMethods.krylov import (GMRESParams, KrylovParams, KrylovResult,
+                            bicgstab_iterations, bicgstab_method, cg_iterations,
+                            cg_method, gmres_iterations, gmres_method)
+from LinearSystemsMethods.matrices import SystemMatrix
+from LinearSystemsMethods.operators import (MatrixHandle, matrix_handle, resolve_matrix,
+                                upload_handle)
+from LinearSystemsMethods.parallel import (BlockJacobiParams, BlockJacobiResult,
+                              block_jacobi_iterations, block_jacobi_method)
+from LinearSystemsMethods.richardson import (RichardsonParams, RichardsonResult,
+                                richardson_iterations, richardson_method)
+from LinearSystemsMethods.sor import SORParams, SORResult, sor_iterations, sor_method
+from LinearSystemsMethods.spectral import (SpectralRadius, SpectralRadiusParams,
+                              get_spectral_radius)
+from utils.executor import PoolError, pool
+from utils.streaming import StreamFormat, stream_iterations
 
 router = APIRouter(
     prefix="/system-of-equations",
@@ -25,25 +42,45 @@ responses = {
         "description": "Cannot find roots with the given parameters",
         "model": MethodError,
     },
+    503: {
+        "description": "The server is busy",
+        "model": MethodError,
+    },
+    504: {
+        "description": "The method took too long",
+        "model": MethodError,
+    },
 }
 
 
 @router.post(
     "/jacobi",
-    response_model=JacobiResult,
+    response_model=Union[JacobiResult, BatchResult],
     responses={
         200: {
-            "model": JacobiResult,
+            "model": Union[JacobiResult, BatchResult],
         },
         **responses,
     },
 )
 def jacobi_solver(
     params: JacobiParams,
-) -> Union[JacobiResult, JSONResponse]:
+    stream: Optional[StreamFormat] = None,
+) -> Union[JacobiResult, BatchResult, JSONResponse, StreamingResponse]:
     try:
-        solution = jacobi_method(params)
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(jacobi_iterations(params), stream, "solution")
+        solution = pool.run(jacobi_method, params)
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -59,20 +96,32 @@ def jacobi_solver(
 
 @router.post(
     "/gauss-seidel",
-    response_model=GaussSeidelResult,
+    response_model=Union[GaussSeidelResult, BatchResult],
     responses={
         200: {
-            "model": GaussSeidelResult,
+            "model": Union[GaussSeidelResult, BatchResult],
         },
         **responses,
     },
 )
 def gauss_seidel_solver(
     params: GaussSeidelParams,
-) -> Union[GaussSeidelResult, JSONResponse]:
+    stream: Optional[StreamFormat] = None,
+) -> Union[GaussSeidelResult, BatchResult, JSONResponse, StreamingResponse]:
     try:
-        solution = gauss_seidel_method(params)
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(gauss_seidel_iterations(params), stream, "solution")
+        solution = pool.run(gauss_seidel_method, params)
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -85,20 +134,304 @@ def gauss_seidel_solver(
 
 @router.post(
     "/sor",
-    response_model=SORResult,
+    response_model=Union[SORResult, BatchResult],
     responses={
         200: {
-            "model": SORResult,
+            "model": Union[SORResult, BatchResult],
         },
         **responses,
     },
 )
 def sor_solver(
     params: SORParams,
-) -> Union[SORResult, JSONResponse]:
+    stream: Optional[StreamFormat] = None,
+) -> Union[SORResult, BatchResult, JSONResponse, StreamingResponse]:
+    try:
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(sor_iterations(params), stream, "solution")
+        solution = pool.run(sor_method, params)
+        return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/cg",
+    response_model=KrylovResult,
+    responses={
+        200: {
+            "model": KrylovResult,
+        },
+        **responses,
+    },
+)
+def cg_solver(
+    params: KrylovParams,
+    stream: Optional[StreamFormat] = None,
+) -> Union[KrylovResult, JSONResponse, StreamingResponse]:
+    try:
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(cg_iterations(params), stream, "solution")
+        solution = pool.run(cg_method, params)
+        return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/bicgstab",
+    response_model=KrylovResult,
+    responses={
+        200: {
+            "model": KrylovResult,
+        },
+        **responses,
+    },
+)
+def bicgstab_solver(
+    params: KrylovParams,
+    stream: Optional[StreamFormat] = None,
+) -> Union[KrylovResult, JSONResponse, StreamingResponse]:
+    try:
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(bicgstab_iterations(params), stream, "solution")
+        solution = pool.run(bicgstab_method, params)
+        return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/gmres",
+    response_model=KrylovResult,
+    responses={
+        200: {
+            "model": KrylovResult,
+        },
+        **responses,
+    },
+)
+def gmres_solver(
+    params: GMRESParams,
+    stream: Optional[StreamFormat] = None,
+) -> Union[KrylovResult, JSONResponse, StreamingResponse]:
+    try:
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(gmres_iterations(params), stream, "solution")
+        solution = pool.run(gmres_method, params)
+        return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/direct",
+    response_model=DirectResult,
+    responses={
+        200: {
+            "model": DirectResult,
+        },
+        **responses,
+    },
+)
+def direct_solver(params: DirectParams) -> Union[DirectResult, JSONResponse]:
+    try:
+        params = resolve_matrix(params)
+        solution = pool.run(direct_method, params)
+        return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/block-jacobi",
+    response_model=BlockJacobiResult,
+    responses={
+        200: {
+            "model": BlockJacobiResult,
+        },
+        **responses,
+    },
+)
+def block_jacobi_solver(
+    params: BlockJacobiParams,
+    stream: Optional[StreamFormat] = None,
+) -> Union[BlockJacobiResult, JSONResponse, StreamingResponse]:
+    try:
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(block_jacobi_iterations(params), stream, "solution")
+        # Not sent to the pool: the solve starts worker processes of its own,
+        # which the daemonic pool workers cannot do
+        solution = block_jacobi_method(params)
+        return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/richardson",
+    response_model=RichardsonResult,
+    responses={
+        200: {
+            "model": RichardsonResult,
+        },
+        **responses,
+    },
+)
+def richardson_solver(
+    params: RichardsonParams,
+    stream: Optional[StreamFormat] = None,
+) -> Union[RichardsonResult, JSONResponse, StreamingResponse]:
+    try:
+        params = resolve_matrix(params)
+        if stream is not None:
+            return stream_iterations(richardson_iterations(params), stream, "solution")
+        solution = pool.run(richardson_method, params)
+        return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/spectral-radius",
+    response_model=SpectralRadius,
+    responses={
+        200: {
+            "model": SpectralRadius,
+        },
+        400: {
+            "description": "Wrong parameters",
+            "model": MethodError,
+        },
+        **responses,
+    },
+)
+def spectral_radius_solver(
+    params: SpectralRadiusParams,
+) -> Union[SpectralRadius, JSONResponse]:
     try:
-        solution = sor_method(params)
+        params = resolve_matrix(params)
+        solution = pool.run(get_spectral_radius, params)
         return solution
+    except PoolError as e:
+        return JSONResponse(
+            status_code=e.status_code,
+            content={
+                "detail": e.detail,
+                "error": str(e),
+            },
+        )
+    except AssertionError as e:
+        return JSONResponse(
+            status_code=400,
+            content={
+                "detail": "Cannot find roots with the given parameters",
+                "error": str(e),
+            },
+        )
     except Exception as e:
         return JSONResponse(
             status_code=409,
@@ -107,3 +440,64 @@ def sor_solver(
                 "error": str(e),
             },
         )
+
+
+@router.post(
+    "/matrices",
+    response_model=MatrixHandle,
+    responses={
+        200: {
+            "model": MatrixHandle,
+        },
+        409: {
+            "description": "Cannot store the matrix",
+            "model": MethodError,
+        },
+    },
+)
+def store_matrix(params: SystemMatrix) -> Union[MatrixHandle, JSONResponse]:
+    """
+    Store a matrix without solving anything, so the next requests can send its
+    matrix_id instead of matrix_a.
+    """
+    try:
+        return matrix_handle(params)
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot store the matrix",
+                "error": str(e),
+            },
+        )
+
+
+@router.post(
+    "/matrices/upload",
+    response_model=MatrixHandle,
+    responses={
+        200: {
+            "model": MatrixHandle,
+        },
+        409: {
+            "description": "Cannot store the matrix",
+            "model": MethodError,
+        },
+    },
+)
+def upload_matrix(file: UploadFile = File(...)) -> Union[MatrixHandle, JSONResponse]:
+    """
+    Store a matrix sent as a .npy, .npz (dense array or scipy.sparse.save_npz)
+    or Matrix Market file. The matrix_id returned works in every solver, which
+    reads the stored arrays memory-mapped.
+    """
+    try:
+        return upload_handle(file.filename or "", file.file)
+    except Exception as e:
+        return JSONResponse(
+            status_code=409,
+            content={
+                "detail": "Cannot store the matrix",
+                "error": str(e),
+            },
+        )
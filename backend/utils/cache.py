@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from pydantic import BaseModel
+
+CACHES: Dict[str, "LRUCache"] = {}
+
+
+class CacheStats(BaseModel):
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int = 0
+    ttl: Optional[float] = None
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by number of entries and by an
+    approximate memory size in bytes, and optionally by the time since each
+    entry was last stored or read.
+
+    Parameters
+    ==========
+
+    name: Name used to register the cache in CACHES, so its stats can be exposed.
+    max_entries: Maximum number of entries kept.
+    max_bytes: Maximum approximate size of all the entries.
+    sizeof: Function returning the approximate size in bytes of a value.
+    on_evict: Function called with (key, value) whenever an entry is dropped.
+    ttl: Seconds an entry is kept without being used, None keeps it until it
+        is evicted.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int,
+        max_bytes: int,
+        sizeof: Callable[[Any], int],
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        ttl: Optional[float] = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._expires: Dict[Hashable, float] = {}
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        CACHES[name] = self
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            self._expire()
+            return key in self._data
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            self._expire()
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._touch(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            size = self.sizeof(value)
+            self._data[key] = value
+            self._sizes[key] = size
+            self._bytes += size
+            self._touch(key)
+            self._expire()
+            self._shrink()
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, building and storing it with factory on a miss.
+        """
+
+        with self._lock:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                value = factory()
+                self.put(key, value)
+            return value
+
+    def resize(self, key: Hashable) -> None:
+        """
+        Recompute the size of an entry whose value grew after being stored.
+        """
+
+        with self._lock:
+            if key not in self._data:
+                return
+            size = self.sizeof(self._data[key])
+            self._bytes += size - self._sizes[key]
+            self._sizes[key] = size
+            self._shrink()
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._data):
+                self._drop(key)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            self._expire()
+            return CacheStats(
+                entries=len(self._data),
+                bytes=self._bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                ttl=self.ttl,
+            )
+
+    def _touch(self, key: Hashable) -> None:
+        # Every use moves the entry to the end and pushes its expiry back, so the
+        # entries stay sorted by expiry time too
+        self._data.move_to_end(key)
+        if self.ttl is not None:
+            self._expires[key] = time.monotonic() + self.ttl
+
+    def _expire(self) -> None:
+        if self.ttl is None:
+            return
+        now = time.monotonic()
+        while self._data:
+            key = next(iter(self._data))
+            if self._expires[key] > now:
+                break
+            self._drop(key)
+            self.expirations += 1
+
+    def _shrink(self) -> None:
+        # The most recent entry is always kept, even if it alone exceeds max_bytes
+        while len(self._data) > 1 and (
+            len(self._data) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key = next(iter(self._data))
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key: Hashable) -> None:
+        value = self._data.pop(key)
+        self._bytes -= self._sizes.pop(key)
+        self._expires.pop(key, None)
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+
+_MISSING = object()
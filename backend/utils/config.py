@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+# Compiled-expression cache (utils/expressions.py)
+EXPRESSION_CACHE_MAX_ENTRIES = _env_int("EXPRESSION_CACHE_MAX_ENTRIES", 512)
+EXPRESSION_CACHE_MAX_BYTES = _env_int("EXPRESSION_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+
+
+# Process pool for CPU-bound method calls (utils/executor.py), 0 workers runs
+# the calls inline in the request thread
+EXECUTOR_WORKERS = _env_int("EXECUTOR_WORKERS", min(4, os.cpu_count() or 1))
+EXECUTOR_MAX_QUEUE = _env_int("EXECUTOR_MAX_QUEUE", 32)
+EXECUTOR_TIMEOUT = _env_float("EXECUTOR_TIMEOUT", 30.0)
+
+# Deadline of sympy.solve before /roots/symbolic falls back to a numeric method
+SYMBOLIC_TIMEOUT = _env_float("SYMBOLIC_TIMEOUT", 5.0)
+
+# Splittings, spectral radii and preconditioners derived from a matrix, keyed by
+# its fingerprint (LinearSystemsMethods/operators.py). Every pool worker keeps
+# its own cache
+OPERATOR_CACHE_MAX_ENTRIES = _env_int("OPERATOR_CACHE_MAX_ENTRIES", 256)
+OPERATOR_CACHE_MAX_BYTES = _env_int("OPERATOR_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+
+# Matrices sent to /system-of-equations, which later requests can reference by
+# their matrix_id instead of sending them again
+MATRIX_STORE_MAX_ENTRIES = _env_int("MATRIX_STORE_MAX_ENTRIES", 64)
+MATRIX_STORE_MAX_BYTES = _env_int("MATRIX_STORE_MAX_BYTES", 512 * 1024 * 1024)
+
+# Content-addressed store of uploaded matrices, read back memory-mapped
+# (LinearSystemsMethods/storage.py)
+MATRIX_STORE_DIR = os.environ.get(
+    "MATRIX_STORE_DIR", os.path.join(tempfile.gettempdir(), "numerical-analysis-matrices")
+)
+MATRIX_UPLOAD_MAX_BYTES = _env_int("MATRIX_UPLOAD_MAX_BYTES", 1024 * 1024 * 1024)
+
+# Parallel block-Jacobi solves (LinearSystemsMethods/parallel.py). Every solve
+# starts its own worker processes, at most this many, and at most
+# PARALLEL_MAX_SOLVES solves run at a time
+PARALLEL_MAX_WORKERS = _env_int("PARALLEL_MAX_WORKERS", os.cpu_count() or 1)
+PARALLEL_MAX_SOLVES = _env_int("PARALLEL_MAX_SOLVES", 1)
+
+# Query points accepted by /interpolation/evaluate in one request
+INTERPOLATION_MAX_POINTS = _env_int("INTERPOLATION_MAX_POINTS", 10_000_000)
+
+# Fitted interpolants kept for /interpolation/evaluate, /derivative and
+# /integral by interpolant_id, dropped after INTERPOLANT_CACHE_TTL seconds
+# without use
+INTERPOLANT_CACHE_MAX_ENTRIES = _env_int("INTERPOLANT_CACHE_MAX_ENTRIES", 256)
+INTERPOLANT_CACHE_MAX_BYTES = _env_int("INTERPOLANT_CACHE_MAX_BYTES", 128 * 1024 * 1024)
+INTERPOLANT_CACHE_TTL = _env_float("INTERPOLANT_CACHE_TTL", 3600.0)
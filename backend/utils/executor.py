@@ -0,0 +1,177 @@
+import multiprocessing
+import queue
+import signal
+import threading
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List, Optional, TypeVar
+
+from utils.config import EXECUTOR_MAX_QUEUE, EXECUTOR_TIMEOUT, EXECUTOR_WORKERS
+
+T = TypeVar("T")
+
+_READY = "ready"
+
+
+class PoolError(Exception):
+    status_code = 503
+    detail = "The server cannot run the method right now"
+
+
+class PoolOverloaded(PoolError):
+    status_code = 503
+    detail = "The server is busy, try again later"
+
+
+class TaskTimeout(PoolError):
+    status_code = 504
+    detail = "The method took too long and was stopped"
+
+
+class WorkerDied(PoolError):
+    status_code = 500
+    detail = "The method crashed the worker running it"
+
+
+def _warm_up() -> None:
+    # Pay the sympy import and the Latex parser start-up before the first task
+    import sympy  # noqa: F401
+    from sympy.parsing.latex import parse_latex
+
+    import utils.parsing  # noqa: F401
+
+    parse_latex("x")
+
+
+def _worker_main(conn: Connection) -> None:
+    # Ctrl+C is handled by the server, which then shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _warm_up()
+    conn.send(_READY)
+
+    while True:
+        try:
+            fn, args, kwargs = conn.recv()
+        except EOFError:
+            return
+        try:
+            result = (True, fn(*args, **kwargs))
+        except Exception as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:
+            # The result or the exception could not be pickled
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    def __init__(self, context: multiprocessing.context.BaseContext):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def call(self, fn: Callable[..., T], args: tuple, kwargs: dict, timeout: float) -> T:
+        try:
+            if not self.ready:
+                self.conn.recv()
+                self.ready = True
+            self.conn.send((fn, args, kwargs))
+            if not self.conn.poll(timeout):
+                raise TaskTimeout(f"The method did not finish in {timeout:g} seconds")
+            ok, value = self.conn.recv()
+        except (EOFError, OSError) as e:
+            raise WorkerDied(f"The worker process exited: {e}") from e
+        if not ok:
+            raise value
+        return value
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class ProcessPool:
+    """
+    Pool of pre-warmed worker processes for CPU-bound method calls, so a slow
+    computation neither holds the GIL of the server nor blocks its threadpool.
+
+    A task that exceeds its timeout is stopped by killing its worker, which is
+    replaced by a fresh one. At most workers + max_queue tasks are admitted at a
+    time, the rest are rejected with PoolOverloaded.
+
+    Parameters
+    ==========
+
+    workers: The number of worker processes, 0 runs every call inline.
+    max_queue: The number of tasks that may wait for a free worker.
+    timeout: The default time limit of a task, in seconds.
+    """
+
+    def __init__(self, workers: int, max_queue: int, timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._idle: "queue.SimpleQueue[_Worker]" = queue.SimpleQueue()
+        self._all: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self) -> None:
+        with self._lock:
+            if self._all or self.workers == 0:
+                return
+            for _ in range(self.workers):
+                worker = _Worker(self._context)
+                self._all.append(worker)
+                self._idle.put(worker)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for worker in self._all:
+                worker.kill()
+            self._all.clear()
+            self._idle = queue.SimpleQueue()
+
+    def run(
+        self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any
+    ) -> T:
+        """
+        Call fn(*args, **kwargs) in a worker and return its result, re-raising
+        any exception it raises. fn, its arguments and its result must be
+        picklable, i.e. fn is a module-level function.
+        """
+
+        if self.workers == 0:
+            return fn(*args, **kwargs)
+
+        self.start()
+        if not self._slots.acquire(blocking=False):
+            raise PoolOverloaded(
+                f"More than {self.workers + self.max_queue} methods are running or waiting"
+            )
+        try:
+            worker = self._idle.get()
+            try:
+                return worker.call(fn, args, kwargs, timeout or self.timeout)
+            except (TaskTimeout, WorkerDied):
+                worker = self._replace(worker)
+                raise
+            finally:
+                self._idle.put(worker)
+        finally:
+            self._slots.release()
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        fresh = _Worker(self._context)
+        with self._lock:
+            self._all = [fresh if w is worker else w for w in self._all]
+        return fresh
+
+
+pool = ProcessPool(EXECUTOR_WORKERS, EXECUTOR_MAX_QUEUE, EXECUTOR_TIMEOUT)
@@ -0,0 +1,123 @@
+import re
+import threading
+from typing import Callable, Dict, Hashable, Tuple, Union
+
+import sympy
+
+from utils.cache import LRUCache
+from utils.config import EXPRESSION_CACHE_MAX_BYTES, EXPRESSION_CACHE_MAX_ENTRIES
+
+x = sympy.Symbol("x")
+
+# Rough per-artifact sizes used to bound the cache memory
+NODE_BYTES = 200
+CALLABLE_BYTES = 4096
+
+
+def normalize_latex(expression: str) -> str:
+    """
+    Normalize a Latex string so equivalent spellings share a cache entry.
+    """
+
+    return re.sub(r"\s+", " ", expression).strip()
+
+
+class CompiledExpression:
+    """
+    A validated sympy expression of x with its lambdified callables and
+    derivatives, built lazily and kept for reuse across requests.
+    """
+
+    def __init__(self, expr: sympy.Expr):
+        self.expr = expr
+        self._derivatives: Dict[int, sympy.Expr] = {0: expr}
+        self._functions: Dict[Tuple[int, str], Callable] = {}
+        self._lock = threading.Lock()
+
+    def derivative(self, order: int = 1) -> sympy.Expr:
+        with self._lock:
+            while len(self._derivatives) <= order:
+                k = len(self._derivatives)
+                self._derivatives[k] = self._derivatives[k - 1].diff(x)
+            return self._derivatives[order]
+
+    def function(self, module: str = "math", order: int = 0) -> Callable:
+        """
+        Return the lambdified expression (or its derivative of the given order)
+        for the given lambdify module, "math" or "numpy".
+        """
+
+        key = (order, module)
+        if key not in self._functions:
+            # parse_latex leaves nodes such as log(x, E) unevaluated, which the
+            # numpy printer turns into np.log(x, out=E)
+            expr = self.derivative(order).doit()
+            with self._lock:
+                if key not in self._functions:
+                    self._functions[key] = sympy.lambdify(x, expr, module, docstring_limit=-1)
+            _resize(self)
+        return self._functions[key]
+
+    def nbytes(self) -> int:
+        derivatives = list(self._derivatives.values())
+        nodes = sum(sum(1 for _ in sympy.preorder_traversal(e)) for e in derivatives)
+        return nodes * NODE_BYTES + len(self._functions) * CALLABLE_BYTES
+
+
+# Maps each cached expression back to its cache key, so methods that only get
+# the sympy expression (from ExpressionAnnotation) hit the same entry. It is only
+# written from inside the cache lock.
+_keys: Dict[sympy.Expr, Hashable] = {}
+
+
+def _forget(key: Hashable, entry: CompiledExpression) -> None:
+    if _keys.get(entry.expr) == key:
+        del _keys[entry.expr]
+
+
+expression_cache = LRUCache(
+    "expressions",
+    max_entries=EXPRESSION_CACHE_MAX_ENTRIES,
+    max_bytes=EXPRESSION_CACHE_MAX_BYTES,
+    sizeof=CompiledExpression.nbytes,
+    on_evict=_forget,
+)
+
+
+def _resize(entry: CompiledExpression) -> None:
+    key = _keys.get(entry.expr)
+    if key is not None:
+        expression_cache.resize(key)
+
+
+def cache_expression(key: Hashable, builder: Callable[[], sympy.Expr]) -> CompiledExpression:
+    """
+    Return the compiled expression stored under key, building the sympy
+    expression with builder on a miss.
+    """
+
+    def factory() -> CompiledExpression:
+        entry = CompiledExpression(builder())
+        _keys.setdefault(entry.expr, key)
+        return entry
+
+    return expression_cache.get_or_create(key, factory)
+
+
+def compile_expression(expression: Union[str, sympy.Expr]) -> CompiledExpression:
+    """
+    Get the cached compiled form of an expression.
+
+    Parameters
+    ==========
+
+    expression: A Latex string or a sympy expression of x.
+    """
+
+    if isinstance(expression, str):
+        from utils.parsing import parse_function_expression
+
+        return compile_expression(parse_function_expression(expression))
+
+    key = _keys.get(expression, expression)
+    return cache_expression(key, lambda: expression)
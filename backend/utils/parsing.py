@@ -7,6 +7,8 @@ from pydantic.functional_validators import AfterValidator
 from sympy.parsing.latex import parse_latex
 from typing_extensions import Annotated
 
+from utils.expressions import cache_expression, normalize_latex
+
 x = sympy.Symbol("x")
 pi_symbol = sympy.Symbol("pi")
 e_symbol = sympy.Symbol("e")
@@ -71,6 +73,7 @@ def check_expression_tree(expression: sympy.Expr) -> bool:
 def parse_function_expression(expression: str) -> sympy.Expr:
     """
     This function parses a string containing a function expression in Latex syntax and returns a sympy expression.
+    Validated expressions are kept in the compiled-expression cache, keyed on the normalized Latex string.
 
     Parameters
     ==========
@@ -81,6 +84,13 @@ def parse_function_expression(expression: str) -> sympy.Expr:
     assert re.match(
         EXPRESSION_REGEX, expression
     ), "Expression contains invalid characters"
+
+    return cache_expression(
+        normalize_latex(expression), lambda: _parse_and_check(expression)
+    ).expr
+
+
+def _parse_and_check(expression: str) -> sympy.Expr:
     print(expression)
 
     try:
@@ -0,0 +1,64 @@
+import json
+from enum import Enum
+from typing import Any, Dict, Generator, Iterator
+
+import numpy as np
+from fastapi.responses import StreamingResponse
+
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    SSE = "sse"
+
+
+MEDIA_TYPES = {
+    StreamFormat.NDJSON: "application/x-ndjson",
+    StreamFormat.SSE: "text/event-stream",
+}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_event(event: str, data: Any, fmt: StreamFormat) -> str:
+    if fmt == StreamFormat.SSE:
+        return f"event: {event}\ndata: {json.dumps(data, default=_default)}\n\n"
+    return json.dumps({"event": event, "data": data}, default=_default) + "\n"
+
+
+def stream_iterations(
+    iterations: Generator[Dict[str, Any], None, Any],
+    fmt: StreamFormat,
+    result_key: str,
+) -> StreamingResponse:
+    """
+    Stream the rows of an iteration generator as they are produced, one
+    "iteration" event per row, followed by a "result" event holding the value
+    the generator returns under result_key, or an "error" event if it raises.
+
+    The first row is computed before the response starts, so invalid parameters
+    still raise here and get a regular error response from the router.
+    """
+
+    try:
+        first = next(iterations)
+    except StopIteration as stop:
+        return StreamingResponse(
+            iter([encode_event("result", {result_key: stop.value}, fmt)]),
+            media_type=MEDIA_TYPES[fmt],
+        )
+
+    def events() -> Iterator[str]:
+        yield encode_event("iteration", first, fmt)
+        try:
+            while True:
+                yield encode_event("iteration", next(iterations), fmt)
+        except StopIteration as stop:
+            yield encode_event("result", {result_key: stop.value}, fmt)
+        except Exception as e:
+            yield encode_event("error", {"error": str(e)}, fmt)
+
+    return StreamingResponse(events(), media_type=MEDIA_TYPES[fmt])
@@ -0,0 +1,104 @@
+from enum import Enum
+from typing import Any, Dict, Generator, List, Optional, Tuple, TypeVar, Union
+
+import numpy as np
+
+
+class TableLayout(str, Enum):
+    ROWS = "rows"
+    COLUMNS = "columns"
+
+
+ColumnSpec = Union[type, Tuple[type, int]]
+T = TypeVar("T")
+
+
+class IterationTrace:
+    """
+    Iteration table stored as one preallocated NumPy array per column and a
+    length counter, instead of a list of dicts.
+
+    Parameters
+    ==========
+
+    capacity: The expected number of rows, the arrays grow if it falls short.
+    columns: The dtype of each column, or a (dtype, width) tuple for vector
+        columns such as the iterate x of a linear system.
+    """
+
+    def __init__(self, capacity: int, **columns: ColumnSpec):
+        capacity = max(capacity, 1)
+        self.length = 0
+        self._columns: Dict[str, np.ndarray] = {}
+        for name, spec in columns.items():
+            dtype, width = spec if isinstance(spec, tuple) else (spec, None)
+            shape = (capacity,) if width is None else (capacity, width)
+            self._columns[name] = np.empty(shape, dtype=dtype)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def append(self, **values: Any) -> None:
+        if self.length == len(next(iter(self._columns.values()))):
+            self._grow()
+        for name, column in self._columns.items():
+            column[self.length] = values[name]
+        self.length += 1
+
+    def column(self, name: str) -> np.ndarray:
+        return self._columns[name][: self.length]
+
+    def last(self, name: str) -> Any:
+        return self._columns[name][self.length - 1]
+
+    def to_columns(self, names: Optional[Dict[str, str]] = None) -> Dict[str, list]:
+        """
+        Return the table as {column: values}, optionally selecting and renaming
+        columns with names, a {trace column: output key} mapping.
+        """
+
+        names = names or {name: name for name in self._columns}
+        return {key: self.column(name).tolist() for name, key in names.items()}
+
+    def to_rows(self, names: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        columns = self.to_columns(names)
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+    def export(
+        self,
+        layout: TableLayout,
+        field: str = "table",
+        names: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Return the keyword arguments of a result model for the requested layout:
+        the rows under field, or an empty field and the arrays under "columns".
+        """
+
+        if layout == TableLayout.COLUMNS:
+            return {field: [], "columns": self.to_columns(names)}
+        return {field: self.to_rows(names)}
+
+    def _grow(self) -> None:
+        for name, column in self._columns.items():
+            grown = np.empty((2 * len(column),) + column.shape[1:], dtype=column.dtype)
+            grown[: len(column)] = column
+            self._columns[name] = grown
+
+
+def drain(
+    iterations: Generator[Dict[str, Any], None, T], trace: Optional[IterationTrace] = None
+) -> T:
+    """
+    Run an iteration generator to the end, appending every row it yields to
+    trace, and return the generator's return value.
+    """
+
+    while True:
+        try:
+            row = next(iterations)
+        except StopIteration as stop:
+            return stop.value
+        if trace is not None:
+            trace.append(**row)
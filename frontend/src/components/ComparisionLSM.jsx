@@ -151,7 +151,7 @@ function ComparisionLSM() {
                   <td className="border px-4 py-2">{res.metodo}</td>
                   <td className="border px-4 py-2">{res.iteraciones}</td>
                   <td className="border px-4 py-2">{res.error_final.toExponential(2)}</td>
-                  <td className="border px-4 py-2">{res.radio_espectral.toFixed(4)}</td>
+                  <td className="border px-4 py-2">{res.radio_espectral != null ? res.radio_espectral.toFixed(4) : "—"}</td>
                   <td className="border px-4 py-2">{res.converge ? "Sí" : "No"}</td>
                   <td className="border px-4 py-2">{res.tiempo_ms.toFixed(2)}</td>
                 </tr>
@@ -36,6 +36,7 @@ const LagrangeForm = () => {
       const res = await axios.post("http://localhost:8000/interpolation/lagrange", {
         x,
         y,
+        symbolic: true,
       });
       setResult(res.data);
     } catch (err) {
@@ -130,6 +131,11 @@ const LagrangeForm = () => {
           <h3 className="font-semibold mt-4">Polinomio resultante:</h3>
           <p className="mt-2 bg-gray-100 p-3 rounded font-mono">{result.pol}</p>
 
+          <h3 className="font-semibold mt-4">Pesos baricéntricos:</h3>
+          <p className="mt-2 bg-gray-100 p-3 rounded font-mono">
+            {result.weights.map((w) => w.toPrecision(6)).join(", ")}
+          </p>
+
           {/* Contenedor de la gráfica */}
           <div className="mt-6">
             <h3 className="font-semibold mb-2">Gráfica del polinomio:</h3>
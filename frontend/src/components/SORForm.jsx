@@ -9,6 +9,7 @@ const SORForm = () => {
   const [tol, setTol] = useState(0.0001);
   const [niter, setNiter] = useState(25);
   const [relaxationFactor, setRelaxationFactor] = useState(1.0);
+  const [autoRelaxation, setAutoRelaxation] = useState(false);
   const [result, setResult] = useState(null);
 
   useEffect(() => {
@@ -37,7 +38,7 @@ const SORForm = () => {
         matrix_a: matrixA,
         vector_b: vectorB,
         x0,
-        relaxation_factor: relaxationFactor,
+        relaxation_factor: autoRelaxation ? "auto" : relaxationFactor,
         tol,
         niter,
       });
@@ -130,8 +131,18 @@ const SORForm = () => {
             value={relaxationFactor}
             onChange={(e) => setRelaxationFactor(parseFloat(e.target.value))}
             className="w-32 px-2 py-1 border rounded"
+            disabled={autoRelaxation}
             required
           />
+          <label className="block mt-1">
+            <input
+              type="checkbox"
+              checked={autoRelaxation}
+              onChange={(e) => setAutoRelaxation(e.target.checked)}
+              className="mr-1"
+            />
+            Automático (w óptimo)
+          </label>
         </div>
         <div>
           <label className="block font-semibold mb-1">Tolerancia</label>
@@ -162,7 +173,11 @@ const SORForm = () => {
 
       {result && (
         <div className="mt-6">
+          <p><strong>Factor de relajación:</strong> {result.relaxation_factor.toFixed(4)}</p>
           <p><strong>Radio espectral:</strong> {result.spectral_radius.toFixed(6)}</p>
+          {result.convergence_rate != null && (
+            <p><strong>Dígitos ganados por iteración:</strong> {result.convergence_rate.toFixed(3)}</p>
+          )}
           <p><strong>¿Converge?</strong> {result.converges ? "Sí" : "No"}</p>
 
           <h3 className="mt-4 font-semibold">Iteraciones:</h3>
@@ -8,6 +8,8 @@ const SplineForm = () => {
     { x: 1, y: 1 },
   ]);
   const [splineType, setSplineType] = useState("linear");
+  const [boundary, setBoundary] = useState("natural");
+  const [endSlopes, setEndSlopes] = useState({ start: 0, end: 0 });
   const [result, setResult] = useState(null);
   const calculatorRef = useRef(null);
 
@@ -38,6 +40,8 @@ const SplineForm = () => {
         x: points.map((p) => p.x),
         y: points.map((p) => p.y),
         d: splineType,
+        boundary,
+        end_slopes: boundary === "clamped" ? [endSlopes.start, endSlopes.end] : null,
       });
       setResult(res.data);
     } catch (err) {
@@ -142,6 +146,39 @@ const SplineForm = () => {
         </select>
       </div>
 
+      {splineType === "cubic" && (
+        <div className="mb-4 flex items-center gap-2">
+          <label className="mr-2 font-medium">Condición de frontera:</label>
+          <select
+            value={boundary}
+            onChange={(e) => setBoundary(e.target.value)}
+            className="border rounded px-2 py-1"
+          >
+            <option value="natural">Natural</option>
+            <option value="clamped">Sujeta</option>
+            <option value="not_a_knot">Not-a-knot</option>
+          </select>
+          {boundary === "clamped" && (
+            <>
+              <label>Pendiente inicial:</label>
+              <input
+                type="number"
+                value={endSlopes.start}
+                onChange={(e) => setEndSlopes({ ...endSlopes, start: parseFloat(e.target.value) })}
+                className="w-24 px-2 py-1 border rounded"
+              />
+              <label>Pendiente final:</label>
+              <input
+                type="number"
+                value={endSlopes.end}
+                onChange={(e) => setEndSlopes({ ...endSlopes, end: parseFloat(e.target.value) })}
+                className="w-24 px-2 py-1 border rounded"
+              />
+            </>
+          )}
+        </div>
+      )}
+
       <div className="mb-4 flex gap-4">
         <button onClick={addPoint} className="bg-gray-200 px-3 py-1 rounded">
           Agregar punto